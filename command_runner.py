@@ -0,0 +1,191 @@
+import subprocess
+import threading
+import time
+from collections import deque
+
+DEFAULT_TIMEOUT = 60
+TERMINATE_GRACE = 3 # Seconds a terminated command gets before it is killed
+POLL_INTERVAL = 0.1
+HISTORY_LENGTH = 100
+
+class CommandCancelled(Exception):
+    """Raised by run_command when its cancel_event is set before the command finishes"""
+
+class CommandResult:
+    __slots__ = ('args', 'returncode', 'stdout', 'stderr', 'duration')
+
+    def __init__(self, args, returncode, stdout, stderr, duration):
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+
+    def __repr__(self):
+        return f"CommandResult({self.args!r}, returncode={self.returncode}, duration={self.duration:.3f})"
+
+def _pump(stream, lines, prefix, output_callback):
+    for line in iter(stream.readline, ''):
+        lines.append(line)
+        if output_callback:
+            output_callback(f"{prefix} {line.rstrip()}")
+    stream.close()
+
+def _stop(process):
+    process.terminate()
+    try:
+        process.wait(TERMINATE_GRACE)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+class SubprocessBackend:
+    """Runs real processes"""
+
+    def run(self, args, timeout, cancel_event, output_callback):
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                                   text=True, errors='replace')
+        prefix = f"[{args[0]}]"
+        stdout, stderr = [], []
+        pumps = [threading.Thread(target=_pump, args=(process.stdout, stdout, prefix, output_callback), daemon=True),
+                 threading.Thread(target=_pump, args=(process.stderr, stderr, prefix, output_callback), daemon=True)]
+        for pump in pumps:
+            pump.start()
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                try:
+                    process.wait(POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if cancel_event is not None and cancel_event.is_set():
+                    _stop(process)
+                    raise CommandCancelled(f"{args[0]} was cancelled")
+                if deadline is not None and time.monotonic() > deadline:
+                    _stop(process)
+                    raise subprocess.TimeoutExpired(args, timeout, ''.join(stdout), ''.join(stderr))
+        finally:
+            for pump in pumps:
+                pump.join(1)
+        return process.returncode, ''.join(stdout), ''.join(stderr)
+
+    def spawn(self, args, output_callback):
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                   text=True, errors='replace')
+        threading.Thread(target=_pump, args=(process.stdout, [], f"[{args[0]}]", output_callback), daemon=True).start()
+        return process
+
+class FakeBackend:
+    """Scripted stand-in for SubprocessBackend, so VPN and RDP flows run without the real tools.
+
+    Register responses with add(); the longest registered prefix of a
+    command's arguments wins. Unregistered commands raise FileNotFoundError
+    like a missing binary would. Every command is appended to `calls`, and
+    spawned programs are kept in `spawned` as FakeProcess objects.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+        self.spawned = []
+
+    def add(self, args, returncode=0, stdout='', stderr='', delay=0.0):
+        self.responses[tuple(args)] = (returncode, stdout, stderr, delay)
+
+    def _response(self, args):
+        self.calls.append(list(args))
+        for length in range(len(args), 0, -1):
+            response = self.responses.get(tuple(args[:length]))
+            if response is not None:
+                return response
+        raise FileNotFoundError(args[0])
+
+    def run(self, args, timeout, cancel_event, output_callback):
+        returncode, stdout, stderr, delay = self._response(args)
+        waited = min(delay, timeout) if timeout else delay
+        if cancel_event is not None:
+            if cancel_event.wait(waited):
+                raise CommandCancelled(f"{args[0]} was cancelled")
+        else:
+            time.sleep(waited)
+        if timeout and delay > timeout:
+            raise subprocess.TimeoutExpired(args, timeout, stdout, stderr)
+        if output_callback:
+            for line in (stdout + stderr).splitlines():
+                output_callback(f"[{args[0]}] {line}")
+        return returncode, stdout, stderr
+
+    def spawn(self, args, output_callback):
+        _, stdout, stderr, _ = self._response(args)
+        if output_callback:
+            for line in (stdout + stderr).splitlines():
+                output_callback(f"[{args[0]}] {line}")
+        process = FakeProcess(args)
+        self.spawned.append(process)
+        return process
+
+class FakeProcess:
+    """Popen look-alike returned by FakeBackend.spawn; runs until exit() or terminate() is called"""
+    _next_pid = 1000
+
+    def __init__(self, args):
+        self.args = list(args)
+        self.pid = FakeProcess._next_pid
+        FakeProcess._next_pid += 1
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def exit(self, returncode=0):
+        self.returncode = returncode
+
+    def terminate(self):
+        self.exit(-15)
+
+    kill = terminate
+
+_backend = SubprocessBackend()
+history = deque(maxlen=HISTORY_LENGTH) # Recent CommandResults, newest last
+
+def set_backend(backend):
+    """Swap the process backend (e.g. a FakeBackend); returns the previous one"""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+def get_backend():
+    return _backend
+
+def run_command(args, timeout=DEFAULT_TIMEOUT, cancel_event=None, output_callback=None, check=False):
+    """Run a command to completion and return a CommandResult.
+
+    Output lines are passed to output_callback as they arrive, prefixed with
+    the program name. Raises subprocess.TimeoutExpired after `timeout` seconds,
+    CommandCancelled once cancel_event is set (the process is terminated in
+    both cases), FileNotFoundError if the program is missing and, with
+    check=True, subprocess.CalledProcessError on a non-zero exit status.
+    """
+    start = time.monotonic()
+    returncode, stdout, stderr = _backend.run(list(args), timeout, cancel_event, output_callback)
+    result = CommandResult(list(args), returncode, stdout, stderr, time.monotonic() - start)
+    history.append(result)
+    if output_callback:
+        output_callback(f"[{args[0]}] exited with {returncode} after {result.duration:.2f} s")
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, args, stdout, stderr)
+    return result
+
+def start_command(args, output_callback=None):
+    """Start a long-running program (such as an RDP client) without waiting for it.
+
+    Its output is streamed to output_callback from a background thread.
+    Returns the process handle; raises FileNotFoundError if the program is missing.
+    """
+    return _backend.spawn(list(args), output_callback)
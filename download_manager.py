@@ -0,0 +1,372 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from urllib3.exceptions import HTTPError as TransferError
+
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30 # Seconds without data before a connection is given up and resumed
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+CHUNK_TARGET = 0.25 # Seconds one read should take; the chunk size doubles or halves to stay near it
+MAX_RETRIES = 5 # Consecutive attempts without progress before a download fails
+RETRY_DELAY = 1.0 # Doubles with every attempt
+MIN_SEGMENT = 4 * 1024 * 1024 # Parallel segments are never smaller than this
+PROGRESS_INTERVAL = 0.25 # Seconds between progress reports
+META_INTERVAL = 1.0 # Seconds between saves of the resume state
+HASH_BLOCK = 1024 * 1024
+
+class DownloadError(Exception):
+    pass
+
+class ChecksumMismatch(DownloadError):
+    pass
+
+class DownloadCancelled(DownloadError):
+    pass
+
+class _Restart(Exception):
+    """The server ignored a range request or the file changed; the partial download is useless"""
+
+class _Segment:
+    __slots__ = ('start', 'end', 'written')
+
+    def __init__(self, start, end, written=0):
+        self.start = start
+        self.end = end # Exclusive; None while the size is unknown
+        self.written = written
+
+    def done(self):
+        return self.end is not None and self.start + self.written >= self.end
+
+class _Progress:
+    """Collects byte counts from every connection and reports at most once per PROGRESS_INTERVAL.
+
+    Reports are (downloaded, total, bytes per second, seconds left); total
+    is 0 and seconds left None while the size is unknown.
+    """
+
+    def __init__(self, callback, total, done):
+        self.callback = callback
+        self.total = total or 0
+        self.done = done
+        self.rate = 0.0
+        self.lock = threading.Lock()
+        self.last_time = time.monotonic()
+        self.last_done = done
+
+    def add(self, count):
+        with self.lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self.last_time >= PROGRESS_INTERVAL:
+                self._report(now)
+
+    def finish(self):
+        with self.lock:
+            self._report(time.monotonic())
+
+    def _report(self, now):
+        elapsed = now - self.last_time
+        if elapsed > 0:
+            rate = (self.done - self.last_done) / elapsed
+            self.rate = rate if not self.rate else 0.7 * self.rate + 0.3 * rate # Smooth out bursty reads
+        self.last_time, self.last_done = now, self.done
+        eta = (self.total - self.done) / self.rate if self.total and self.rate else None
+        if self.callback:
+            self.callback((self.done, self.total, self.rate, eta))
+
+class _Download:
+    """Shared state of one download: its segments, resume file and the hashing reader"""
+
+    def __init__(self, url, part_path, segments, validator):
+        self.url = url
+        self.part_path = part_path
+        self.meta_path = part_path + '.json'
+        self.segments = segments
+        self.validator = validator
+        self.condition = threading.Condition()
+        self.save_lock = threading.Lock()
+        self.failed = False
+        self.finished = False
+        self.saved_at = 0.0
+
+    def total(self):
+        end = self.segments[-1].end
+        return end if end is not None else 0
+
+    def downloaded(self):
+        return sum(segment.written for segment in self.segments)
+
+    def save(self, force=False):
+        with self.save_lock:
+            now = time.monotonic()
+            if not force and now - self.saved_at < META_INTERVAL:
+                return
+            self.saved_at = now
+            meta = {'url': self.url, 'validator': self.validator,
+                    'segments': [[s.start, s.end, s.written] for s in self.segments]}
+            temp_path = self.meta_path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(meta, f)
+            os.replace(temp_path, self.meta_path)
+
+    def wrote(self, segment, count):
+        with self.condition:
+            segment.written += count
+            self.condition.notify_all()
+        self.save()
+
+    def contiguous_end(self, position):
+        """End of the data written so far in the segment that holds `position`"""
+        for segment in self.segments:
+            if segment.start <= position and (segment.end is None or position < segment.end):
+                return segment.start + segment.written
+        return position
+
+    def stop(self, failed=False):
+        with self.condition:
+            self.failed = self.failed or failed
+            self.finished = True
+            self.condition.notify_all()
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _load(url, part_path):
+    """The saved state of an earlier attempt at this download, or None"""
+    try:
+        with open(part_path + '.json', 'r') as f:
+            meta = json.load(f)
+        if meta['url'] != url or not os.path.exists(part_path):
+            return None
+        segments = [_Segment(*values) for values in meta['segments']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return _Download(url, part_path, segments, meta.get('validator'))
+
+def _validator(headers):
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'): # Weak ETags are not allowed in If-Range
+        return etag
+    return headers.get('Last-Modified')
+
+def _probe(session, url):
+    """(size or None, ranges supported, validator) from a HEAD request; signed redirect targets may refuse it"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+    except requests.RequestException:
+        return None, False, None
+    size = response.headers.get('Content-Length')
+    return (int(size) if size and size.isdigit() else None,
+            response.headers.get('Accept-Ranges') == 'bytes', _validator(response.headers))
+
+def _start(session, url, part_path, segments):
+    size, ranges, validator = _probe(session, url)
+    if size and ranges and segments > 1 and size >= 2 * MIN_SEGMENT:
+        count = min(segments, size // MIN_SEGMENT)
+        bounds = [size * i // count for i in range(count + 1)]
+        parts = [_Segment(bounds[i], bounds[i + 1]) for i in range(count)]
+    else:
+        parts = [_Segment(0, size)]
+    with open(part_path, 'wb') as f:
+        if size:
+            f.truncate(size) # Segments write into their own region of the file
+    download = _Download(url, part_path, parts, validator)
+    download.save(force=True)
+    return download
+
+def _total_from(response, segment):
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    return segment.start + segment.written + int(length) if length and length.isdigit() else None
+
+def _fetch(session, download, segment, progress, cancel_event):
+    """Download one segment, resuming it after dropped connections"""
+    attempts = 0
+    while not segment.done():
+        position = segment.start + segment.written
+        headers = {'Accept-Encoding': 'identity'} # Byte offsets must match the file, not a compressed stream
+        if position or len(download.segments) > 1:
+            end = '' if segment.end is None else segment.end - 1
+            headers['Range'] = f"bytes={position}-{end}"
+            if download.validator:
+                headers['If-Range'] = download.validator
+        try:
+            with session.get(download.url, headers=headers, stream=True,
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                if response.status_code == 416:
+                    raise _Restart()
+                response.raise_for_status()
+                if 'Range' in headers and response.status_code != 206:
+                    raise _Restart()
+                if download.validator is None:
+                    download.validator = _validator(response.headers)
+                if segment.end is None:
+                    segment.end = _total_from(response, segment)
+                    progress.total = download.total()
+                chunk = MIN_CHUNK
+                with open(download.part_path, 'r+b', buffering=0) as f:
+                    f.seek(position)
+                    while True:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise DownloadCancelled("Download cancelled.")
+                        if download.failed:
+                            return
+                        started = time.monotonic()
+                        data = response.raw.read(chunk)
+                        if not data:
+                            break
+                        if segment.end is not None:
+                            data = data[:segment.end - segment.start - segment.written]
+                        f.write(data)
+                        download.wrote(segment, len(data))
+                        progress.add(len(data))
+                        attempts = 0
+                        elapsed = time.monotonic() - started
+                        if elapsed < CHUNK_TARGET / 2:
+                            chunk = min(chunk * 2, MAX_CHUNK)
+                        elif elapsed > CHUNK_TARGET * 2:
+                            chunk = max(chunk // 2, MIN_CHUNK)
+                        if segment.done():
+                            break
+            if segment.end is None: # The server never said how long the file is; end of stream is the end
+                segment.end = segment.start + segment.written
+                progress.total = download.total()
+            if not segment.done():
+                raise DownloadError("connection closed early")
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code < 500:
+                raise DownloadError(f"Server refused the download: {e}") from None
+            error = e
+        except (requests.RequestException, TransferError, OSError) as e:
+            error = e
+        except DownloadError as e:
+            if isinstance(e, DownloadCancelled):
+                raise
+            error = e
+        else:
+            continue
+        attempts += 1
+        if attempts > MAX_RETRIES:
+            raise DownloadError(f"Download failed after {MAX_RETRIES} retries: {error}")
+        delay = RETRY_DELAY * 2 ** (attempts - 1)
+        if cancel_event is not None and cancel_event.wait(delay):
+            raise DownloadCancelled("Download cancelled.")
+        elif cancel_event is None:
+            time.sleep(delay)
+
+def _hash(download, result):
+    """Hash the file in order as the segments fill it in, overlapping hashing with the download"""
+    sha256 = hashlib.sha256()
+    position = 0
+    with open(download.part_path, 'rb', buffering=0) as f:
+        while True:
+            with download.condition:
+                while True:
+                    available = download.contiguous_end(position)
+                    if available > position or download.finished:
+                        break
+                    download.condition.wait()
+                if download.failed:
+                    return
+                if available <= position:
+                    break
+            f.seek(position)
+            while position < available:
+                data = f.read(min(HASH_BLOCK, available - position))
+                sha256.update(data)
+                position += len(data)
+    result.append(sha256.hexdigest())
+
+def _run(session, download, progress, cancel_event):
+    digest = []
+    hasher = threading.Thread(target=_hash, args=(download, digest), daemon=True)
+    hasher.start()
+    pending = [segment for segment in download.segments if not segment.done()]
+    try:
+        if len(pending) == 1:
+            _fetch(session, download, pending[0], progress, cancel_event)
+        elif pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = [executor.submit(_fetch, session, download, segment, progress, cancel_event)
+                           for segment in pending]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    download.stop(failed=True) # The other segments return at their next read
+                    raise
+    except BaseException:
+        download.stop(failed=True)
+        hasher.join()
+        raise
+    finally:
+        download.save(force=True)
+    download.stop()
+    hasher.join()
+    return digest[0]
+
+def download(url, path, expected_sha256=None, progress_callback=None, cancel_event=None, segments=1, session=None):
+    """Download url to path and return its SHA-256 hex digest.
+
+    Data goes to path + '.part' with its resume state next to it, so a
+    download interrupted by a dropped connection, a cancel or a crash picks
+    up where it stopped (If-Range makes sure the file has not changed since).
+    With segments > 1, servers that support ranges get several connections
+    to separate parts of the file. The file is hashed while it downloads;
+    if expected_sha256 is given and does not match, the partial file is
+    discarded and ChecksumMismatch is raised. progress_callback receives
+    (downloaded, total, bytes per second, seconds left). Raises DownloadError
+    (or DownloadCancelled once cancel_event is set).
+    """
+    own_session = session is None
+    session = session or requests.Session()
+    part_path = path + '.part'
+    try:
+        for _ in range(MAX_RETRIES): # Start over if the partial download turns out to be stale or unresumable
+            state = _load(url, part_path)
+            if state is None:
+                _remove(part_path, part_path + '.json')
+                state = _start(session, url, part_path, segments)
+            progress = _Progress(progress_callback, state.total(), state.downloaded())
+            try:
+                digest = _run(session, state, progress, cancel_event)
+                break
+            except _Restart:
+                _remove(part_path, part_path + '.json')
+        else:
+            raise DownloadError("The server does not support resuming this download.")
+        progress.finish()
+        if expected_sha256 and digest != expected_sha256.lower():
+            _remove(part_path, part_path + '.json')
+            raise ChecksumMismatch(f"Checksum mismatch: expected {expected_sha256.lower()}, got {digest}")
+        os.replace(part_path, path)
+        _remove(part_path + '.json')
+        return digest
+    except OSError as e:
+        raise DownloadError(f"Could not write {part_path}: {e}") from None
+    finally:
+        if own_session:
+            session.close()
+
+def format_progress(downloaded, total, rate, eta):
+    text = f"{downloaded / 1e6:.1f}"
+    text += f" of {total / 1e6:.1f} MB" if total else " MB"
+    if rate:
+        text += f", {rate / 1e6:.1f} MB/s"
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        text += f", {minutes}:{seconds:02d} left"
+    return text
@@ -0,0 +1,171 @@
+import asyncio
+import socket
+import subprocess
+import time
+
+import command_runner as cr
+import vpn_manager as vm
+import wireguard_config as wgc
+
+PROBE_TIMEOUT = 0.8
+FIRST_HANDSHAKE_TIMEOUT = 15 # Seconds a new endpoint gets to complete its first handshake before failing over
+
+active_endpoints = {} # Tunnel name -> (endpoint, latency_ms or None) chosen at the last connect or failover
+
+class _UnreachableProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.refused = asyncio.get_running_loop().create_future()
+
+    def error_received(self, exc):
+        if not self.refused.done():
+            self.refused.set_result(isinstance(exc, ConnectionRefusedError))
+
+async def _udp_refused(family, address, timeout):
+    """True if the endpoint answers a datagram with ICMP port unreachable.
+
+    WireGuard silently drops packets it cannot authenticate, so silence is
+    the healthy answer; only an explicit refusal marks the endpoint dead.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        transport, protocol = await loop.create_datagram_endpoint(_UnreachableProtocol, family=family,
+                                                                  remote_addr=address[:2])
+    except OSError: # No route to the endpoint at all
+        return True
+    try:
+        transport.sendto(b'\0' * 32)
+        return await asyncio.wait_for(protocol.refused, timeout)
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        transport.close()
+
+async def _tcp_rtt(address, timeout):
+    """Milliseconds until the endpoint host's TCP stack answers on the same port (accept or reset), or None"""
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address[0], address[1]), timeout)
+    except ConnectionRefusedError:
+        return (time.perf_counter() - start) * 1000
+    except (asyncio.TimeoutError, OSError):
+        return None
+    latency = (time.perf_counter() - start) * 1000
+    writer.close()
+    return latency
+
+async def _probe(endpoint, timeout):
+    try:
+        host, port = wgc.parse_endpoint(endpoint)
+    except ValueError as e:
+        return endpoint, False, None, str(e)
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(loop.getaddrinfo(host, port, type=socket.SOCK_DGRAM), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return endpoint, False, None, f"cannot resolve {host}"
+    family, _, _, _, address = infos[0]
+    refused, latency = await asyncio.gather(_udp_refused(family, address, timeout), _tcp_rtt(address, timeout))
+    if refused:
+        return endpoint, False, None, "port unreachable"
+    return endpoint, True, latency, None
+
+def rank_endpoints(endpoints, timeout=PROBE_TIMEOUT):
+    """Probe endpoints concurrently; returns [(endpoint, healthy, latency_ms, error)], best first.
+
+    Healthy endpoints come first, ordered by measured latency; endpoints
+    whose host never answered TCP keep their configured order after those.
+    """
+    async def probe_all():
+        return await asyncio.gather(*(_probe(endpoint, timeout) for endpoint in endpoints))
+
+    results = asyncio.run(probe_all()) if endpoints else []
+    order = {endpoint: i for i, endpoint in enumerate(endpoints)}
+    return sorted(results, key=lambda r: (not r[1], r[2] is None, r[2] or 0, order[r[0]]))
+
+def get_candidates(config_path, alternatives):
+    """The config's own endpoint followed by the configured alternatives, without duplicates"""
+    candidates = []
+    try:
+        candidates.extend(wgc.load_config(config_path).endpoints()[:1])
+    except (OSError, wgc.WireGuardConfigError):
+        pass
+    candidates.extend(alternatives or [])
+    return list(dict.fromkeys(candidates))
+
+def _first_peer(config):
+    """The first peer with an Endpoint, whose endpoint get_candidates offers first; or None"""
+    return next((peer for peer in config.peers if 'endpoint' in peer), None)
+
+def _set_endpoint(name, public_key, endpoint, output_callback=None):
+    """Point a running tunnel's peer at endpoint; returns (success, error message or None)"""
+    try:
+        cr.run_command([vm.get_wg_command(), "set", name, "peer", public_key, "endpoint", endpoint],
+                       timeout=vm.QUERY_TIMEOUT, output_callback=output_callback, check=True)
+    except FileNotFoundError:
+        return False, "wg command not found"
+    except subprocess.CalledProcessError as e:
+        return False, (e.stderr or '').strip() or f"wg exited with {e.returncode}"
+    except subprocess.TimeoutExpired:
+        return False, "wg timed out"
+    return True, None
+
+def connect_with_failover(config_path, alternatives, output_callback=None, cancel_event=None):
+    """Connect a tunnel through the fastest healthy endpoint among its config's and the alternatives.
+
+    The tunnel always comes up from the user's own config, so the Windows
+    tunnel service keeps a file that exists; a different winner is then
+    set on the running peer with `wg set`, as fail_over does. Without
+    alternatives this is plain vpn_manager.connect_vpn.
+    """
+    name = vm.get_tunnel_name(config_path)
+    candidates = get_candidates(config_path, alternatives)
+    if len(candidates) < 2:
+        active_endpoints.pop(name, None)
+        return vm.connect_vpn(config_path, output_callback, cancel_event)
+    ranked = rank_endpoints(candidates)
+    for endpoint, healthy, latency, error in ranked:
+        if output_callback:
+            state = f"{latency:.0f} ms" if latency is not None else "no TCP answer" if healthy else error
+            output_callback(f"[endpoint] {name}: {endpoint} {state}")
+    endpoint, healthy, latency, _ = ranked[0]
+    if not healthy:
+        return False, f"No endpoint of tunnel {name} is reachable: " + ", ".join(f"{r[0]} ({r[3]})" for r in ranked)
+    success, message = vm.connect_vpn(config_path, output_callback, cancel_event)
+    if not success:
+        return success, message
+    try:
+        peer = _first_peer(wgc.load_config(config_path))
+    except (OSError, wgc.WireGuardConfigError):
+        peer = None
+    if endpoint != candidates[0] and peer is not None:
+        switched, error = _set_endpoint(name, peer['publickey'], endpoint, output_callback)
+        if not switched:
+            endpoint, latency = candidates[0], None
+            message = f"{message}; could not switch to the faster endpoint ({error})"
+    active_endpoints[name] = (endpoint, latency)
+    return True, f"{message} via {endpoint}"
+
+def fail_over(config_path, alternatives, output_callback=None):
+    """Switch a running tunnel's peer to the best endpoint other than the current one, without a reconnect.
+
+    Returns (success, message); fails if the config cannot be read or no
+    other endpoint is healthy.
+    """
+    name = vm.get_tunnel_name(config_path)
+    try:
+        peer = _first_peer(wgc.load_config(config_path))
+    except (OSError, wgc.WireGuardConfigError) as e:
+        return False, f"Cannot fail over tunnel {name}: {e}"
+    if peer is None:
+        return False, f"Tunnel {name} has no endpoint to fail over."
+    current = active_endpoints.get(name, (peer['endpoint'], None))[0]
+    candidates = [endpoint for endpoint in get_candidates(config_path, alternatives) if endpoint != current]
+    ranked = [r for r in rank_endpoints(candidates) if r[1]]
+    if not ranked:
+        return False, f"No other endpoint of tunnel {name} is reachable."
+    endpoint, _, latency, _ = ranked[0]
+    switched, error = _set_endpoint(name, peer['publickey'], endpoint, output_callback)
+    if not switched:
+        return False, f"Could not switch tunnel {name} to {endpoint}: {error}"
+    active_endpoints[name] = (endpoint, latency)
+    return True, f"Tunnel {name} switched from {current} to {endpoint}."
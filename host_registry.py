@@ -0,0 +1,351 @@
+CORE_FIELDS = ('name', 'ip_address', 'mac_address', 'rdp_user')
+INDEXED_FIELDS = ('name', 'ip_address', 'mac_address')
+
+_MAC_SEPARATORS = str.maketrans('', '', ':-. ')
+
+def normalize_mac(mac_address):
+    return mac_address.lower().translate(_MAC_SEPARATORS)
+
+def _index_keys(name, ip_address, mac_address):
+    return (name or None, ip_address.strip() if ip_address else None,
+            normalize_mac(mac_address) if mac_address else None)
+
+class HostRecord:
+    """Compact host entry that still reads like the old host dicts (host['name'], host.get(...))"""
+    __slots__ = ('name', 'ip_address', 'mac_address', 'rdp_user', 'extra', '_registry')
+
+    def __init__(self, name, ip_address='', mac_address='', rdp_user='', extra=None):
+        self.name = name
+        self.ip_address = ip_address
+        self.mac_address = mac_address
+        self.rdp_user = rdp_user
+        self.extra = extra # Optional keys (rdp_port, subnet_mask, ...); None when there are none
+        self._registry = None
+
+    @classmethod
+    def from_dict(cls, host):
+        extra = {k: v for k, v in host.items() if k not in CORE_FIELDS} or None
+        return cls(host.get('name', ''), host.get('ip_address', ''), host.get('mac_address', ''),
+                   host.get('rdp_user', ''), extra)
+
+    def to_dict(self):
+        host = {'name': self.name, 'ip_address': self.ip_address,
+                'mac_address': self.mac_address, 'rdp_user': self.rdp_user}
+        if self.extra:
+            host.update(self.extra)
+        return host
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __contains__(self, key):
+        return key in CORE_FIELDS or bool(self.extra and key in self.extra)
+
+    def __getitem__(self, key):
+        if key in CORE_FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if self._registry is not None:
+            self._registry.update(self.name, {key: value})
+        elif key in CORE_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __repr__(self):
+        return f"HostRecord({self.to_dict()!r})"
+
+class HostRegistry:
+    """Ordered host collection with O(1) lookups by name, IP and MAC.
+
+    Names, IP addresses and MAC addresses must be unique; add() and update()
+    raise ValueError on conflicts, update_many() skips and reports them. Hosts that conflicted while loading are
+    kept aside in `rejected` so saving never drops them.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._rows = {} # name -> row, valid below self._rows_valid_to
+        self._rows_valid_to = 0
+        self._listeners = []
+        self.rejected = []
+
+    @classmethod
+    def from_dicts(cls, hosts):
+        registry = cls()
+        for host in hosts:
+            try:
+                registry.add(host)
+            except ValueError as e:
+                print(f"Skipping host {host.get('name', '')!r}: {e}")
+                registry.rejected.append(host.to_dict() if isinstance(host, HostRecord) else host)
+        return registry
+
+    def subscribe(self, listener):
+        """Call listener(action, record) after every 'add', 'update' and 'remove'"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, action, record):
+        for listener in self._listeners:
+            listener(action, record)
+
+    def to_dicts(self):
+        return [record.to_dict() for record in self._records] + list(self.rejected)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __getitem__(self, row):
+        return self._records[row]
+
+    def __contains__(self, name):
+        return name in self._indexes['name']
+
+    def get(self, name):
+        return self._indexes['name'].get(name)
+
+    def by_ip(self, ip_address):
+        return self._indexes['ip_address'].get(ip_address.strip())
+
+    def by_mac(self, mac_address):
+        return self._indexes['mac_address'].get(normalize_mac(mac_address))
+
+    def row_of(self, name):
+        if name not in self._indexes['name']:
+            return None
+        row = self._rows.get(name)
+        if row is None or row >= self._rows_valid_to:
+            # Rows shift after a removal; renumber the tail once, on demand
+            for row in range(self._rows_valid_to, len(self._records)):
+                self._rows[self._records[row].name] = row
+            self._rows_valid_to = len(self._records)
+            row = self._rows[name]
+        return row
+
+    def validate(self, host, name=None):
+        """Raise ValueError if adding `host` (or applying it to the host called `name`) would clash"""
+        record = self._indexes['name'].get(name) if name is not None else None
+        current = record.to_dict() if record is not None else {}
+        current.update(host)
+        self._check_unique(_index_keys(*(current.get(field, '') for field in INDEXED_FIELDS)), ignore=record)
+
+    def _check_unique(self, keys, ignore=None):
+        if keys[0] is None:
+            raise ValueError("Host name is required")
+        for field, key in zip(INDEXED_FIELDS, keys):
+            existing = self._indexes[field].get(key) if key is not None else None
+            if existing is not None and existing is not ignore:
+                raise ValueError(f"{field.replace('_', ' ')} {key!r} is already used by {existing.name!r}")
+
+    def addable(self, records):
+        """The records add() would accept one after another, in order; those that clash are left out"""
+        taken = {field: set() for field in INDEXED_FIELDS}
+        accepted = []
+        for record in records:
+            keys = _index_keys(record.name, record.ip_address, record.mac_address)
+            try:
+                self._check_unique(keys)
+            except ValueError:
+                continue
+            if any(key is not None and key in taken[field] for field, key in zip(INDEXED_FIELDS, keys)):
+                continue
+            for field, key in zip(INDEXED_FIELDS, keys):
+                if key is not None:
+                    taken[field].add(key)
+            accepted.append(record)
+        return accepted
+
+    def _index(self, record, keys):
+        for field, key in zip(INDEXED_FIELDS, keys):
+            if key is not None:
+                self._indexes[field][key] = record
+
+    def _unindex(self, record):
+        for field, key in zip(INDEXED_FIELDS, _index_keys(record.name, record.ip_address, record.mac_address)):
+            if key is not None:
+                self._indexes[field].pop(key, None)
+
+    def add(self, host):
+        record = host if isinstance(host, HostRecord) else HostRecord.from_dict(host)
+        keys = _index_keys(record.name, record.ip_address, record.mac_address)
+        self._check_unique(keys)
+        record._registry = self
+        self._index(record, keys)
+        if self._rows_valid_to == len(self._records):
+            self._rows[record.name] = len(self._records)
+            self._rows_valid_to += 1
+        self._records.append(record)
+        self._notify('add', record)
+        return record
+
+    def update(self, name, values):
+        """Change fields of the host called `name`; returns the record.
+
+        An optional key (anything but the core fields) set to None is removed.
+        """
+        record = self._indexes['name'].get(name)
+        if record is None:
+            raise KeyError(name)
+        keys = _index_keys(*(values.get(field, getattr(record, field)) for field in INDEXED_FIELDS))
+        self._check_unique(keys, ignore=record)
+        row = self.row_of(name)
+        self._unindex(record)
+        self._set_values(record, values)
+        self._index(record, keys)
+        if record.name != name:
+            del self._rows[name]
+            self._rows[record.name] = row
+        self._notify('update', record)
+        return record
+
+    def update_many(self, updates):
+        """Apply {name: values} to several hosts as one change; returns ({name: record}, {name: error}).
+
+        Uniqueness is checked against the state after all of the updates, so
+        hosts may swap names, IPs or MACs. An update that would still clash is
+        skipped and reported, and that host keeps its current values.
+        """
+        pending = {}
+        for name, values in updates.items():
+            record = self._indexes['name'].get(name)
+            if record is None:
+                raise KeyError(name)
+            keys = _index_keys(*(values.get(field, getattr(record, field)) for field in INDEXED_FIELDS))
+            pending[name] = (record, values, keys)
+        errors = {}
+        while True:
+            clash = self._first_clash(pending)
+            if clash is None:
+                break
+            name, errors[name] = clash
+            del pending[name]
+        rows = {name: self.row_of(name) for name in pending}
+        for record, _, _ in pending.values():
+            self._unindex(record)
+        for record, values, keys in pending.values():
+            self._set_values(record, values)
+            self._index(record, keys)
+        # Drop every old name before adding new ones, so swapped names keep their own rows
+        for name in pending:
+            del self._rows[name]
+        for name, (record, _, _) in pending.items():
+            self._rows[record.name] = rows[name]
+        for record, _, _ in pending.values():
+            self._notify('update', record)
+        return {name: record for name, (record, _, _) in pending.items()}, errors
+
+    def _first_clash(self, pending):
+        """(name, error) for the first pending update that clashes with the state after all of them, or None"""
+        moving = set(pending)
+        holders = {field: {} for field in INDEXED_FIELDS} # key -> name of the pending host that ends up with it
+        for name, (record, _, keys) in pending.items():
+            if keys[0] is None:
+                return name, "Host name is required"
+            for field, key in zip(INDEXED_FIELDS, keys):
+                if key is None:
+                    continue
+                label = field.replace('_', ' ')
+                existing = self._indexes[field].get(key)
+                if existing is not None and existing.name not in moving:
+                    return name, f"{label} {key!r} is already used by {existing.name!r}"
+                holder = holders[field].get(key)
+                if holder is not None:
+                    # Two updates want the same value; the host that already has it keeps it
+                    if existing is record:
+                        return holder, f"{label} {key!r} is already used by {name!r}"
+                    return name, f"{label} {key!r} is already used by {holder!r}"
+                holders[field][key] = name
+        return None
+
+    @staticmethod
+    def _set_values(record, values):
+        for key, value in values.items():
+            if key in CORE_FIELDS:
+                setattr(record, key, value)
+            elif value is None:
+                if record.extra:
+                    record.extra.pop(key, None)
+                    record.extra = record.extra or None
+            else:
+                if record.extra is None:
+                    record.extra = {}
+                record.extra[key] = value
+
+    def remove(self, name):
+        """Remove the host called `name`; returns the row it occupied"""
+        row = self.row_of(name)
+        if row is None:
+            raise KeyError(name)
+        record = self._records.pop(row)
+        self._unindex(record)
+        del self._rows[name]
+        record._registry = None
+        self._rows_valid_to = min(self._rows_valid_to, row)
+        self._notify('remove', record)
+        return row
+
+if __name__ == "__main__":
+    # Memory and lookup benchmark at 100k hosts: python host_registry.py
+    import time
+    import tracemalloc
+
+    count = 100_000
+    hosts = [{'name': f"host-{i:06d}", 'ip_address': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+              'mac_address': f"00:16:3e:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+              'rdp_user': 'admin'} for i in range(count)]
+    names = [h['name'] for h in hosts[::97]]
+
+    tracemalloc.start()
+    dicts = [dict(h) for h in hosts]
+    dict_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    HostRegistry.from_dicts(hosts)
+    build_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    records = [HostRecord.from_dict(h) for h in hosts]
+    record_memory = tracemalloc.get_traced_memory()[0]
+    registry = HostRegistry.from_dicts(records)
+    registry_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for name in names:
+        next(h for h in dicts if h['name'] == name)
+    scan_time = (time.perf_counter() - start) / len(names)
+
+    start = time.perf_counter()
+    for name in names:
+        registry.get(name)
+    lookup_time = (time.perf_counter() - start) / len(names)
+
+    print(f"{count} hosts")
+    print(f"  memory: dicts {dict_memory / 1e6:.1f} MB, records {record_memory / 1e6:.1f} MB, "
+          f"records + indexes {registry_memory / 1e6:.1f} MB")
+    print(f"  build: {build_time * 1000:.0f} ms")
+    print(f"  lookup by name: linear scan {scan_time * 1e6:.1f} us, registry {lookup_time * 1e6:.3f} us")
@@ -0,0 +1,352 @@
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+
+from host_registry import normalize_mac
+
+FUZZY_MIN_SHARED = 0.6 # Fraction of a term's trigrams a fuzzy match must share
+MAC_FRAGMENT = re.compile(r'^[0-9a-f]{1,2}([:-][0-9a-f]{0,2})+$')
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _field_trigrams(fields):
+    return {value[i:i + 3] for value in fields for i in range(len(value) - 2)}
+
+def _search_fields(record):
+    return (record.name.lower(), record.ip_address.lower(),
+            normalize_mac(record.mac_address), (record.rdp_user or '').lower())
+
+def _others_text(fields):
+    return "\t" + "\t".join(fields[1:])
+
+class _SortedField:
+    """One field's values kept sorted, so a prefix query is a bisect plus a walk"""
+
+    def __init__(self):
+        self.keys = []
+        self.records = []
+
+    def build(self, pairs):
+        pairs.sort(key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.records = [record for _, record in pairs]
+
+    def insert(self, key, record):
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.records.insert(i, record)
+
+    def remove(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.records[i]
+
+    def with_prefix(self, prefix):
+        i = bisect_left(self.keys, prefix)
+        keys = self.keys
+        while i < len(keys) and keys[i].startswith(prefix):
+            yield self.records[i]
+            i += 1
+
+class _FieldText:
+    """Values joined into one string in name order, so terms too short for trigrams are found by str.find"""
+
+    def __init__(self, records, values):
+        self.records = records
+        self.starts = []
+        position = 0
+        for value in values:
+            self.starts.append(position)
+            position += len(value) + 1
+        self.text = '\n'.join(values)
+
+    def count(self, term):
+        return self.text.count(term)
+
+    def rows_containing(self, term):
+        """Rows (positions in name order) whose value contains term, ascending"""
+        text, starts = self.text, self.starts
+        i = text.find(term)
+        while i != -1:
+            row = bisect_right(starts, i) - 1
+            yield row
+            if row + 1 == len(starts):
+                return
+            i = text.find(term, starts[row + 1])
+
+    def containing(self, term):
+        records = self.records
+        return (records[row] for row in self.rows_containing(term))
+
+class HostSearchIndex:
+    """Incrementally maintained search index over a HostRegistry.
+
+    Every searchable field (name, IP, MAC, RDP user) is kept in a sorted list
+    for prefix matches and in a shared trigram index for substring and fuzzy
+    matches. Terms of one or two characters are looked up in the fields
+    joined into two strings (names, everything else) in name order instead.
+    The index subscribes to the registry, so adds, edits and removals never
+    trigger a rebuild; pass attach=False to build it off the GUI thread and
+    call attach() back on it.
+
+    Results are ranked: exact name, name prefix, prefix of another field,
+    substring of the name, substring of another field, then fuzzy matches.
+    """
+
+    def __init__(self, registry, attach=True):
+        self.registry = registry
+        self._fields = {} # record -> (lowered values it is filed under, name, "\tip\tmac\tuser" for _score)
+        self._sorted = [_SortedField() for _ in range(4)]
+        # Bulk build: collect postings as lists first, which is much cheaper than growing sets
+        postings = defaultdict(list)
+        pairs = [[] for _ in range(4)]
+        for record in list(registry):
+            fields = _search_fields(record)
+            self._fields[record] = (fields, record.name, _others_text(fields))
+            for gram in _field_trigrams(fields):
+                postings[gram].append(record)
+            for column, value in enumerate(fields):
+                pairs[column].append((self._sort_key(value, record), record))
+        self._trigram_postings = {gram: set(records) for gram, records in postings.items()}
+        for column, sorted_field in enumerate(self._sorted):
+            sorted_field.build(pairs[column])
+        self._texts = None
+        self._build_texts()
+        if attach:
+            self.attach()
+
+    def attach(self, changes=()):
+        """Apply (action, record) changes made since the index was built, then follow the registry"""
+        for action, record in changes:
+            self._on_registry_change(action, record)
+        self.registry.subscribe(self._on_registry_change)
+
+    def detach(self):
+        self.registry.unsubscribe(self._on_registry_change)
+
+    def _build_texts(self):
+        # Rebuilt on the first short search after an edit; a join over all hosts, not a Python scan per search
+        if self._texts is None:
+            records = self._sorted[0].records[:]
+            fields = [self._fields[record][0] for record in records]
+            self._texts = (_FieldText(records, [values[0] for values in fields]),
+                           _FieldText(records, [self._fields[record][2] for record in records]))
+            self._short_counts = {} # Term -> occurrences; typing repeats the same terms keystroke after keystroke
+        return self._texts
+
+    @staticmethod
+    def _sort_key(value, record):
+        # Names are unique, so appending one keeps every key unique
+        return f"{value}\x00{record.name}"
+
+    def _on_registry_change(self, action, record):
+        if action in ('update', 'remove'):
+            self.remove(record)
+        if action in ('add', 'update'):
+            self.add(record)
+
+    def add(self, record):
+        self._texts = None
+        fields = _search_fields(record)
+        self._fields[record] = (fields, record.name, _others_text(fields))
+        for gram in _field_trigrams(fields):
+            self._trigram_postings.setdefault(gram, set()).add(record)
+        for column, value in enumerate(fields):
+            self._sorted[column].insert(self._sort_key(value, record), record)
+
+    def remove(self, record):
+        entry = self._fields.pop(record, None)
+        if entry is None:
+            return
+        self._texts = None
+        fields, name, _ = entry
+        for column, value in enumerate(fields):
+            self._sorted[column].remove(f"{value}\x00{name}")
+        for gram in _field_trigrams(fields):
+            bucket = self._trigram_postings.get(gram)
+            if bucket is not None:
+                bucket.discard(record)
+                if not bucket:
+                    del self._trigram_postings[gram]
+
+    def _estimate(self, term):
+        """Rough number of records containing term; cheap enough to order terms by selectivity"""
+        if len(term) < 3:
+            texts = self._build_texts()
+            count = self._short_counts.get(term)
+            if count is None:
+                count = self._short_counts[term] = sum(text.count(term) for text in texts)
+            return count
+        return min(len(self._trigram_postings.get(gram, ())) for gram in _trigrams(term))
+
+    def _substring_candidates(self, term):
+        if len(term) < 3:
+            names, others = self._build_texts()
+            return set(names.containing(term)).union(others.containing(term))
+        buckets = [self._trigram_postings.get(gram) for gram in _trigrams(term)]
+        if not all(buckets):
+            return set()
+        buckets.sort(key=len)
+        candidates = set(buckets[0])
+        for bucket in buckets[1:]:
+            candidates &= bucket
+            if not candidates:
+                break
+        return candidates
+
+    def _fuzzy_scores(self, term):
+        grams = _trigrams(term)
+        if not grams:
+            return {}
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_postings.get(gram, ()))
+        needed = max(1, int(len(grams) * FUZZY_MIN_SHARED))
+        return {record: 20 * count / len(grams) for record, count in shared.items() if count >= needed}
+
+    def _score(self, record, term):
+        # Terms never contain whitespace, so a tab-joined string answers "any other field" in one test
+        fields, _, others = self._fields[record]
+        name = fields[0]
+        if name == term:
+            return 100
+        if name.startswith(term):
+            return 80
+        if f"\t{term}" in others:
+            return 60
+        if term in name:
+            return 50
+        if term in others:
+            return 40
+        return 0
+
+    def _term_scores(self, term):
+        scores = {}
+        for record in self._substring_candidates(term):
+            score = self._score(record, term)
+            if score:
+                scores[record] = score
+        return scores or self._fuzzy_scores(term)
+
+    def _ranked(self, scores, limit):
+        return [record for _, _, record in heapq.nsmallest(
+            limit, ((-score, record.name, record) for record, score in scores.items()))]
+
+    def _search_term(self, term, limit):
+        # Prefix tiers come straight out of the sorted fields in order, so a
+        # broad query that fills the page never has to score every match
+        results = []
+        seen = set()
+        for sorted_field in self._sorted:
+            for record in sorted_field.with_prefix(term):
+                if record not in seen:
+                    seen.add(record)
+                    results.append(record)
+                    if len(results) >= limit:
+                        return results
+        if len(term) < 3:
+            return results + self._short_substring_matches(term, limit - len(results), seen)
+        scores = {record: score for record, score in self._term_scores(term).items() if record not in seen}
+        return results + self._ranked(scores, limit - len(results))
+
+    def _short_substring_matches(self, term, limit, seen):
+        # Name matches outrank matches elsewhere and both come in name order, so each walk stops at the page size
+        results = []
+        for text in self._build_texts():
+            for record in text.containing(term):
+                if record not in seen:
+                    seen.add(record)
+                    results.append(record)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def _name_ordered_candidates(self, terms):
+        """Records that may match terms[0] (and every trigram term after it), in name order"""
+        names, others = self._build_texts()
+        if len(terms[0]) < 3:
+            previous = None
+            for row in heapq.merge(names.rows_containing(terms[0]), others.rows_containing(terms[0])):
+                if row != previous:
+                    previous = row
+                    yield names.records[row]
+            return
+        candidates = set(self._substring_candidates(terms[0]))
+        for term in terms[1:]:
+            if len(term) >= 3 and candidates:
+                candidates &= self._substring_candidates(term)
+        if len(candidates) * 8 < len(names.records):
+            yield from sorted(candidates, key=lambda record: self._sort_key(self._fields[record][0][0], record))
+        else:
+            yield from (record for record in names.records if record in candidates)
+
+    def _best_score(self, term):
+        """Highest score any record could get for term, following the tiers in _score"""
+        names, others = self._build_texts()
+        if next(self._sorted[0].with_prefix(f"{term}\x00"), None) is not None:
+            return 100
+        if next(self._sorted[0].with_prefix(term), None) is not None:
+            return 80
+        if any(next(sorted_field.with_prefix(term), None) is not None for sorted_field in self._sorted[1:]):
+            return 60
+        return 50 if term in names.text else 40
+
+    @staticmethod
+    def _normalize_term(term):
+        return normalize_mac(term) if MAC_FRAGMENT.match(term) else term
+
+    def search(self, text, limit=200):
+        """Return up to `limit` records matching every term in `text`, best first"""
+        terms = [self._normalize_term(term) for term in text.lower().split()]
+        if not terms:
+            return self.registry[:limit]
+        if len(terms) == 1:
+            return self._search_term(terms[0], limit)
+        # Several terms must all match: walk the most selective term's matches in name order and
+        # score them against every term. Once `limit` records reach the best score the terms
+        # allow, nothing later can outrank them, so broad queries stop early.
+        terms.sort(key=self._estimate)
+        best = sum(self._best_score(term) for term in terms)
+        by_score = defaultdict(list) # Each list stays in name order
+        for record in self._name_ordered_candidates(terms):
+            total = 0
+            for term in terms:
+                score = self._score(record, term)
+                if not score:
+                    break
+                total += score
+            else:
+                by_score[total].append(record)
+                if total == best and len(by_score[total]) >= limit:
+                    break
+        if by_score:
+            return [record for score in sorted(by_score, reverse=True) for record in by_score[score]][:limit]
+        # Nothing matches every term exactly; allow fuzzy matches per term
+        per_term = sorted((self._term_scores(term) for term in terms), key=len)
+        scores = per_term[0]
+        for term_scores in per_term[1:]:
+            scores = {record: score + term_scores[record] for record, score in scores.items() if record in term_scores}
+            if not scores:
+                return []
+        return self._ranked(scores, limit)
+
+if __name__ == "__main__":
+    # Per-keystroke latency at 50k hosts: python host_search.py
+    import time
+    from host_registry import HostRegistry
+
+    registry = HostRegistry.from_dicts(
+        {'name': f"lab{i // 1000:02d}-pc{i % 1000:03d}", 'ip_address': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+         'mac_address': f"00:16:3e:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+         'rdp_user': f"user{i % 37}"} for i in range(50_000))
+    start = time.perf_counter()
+    index = HostSearchIndex(registry)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms")
+    for query in ('l', 'la', '7', 'e', 'l u', 'pc 7', 'lab', 'lab4', 'lab42', 'lab42-pc1', 'pc123', '10.0.1', '3e:00:af', 'user3', 'lba42', 'lab42 user3'):
+        start = time.perf_counter()
+        results = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query!r:>14}: {elapsed:6.2f} ms, {len(results)} shown, top {results[0].name if results else None}")
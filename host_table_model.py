@@ -0,0 +1,132 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+
+from host_registry import CORE_FIELDS
+
+HOST_COLUMNS = [
+    ("Name", 'name'),
+    ("IP Address", 'ip_address'),
+    ("MAC Address", 'mac_address'),
+    ("RDP User", 'rdp_user'),
+    ("Tunnel", 'tunnel')
+]
+REQUIRED_COLUMNS = ('name', 'ip_address', 'mac_address') # Clearing any other cell removes that value
+
+class HostTableModel(QAbstractTableModel):
+    """Table model over the settings HostRegistry.
+
+    The model works on the registry it is given in place, so the settings
+    dict always reflects what the table shows. Views only ask for visible
+    rows, and every change emits row-level signals instead of a full reset.
+    """
+    host_edited = pyqtSignal(str, object) # (previous name, host) after an in-place edit
+
+    def __init__(self, hosts, parent=None):
+        super().__init__(parent)
+        self.hosts = hosts
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.hosts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HOST_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.hosts[index.row()].get(HOST_COLUMNS[index.column()][1], '')
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return HOST_COLUMNS[section][0]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        value = str(value).strip()
+        key = HOST_COLUMNS[index.column()][1]
+        host = self.hosts[index.row()]
+        if not value:
+            if key in REQUIRED_COLUMNS:
+                return False
+            value = '' if key in CORE_FIELDS else None # None drops an optional key such as the tunnel
+        if value == host.get(key):
+            return False
+        previous_name = host['name']
+        try:
+            self.hosts.update(previous_name, {key: value})
+        except ValueError:
+            return False # Names, IPs and MACs must stay unique
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        self.host_edited.emit(previous_name, host)
+        return True
+
+    def row_for_name(self, name):
+        return self.hosts.row_of(name)
+
+    def host_at(self, row):
+        return self.hosts[row]
+
+    def add_host(self, host):
+        """Append a host; raises ValueError if it clashes with an existing one"""
+        self.hosts.validate(host)
+        row = len(self.hosts)
+        self.beginInsertRows(QModelIndex(), row, row)
+        record = self.hosts.add(host)
+        self.endInsertRows()
+        return record
+
+    def append_hosts(self, records):
+        """Append several hosts in one insertion; returns the ones added, leaving out any that clash"""
+        records = self.hosts.addable(records)
+        if records:
+            row = len(self.hosts)
+            self.beginInsertRows(QModelIndex(), row, row + len(records) - 1)
+            for record in records:
+                self.hosts.add(record)
+            self.endInsertRows()
+        return records
+
+    def update_host(self, name, values):
+        """Apply values to the host called name; raises ValueError on clashes"""
+        record = self.hosts.update(name, values)
+        row = self.hosts.row_of(record.name)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(HOST_COLUMNS) - 1))
+        return record
+
+    def update_hosts(self, updates):
+        """Apply {name: values} as one change, so hosts may swap values; returns ({name: record}, {name: error})"""
+        updated, errors = self.hosts.update_many(updates)
+        for record in updated.values():
+            row = self.hosts.row_of(record.name)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HOST_COLUMNS) - 1))
+        return updated, errors
+
+    def remove_host(self, name):
+        row = self.hosts.row_of(name)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.hosts.remove(name)
+        self.endRemoveRows()
+
+    def set_hosts(self, hosts):
+        self.beginResetModel()
+        self.hosts = hosts
+        self.endResetModel()
+
+class HostFilterProxyModel(QSortFilterProxyModel):
+    """Case-insensitive filter across every host column, with sorting"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setFilterKeyColumn(-1)
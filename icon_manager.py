@@ -1,76 +1,158 @@
 
-from PIL import Image, ImageDraw
-import os
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QGuiApplication, QIcon, QPainter, QPen, QPixmap
 
-ICON_CACHE_DIR = "icon_cache"
-if not os.path.exists(ICON_CACHE_DIR):
-    os.makedirs(ICON_CACHE_DIR)
+# Icons are drawn with QPainter straight into pixmaps at the screen's device pixel ratio, so they stay
+# sharp on HiDPI screens and never touch the disk. Each (name, size, ratio) is rendered once per process.
+_pixmaps = {} # (name, size, device pixel ratio) -> QPixmap
+_icons = {} # (name, size) -> QIcon
 
-def create_icon(name, draw_func, size=(24, 24)):
-    filepath = os.path.join(ICON_CACHE_DIR, f"{name}.png")
-    if os.path.exists(filepath):
-        return filepath
+def _pen(color, width):
+    return QPen(QColor(color), width) if width else Qt.PenStyle.NoPen
 
-    image = Image.new("RGBA", size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(image)
-    draw_func(draw, size)
-    image.save(filepath)
-    return filepath
+def _rectangle(painter, box, outline=None, fill=None, width=1):
+    # Like Pillow's rectangle: box is (x0, y0, x1, y1) and the outline is drawn inside it
+    x0, y0, x1, y1 = box
+    inset = width / 2 if outline else 0
+    painter.setPen(_pen(outline, width if outline else 0))
+    painter.setBrush(QColor(fill) if fill else Qt.BrushStyle.NoBrush)
+    painter.drawRect(QRectF(x0 + inset, y0 + inset, x1 - x0 - 2 * inset, y1 - y0 - 2 * inset))
 
-def draw_connect_icon(draw, size):
+def _ellipse(painter, box, outline=None, fill=None, width=1):
+    x0, y0, x1, y1 = box
+    inset = width / 2 if outline else 0
+    painter.setPen(_pen(outline, width if outline else 0))
+    painter.setBrush(QColor(fill) if fill else Qt.BrushStyle.NoBrush)
+    painter.drawEllipse(QRectF(x0 + inset, y0 + inset, x1 - x0 - 2 * inset, y1 - y0 - 2 * inset))
+
+def _line(painter, points, fill, width=1):
+    x0, y0, x1, y1 = points
+    painter.setPen(_pen(fill, width))
+    painter.drawLine(QPointF(x0, y0), QPointF(x1, y1))
+
+def draw_connect_icon(painter, size):
     # A simple representation of a plug and socket
-    draw.rectangle((2, 8, 10, 16), outline="green", width=2)
-    draw.line((10, 10, 18, 10), fill="green", width=2)
-    draw.line((10, 14, 18, 14), fill="green", width=2)
-    draw.rectangle((18, 8, 22, 16), outline="green", width=2)
+    _rectangle(painter, (2, 8, 10, 16), outline="green", width=2)
+    _line(painter, (10, 10, 18, 10), fill="green", width=2)
+    _line(painter, (10, 14, 18, 14), fill="green", width=2)
+    _rectangle(painter, (18, 8, 22, 16), outline="green", width=2)
 
-def draw_disconnect_icon(draw, size):
+def draw_disconnect_icon(painter, size):
     # A broken plug/socket
-    draw.rectangle((2, 8, 10, 16), outline="red", width=2)
-    draw.line((10, 10, 15, 10), fill="red", width=2)
-    draw.line((10, 14, 15, 14), fill="red", width=2)
-    draw.rectangle((18, 8, 22, 16), outline="red", width=2)
-    draw.line((5, 5, 19, 19), fill="red", width=2) # A cross
+    _rectangle(painter, (2, 8, 10, 16), outline="red", width=2)
+    _line(painter, (10, 10, 15, 10), fill="red", width=2)
+    _line(painter, (10, 14, 15, 14), fill="red", width=2)
+    _rectangle(painter, (18, 8, 22, 16), outline="red", width=2)
+    _line(painter, (5, 5, 19, 19), fill="red", width=2) # A cross
 
-def draw_wake_icon(draw, size):
+def draw_wake_icon(painter, size):
     # A simple sun/power symbol
     center = (size[0] // 2, size[1] // 2)
-    draw.ellipse((center[0]-5, center[1]-5, center[0]+5, center[1]+5), outline="#FFD700", width=2)
-    for i in range(8):
-        angle = i * 45
-        x1 = center[0] + 7
-        y1 = center[1]
-        x2 = center[0] + 10
-        y2 = center[1]
-        # Basic rotation logic needed here, simplified for now
-        draw.line((x1,y1,x2,y2), fill="#FFD700", width=2)
-
-def draw_rdp_icon(draw, size):
+    _ellipse(painter, (center[0]-5, center[1]-5, center[0]+5, center[1]+5), outline="#FFD700", width=2)
+    painter.translate(*center)
+    for _ in range(8):
+        _line(painter, (7, 0, 10, 0), fill="#FFD700", width=2)
+        painter.rotate(45)
+
+def draw_rdp_icon(painter, size):
     # A simple monitor screen
-    draw.rectangle((4, 4, 20, 20), outline="#4682B4", width=2)
-    draw.rectangle((6, 6, 18, 18), fill="#4682B4")
-    draw.line((8, 20, 16, 20), fill="#4682B4", width=2)
-    draw.line((12, 20, 12, 22), fill="#4682B4", width=2)
+    _rectangle(painter, (4, 4, 20, 20), outline="#4682B4", width=2)
+    _rectangle(painter, (6, 6, 18, 18), fill="#4682B4")
+    _line(painter, (8, 20, 16, 20), fill="#4682B4", width=2)
+    _line(painter, (12, 20, 12, 22), fill="#4682B4", width=2)
 
-def draw_pc_icon(draw, size):
+def draw_pc_icon(painter, size):
     # A simple desktop PC tower with a screen
     # PC Tower
-    draw.rectangle((size[0]*0.2, size[1]*0.3, size[0]*0.5, size[1]*0.8), outline="#95a5a6", width=2)
-    draw.rectangle((size[0]*0.25, size[1]*0.35, size[0]*0.45, size[1]*0.45), fill="#95a5a6") # CD-ROM
-    draw.ellipse((size[0]*0.3, size[1]*0.6, size[0]*0.4, size[1]*0.7), fill="#95a5a6") # Power button
+    _rectangle(painter, (size[0]*0.2, size[1]*0.3, size[0]*0.5, size[1]*0.8), outline="#95a5a6", width=2)
+    _rectangle(painter, (size[0]*0.25, size[1]*0.35, size[0]*0.45, size[1]*0.45), fill="#95a5a6") # CD-ROM
+    _ellipse(painter, (size[0]*0.3, size[1]*0.6, size[0]*0.4, size[1]*0.7), fill="#95a5a6") # Power button
 
     # Monitor
-    draw.rectangle((size[0]*0.55, size[1]*0.2, size[0]*0.85, size[1]*0.6), outline="#4682B4", width=2)
-    draw.line((size[0]*0.7, size[1]*0.6, size[0]*0.7, size[1]*0.7), fill="#4682B4", width=2) # Stand
+    _rectangle(painter, (size[0]*0.55, size[1]*0.2, size[0]*0.85, size[1]*0.6), outline="#4682B4", width=2)
+    _line(painter, (size[0]*0.7, size[1]*0.6, size[0]*0.7, size[1]*0.7), fill="#4682B4", width=2) # Stand
 
-def get_all_icons():
+def _draw_status_dot(painter, size, color):
+    _ellipse(painter, (size[0]*0.25, size[1]*0.25, size[0]*0.75, size[1]*0.75), fill=color)
+
+def draw_status_up_icon(painter, size):
+    _draw_status_dot(painter, size, "#2ecc71")
+
+def draw_status_no_rdp_icon(painter, size):
+    _draw_status_dot(painter, size, "#f39c12")
+
+def draw_status_down_icon(painter, size):
+    _draw_status_dot(painter, size, "#e74c3c")
+
+def draw_status_unknown_icon(painter, size):
+    _draw_status_dot(painter, size, "#95a5a6")
+
+# Icon name -> (draw function, size in logical pixels the drawing is laid out for)
+ICONS = {
+    "connect": (draw_connect_icon, 24),
+    "disconnect": (draw_disconnect_icon, 24),
+    "wake": (draw_wake_icon, 24),
+    "rdp": (draw_rdp_icon, 24),
+    "pc": (draw_pc_icon, 24),
+    "app_icon": (draw_rdp_icon, 32),
+    "status_up": (draw_status_up_icon, 12),
+    "status_no_rdp": (draw_status_no_rdp_icon, 12),
+    "status_down": (draw_status_down_icon, 12),
+    "status_unknown": (draw_status_unknown_icon, 12),
+}
+
+def _device_pixel_ratios():
+    ratios = {1.0}
+    if QGuiApplication.instance() is not None:
+        ratios.update(screen.devicePixelRatio() for screen in QGuiApplication.screens())
+    return sorted(ratios)
+
+def get_pixmap(name, size=None, dpr=None):
+    """The named icon as a size x size (logical pixels) QPixmap rendered for dpr; cached, so callers share it.
+
+    Icons laid out for a smaller size are scaled up while drawing, not
+    after, so they stay sharp. dpr defaults to the primary screen's.
+    """
+    draw_func, base_size = ICONS[name]
+    size = size or base_size
+    if dpr is None:
+        screen = QGuiApplication.primaryScreen() if QGuiApplication.instance() is not None else None
+        dpr = screen.devicePixelRatio() if screen is not None else 1.0
+    key = (name, size, dpr)
+    pixmap = _pixmaps.get(key)
+    if pixmap is None:
+        pixmap = QPixmap(round(size * dpr), round(size * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(size / base_size, size / base_size)
+        draw_func(painter, (base_size, base_size))
+        painter.end()
+        _pixmaps[key] = pixmap
+    return pixmap
+
+def get_icon(name, size=None):
+    """The named icon as a QIcon holding a pixmap for every connected screen's pixel ratio"""
+    key = (name, size)
+    icon = _icons.get(key)
+    if icon is None:
+        icon = QIcon()
+        for dpr in _device_pixel_ratios():
+            icon.addPixmap(get_pixmap(name, size, dpr))
+        _icons[key] = icon
+    return icon
+
+def get_status_icons():
     return {
-        "connect": create_icon("connect", draw_connect_icon),
-        "disconnect": create_icon("disconnect", draw_disconnect_icon),
-        "wake": create_icon("wake", draw_wake_icon),
-        "rdp": create_icon("rdp", draw_rdp_icon),
-        "pc": create_icon("pc", draw_pc_icon) # Add the PC icon
+        "up": get_icon("status_up"),
+        "no-rdp": get_icon("status_no_rdp"),
+        "down": get_icon("status_down"),
+        "unknown": get_icon("status_unknown")
     }
 
+def get_all_icons():
+    return {name: get_icon(name) for name in ("connect", "disconnect", "wake", "rdp", "pc")}
+
 def get_app_icon():
-    return create_icon("app_icon", draw_rdp_icon, size=(32,32))
+    return get_icon("app_icon")
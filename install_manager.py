@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+
+HEALTH_FILE_ENV = 'UNIVERSALVPNTOOL_HEALTH_FILE' # Set for a freshly swapped-in version; it touches the file once healthy
+HEALTHY_AFTER = 5 # Seconds the new version's event loop must run before it reports healthy
+HEALTH_TIMEOUT = 60 # Seconds a new version gets to report healthy before it is rolled back
+HEALTH_POLL_INTERVAL = 0.1
+KILL_TIMEOUT = 10 # Seconds taskkill gets to end a new version's process tree on Windows
+HASH_BLOCK = 1024 * 1024
+
+# Everything lives next to the executable, so every swap is a rename within one directory
+def _paths(executable):
+    return {
+        'download': f"{executable}.download", # Where the update downloads to (with its .part files)
+        'staged': f"{executable}.staged",     # Verified next version, waiting for a restart
+        'previous': f"{executable}.previous", # Version before the last swap, kept for rollback
+        'failed': f"{executable}.failed",     # Version that failed its health check
+        'health': f"{executable}.healthy",
+        'state': f"{executable}.update.json",
+    }
+
+def get_executable():
+    """Path of the running packaged executable, or None when running from source"""
+    return sys.executable if getattr(sys, 'frozen', False) else None
+
+def download_path(executable):
+    return _paths(executable)['download']
+
+def _sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def _load_state(executable):
+    try:
+        with open(_paths(executable)['state'], 'r') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(executable, state):
+    path = _paths(executable)['state']
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(state, f, indent=4)
+    os.replace(f"{path}.tmp", path)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def is_bad_version(executable, version):
+    """True if version was installed before and failed its startup check"""
+    return version in _load_state(executable).get('bad_versions', [])
+
+def stage_update(executable, downloaded_path, version, sha256=None):
+    """Verify a downloaded update and move it next to the executable for the next restart.
+
+    Returns (success, message). Without a published sha256 the file's own
+    digest is recorded, so the swap still notices a file changed on disk.
+    Versions that failed a health check before are refused.
+    """
+    paths = _paths(executable)
+    state = _load_state(executable)
+    if version in state.get('bad_versions', []):
+        _remove(downloaded_path)
+        return False, f"{version} failed its startup check before and will not be installed again."
+    try:
+        digest = _sha256(downloaded_path)
+        if sha256 and digest != sha256:
+            _remove(downloaded_path)
+            return False, f"The downloaded {version} does not match its checksum."
+        os.chmod(downloaded_path, os.stat(executable).st_mode) # Keep the executable bit on Linux and macOS
+        os.replace(downloaded_path, paths['staged'])
+        state['staged'] = {'version': version, 'sha256': digest}
+        _save_state(executable, state)
+    except OSError as e:
+        return False, f"Could not stage {version}: {e}"
+    return True, f"{version} is staged and will be installed on the next restart."
+
+def staged_version(executable):
+    """Version waiting in the staging slot, or None"""
+    staged = _load_state(executable).get('staged')
+    if staged and os.path.exists(_paths(executable)['staged']):
+        return staged['version']
+    return None
+
+def _swap(executable):
+    """current -> previous, staged -> current; two renames in one directory"""
+    paths = _paths(executable)
+    os.replace(executable, paths['previous']) # A running executable can be renamed, even on Windows
+    try:
+        os.replace(paths['staged'], executable)
+    except OSError:
+        os.replace(paths['previous'], executable)
+        raise
+
+def _roll_back(executable):
+    paths = _paths(executable)
+    os.replace(executable, paths['failed'])
+    os.replace(paths['previous'], executable)
+
+def child_environment(**extra):
+    """Environment for starting the executable anew from a running onefile build.
+
+    Without this the child inherits PyInstaller's variables and may reuse
+    this process's _MEI extraction directory, i.e. run the old code, or
+    crash once this process exits and the directory is removed.
+    """
+    env = {key: value for key, value in os.environ.items()
+           if key != '_MEIPASS2' and not key.startswith('_PYI_')}
+    env['PYINSTALLER_RESET_ENVIRONMENT'] = '1'
+    env.update(extra)
+    return env
+
+def _start(executable, argv, env):
+    if platform.system() == "Windows":
+        flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        return subprocess.Popen([executable] + argv[1:], env=env, creationflags=flags, close_fds=True)
+    return subprocess.Popen([executable] + argv[1:], env=env, start_new_session=True, close_fds=True)
+
+def _kill_tree(process):
+    """Kill a started version with its children and wait for it.
+
+    A onefile build runs the app in a child of the bootloader _start
+    created; killing only the bootloader would leave the app holding the
+    executable and its _MEI directory while they are renamed back.
+    """
+    try:
+        if platform.system() == "Windows":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                           capture_output=True, timeout=KILL_TIMEOUT)
+        else:
+            os.killpg(process.pid, signal.SIGKILL) # start_new_session made it a group leader
+    except (OSError, subprocess.SubprocessError):
+        pass # Already gone
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+def _wait_until_healthy(process, health_path, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(health_path):
+            return True
+        if process.poll() is not None:
+            break # The bootloader exited, but a child of it may still be running
+        time.sleep(HEALTH_POLL_INTERVAL)
+    _kill_tree(process)
+    return False
+
+def run_staged_update(executable, argv, timeout=HEALTH_TIMEOUT):
+    """Swap a staged update in and hand over to it; returns (handed_over, message).
+
+    The new version is started with HEALTH_FILE_ENV set and must call
+    report_healthy within `timeout` seconds. If it exits or hangs instead,
+    the previous executable is renamed back, the version is remembered as
+    bad, and (False, message) tells the caller (still the previous version)
+    to carry on starting up. On (True, message) the caller should exit.
+    """
+    version = staged_version(executable)
+    if version is None:
+        return False, None
+    paths = _paths(executable)
+    state = _load_state(executable)
+    try:
+        if _sha256(paths['staged']) != state['staged']['sha256']:
+            raise OSError("the staged file no longer matches its checksum")
+        _swap(executable)
+    except OSError as e:
+        _remove(paths['staged'])
+        state.pop('staged', None)
+        _save_state(executable, state)
+        return False, f"Could not install {version}: {e}"
+    state.pop('staged', None)
+    _save_state(executable, state)
+
+    _remove(paths['health'])
+    env = child_environment(**{HEALTH_FILE_ENV: paths['health']})
+    try:
+        healthy = _wait_until_healthy(_start(executable, argv, env), paths['health'], timeout)
+    except OSError:
+        healthy = False
+    _remove(paths['health'])
+    if healthy:
+        return True, f"Updated to {version}."
+    _roll_back(executable)
+    state.setdefault('bad_versions', []).append(version)
+    _save_state(executable, state)
+    return False, f"{version} failed its startup check; rolled back to the previous version."
+
+def report_healthy():
+    """Called by a newly installed version once it is up; harmless otherwise"""
+    path = os.environ.pop(HEALTH_FILE_ENV, None)
+    if path:
+        with open(path, 'w') as f:
+            f.write(str(os.getpid()))
@@ -0,0 +1,98 @@
+import json
+import os
+import random
+import time
+
+import probe_manager as pm
+import rdp_manager as rm
+import rdp_profiles as rp
+import settings_manager as sm
+import wol_manager as wm
+
+BOOT_TIMES_FILE = sm.settings_path('boot_times.json')
+BOOT_HISTORY_LENGTH = 20 # Samples kept per host
+
+DEFAULT_BOOT_TIMEOUT = 300
+INITIAL_POLL_DELAY = 1.0
+MAX_POLL_DELAY = 8.0
+WAKE_RESEND_INTERVAL = 30 # Magic packets get lost; resend while still waiting
+
+def load_boot_times():
+    if not os.path.exists(BOOT_TIMES_FILE):
+        return {}
+    try:
+        with open(BOOT_TIMES_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def record_boot_time(host_name, seconds):
+    boot_times = load_boot_times()
+    history = boot_times.setdefault(host_name, [])
+    history.append(round(seconds, 2))
+    del history[:-BOOT_HISTORY_LENGTH]
+    with open(BOOT_TIMES_FILE, 'w') as f:
+        json.dump(boot_times, f, indent=4)
+    return sum(history) / len(history)
+
+def wake_and_launch(host, progress_callback=None, cancel_event=None, timeout=DEFAULT_BOOT_TIMEOUT,
+                    repeat=3, packets_per_second=None, secureon_password=None):
+    """Wake a host, wait for its RDP port to open and launch the RDP client.
+
+    Polls with exponential backoff and jitter. repeat, packets_per_second and
+    secureon_password are passed to wol_manager.wake_hosts, for the first wake
+    and every resend. progress_callback receives (message, elapsed_seconds,
+    timeout). Returns (success, message, time_to_desktop) where time_to_desktop
+    is None when the host was already up or never came up.
+    """
+    wake_options = {'repeat': repeat, 'packets_per_second': packets_per_second,
+                    'secureon_password': secureon_password}
+    def report(message):
+        if progress_callback:
+            progress_callback((message, time.monotonic() - start, timeout))
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    start = time.monotonic()
+    port = pm.get_rdp_port(host)
+    status, _ = pm.probe_host(host['ip_address'], port)
+    already_up = status == pm.STATUS_UP
+
+    if not already_up:
+        report(f"Waking {host['name']}...")
+        _, success, message = wm.wake_hosts([host], **wake_options)[0]
+        if not success:
+            return False, message, None
+        last_wake = time.monotonic()
+        delay = INITIAL_POLL_DELAY
+        while True:
+            # Full jitter keeps a lab full of pollers from probing in lockstep
+            if cancel_event is not None:
+                cancel_event.wait(random.uniform(delay / 2, delay))
+            else:
+                time.sleep(random.uniform(delay / 2, delay))
+            if cancelled():
+                return False, f"Wake and connect for {host['name']} cancelled.", None
+            elapsed = time.monotonic() - start
+            if elapsed > timeout:
+                return False, f"{host['name']} did not accept RDP connections within {timeout} seconds.", None
+            status, _ = pm.probe_host(host['ip_address'], port)
+            if status == pm.STATUS_UP:
+                break
+            report(f"Waiting for {host['name']} to boot...")
+            if time.monotonic() - last_wake > WAKE_RESEND_INTERVAL:
+                wm.wake_hosts([host], **wake_options)
+                last_wake = time.monotonic()
+            delay = min(delay * 2, MAX_POLL_DELAY)
+
+    if cancelled():
+        return False, f"Wake and connect for {host['name']} cancelled.", None
+    time_to_desktop = None if already_up else time.monotonic() - start
+    report(f"Launching RDP for {host['name']}...")
+    success, message = rm.launch_rdp(host['ip_address'], host.get('rdp_user'), name=host['name'], port=port,
+                                     profile=host.get('rdp_profile') or rp.AUTO)
+    if success and time_to_desktop is not None:
+        average = record_boot_time(host['name'], time_to_desktop)
+        message = f"{message} ({host['name']} ready after {time_to_desktop:.1f} s, average {average:.1f} s)"
+    return success, message, time_to_desktop
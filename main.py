@@ -1,33 +1,83 @@
 import sys
+import time
+STARTUP_MARKS = [("start", time.perf_counter())] # (phase, perf_counter when it ended), reported by --profile-startup
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QTabWidget, QTextEdit, QComboBox,
-    QFileDialog, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QProgressBar
+    QFileDialog, QMessageBox, QTableView, QHeaderView, QProgressBar, QAbstractItemView,
+    QDialog, QDialogButtonBox, QListWidget, QListWidgetItem, QSizePolicy
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QEvent
-from PyQt6.QtGui import QIcon, QPixmap, QMouseEvent
-
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QEvent, QTimer, QFileSystemWatcher, QRectF
+from PyQt6.QtGui import QColor, QIcon, QMouseEvent, QPainter, QPalette, QPen
+STARTUP_MARKS.append(("import Qt", time.perf_counter()))
+
+# update_manager and download_manager (and with them requests) are imported where they are
+# first used, so a start with update checks disabled never loads them. The same goes for
+# everything else the first paint does not need: launch_manager, endpoint_manager,
+# wireguard_config and host_search.
 import settings_manager as sm
 import vpn_manager as vm
 import wol_manager as wm
 import rdp_manager as rm
+import rdp_profiles as rp
 import icon_manager as im
-import update_manager as um
+import theme_manager as thm
+import install_manager as inst
+import probe_manager as pm
+import tunnel_manager as tm
+import tunnel_monitor as tmon
+from host_table_model import HostTableModel, HostFilterProxyModel
+from version import CURRENT_VERSION
 import os
-import platform
 import threading
-import time
-import subprocess
 from datetime import datetime
+STARTUP_MARKS.append(("import app modules", time.perf_counter()))
+
+HOST_SEARCH_LIMIT = 200 # Dropdown entries shown while a search is active
+HOST_CARD_ICON_SIZE = 48 # Logical pixels
+HOST_CARD_STATUS_COLORS = {pm.STATUS_UP: '#2ecc71', pm.STATUS_NO_RDP: '#f39c12', pm.STATUS_DOWN: '#e74c3c',
+                           None: '#95a5a6'} # None while the first probe result is pending
+CONFIG_RELOAD_DEBOUNCE_MS = 500 # Quiet period after the last write to config.json before reloading
+STARTUP_BUDGET_MS = 1500 # Cold start to first paint; --profile-startup exits with status 1 when over it
+
+def startup_mark(phase):
+    STARTUP_MARKS.append((phase, time.perf_counter()))
+
+def format_startup_profile(marks, budget_ms=STARTUP_BUDGET_MS):
+    """(report, total ms): how long each phase between the marks took, and the total against the budget"""
+    lines = ["Startup profile:"]
+    for (_, previous), (phase, ended) in zip(marks, marks[1:]):
+        lines.append(f"  {phase:<24} {(ended - previous) * 1000:8.1f} ms")
+    total = (marks[-1][1] - marks[0][1]) * 1000
+    verdict = "within" if total <= budget_ms else "OVER"
+    lines.append(f"  {'total':<24} {total:8.1f} ms ({verdict} the {budget_ms} ms budget)")
+    return "\n".join(lines), total
+
+def set_label_color(label, color):
+    """Colour a label's text through its palette (None follows the theme).
+
+    Unlike a stylesheet this does not re-polish the label, and setting the
+    colour it already has does nothing.
+    """
+    if label.property('text_color') == color:
+        return
+    label.setProperty('text_color', color)
+    palette = QPalette() # Roles left unset keep following the application palette
+    if color is not None:
+        palette.setColor(QPalette.ColorRole.WindowText, QColor(color))
+    label.setPalette(palette)
 
 class Worker(QThread):
     finished = pyqtSignal(object) # Use object to emit any type of result
+    progress = pyqtSignal(object) # Intermediate results reported by func through progress_callback
 
-    def __init__(self, func, *args, **kwargs):
+    def __init__(self, func, *args, report_progress=False, **kwargs):
         super().__init__()
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        if report_progress:
+            self.kwargs['progress_callback'] = self.progress.emit
 
     def run(self):
         result = self.func(*self.args, **self.kwargs)
@@ -36,24 +86,18 @@ class Worker(QThread):
 class HostSelectionItem(QWidget):
     clicked = pyqtSignal(object)
 
-    def __init__(self, host_data, icon_path, parent=None):
+    def __init__(self, host_data, pixmap, parent=None):
         super().__init__(parent)
         self.host_data = host_data
         self.is_selected = False
+        self.is_hovered = False
 
         self.layout = QVBoxLayout(self)
         self.layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.setContentsMargins(10, 10, 10, 10)
 
         self.icon_label = QLabel()
-        try:
-            pixmap = QPixmap(icon_path)
-            if pixmap.isNull():
-                raise ValueError(f"Failed to load pixmap from {icon_path}")
-        except Exception as e:
-            print(f"Error loading icon {icon_path}: {e}")
-            pixmap = QPixmap() # Fallback to empty pixmap
-        self.icon_label.setPixmap(pixmap.scaled(48, 48, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.icon_label.setPixmap(pixmap) # Shared by every card; already rendered at the card's size and pixel ratio
         self.icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.addWidget(self.icon_label)
 
@@ -61,40 +105,178 @@ class HostSelectionItem(QWidget):
         self.name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.addWidget(self.name_label)
 
-        self.setFixedSize(100, 100) # Fixed size for the item
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        font = self.status_label.font()
+        font.setPixelSize(10)
+        self.status_label.setFont(font)
+        self.status = () # (status, rounded latency) shown, so repeated probe results change nothing
+        self.set_status(None, None)
+        self.layout.addWidget(self.status_label)
+
+        self.setFixedSize(100, 115) # Fixed size for the item
+
+    def set_status(self, status, latency):
+        """Show a probe result; status None shows "checking..." until the next one"""
+        shown = (status, round(latency) if status == pm.STATUS_UP else None)
+        if shown == self.status:
+            return
+        if status is None:
+            self.status_label.setText("checking...")
+        elif status == pm.STATUS_UP:
+            self.status_label.setText(f"\u25cf {shown[1]} ms")
+        elif status == pm.STATUS_NO_RDP:
+            self.status_label.setText("\u25cf no RDP")
+        else:
+            self.status_label.setText("\u25cf down")
+        set_label_color(self.status_label, HOST_CARD_STATUS_COLORS.get(status, HOST_CARD_STATUS_COLORS[pm.STATUS_DOWN]))
+        self.status = shown
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
             self.clicked.emit(self.host_data)
             super().mousePressEvent(event)
 
+    def enterEvent(self, event):
+        self.is_hovered = True
+        self.update()
+        super().enterEvent(event)
+
+    def leaveEvent(self, event):
+        self.is_hovered = False
+        self.update()
+        super().leaveEvent(event)
+
+    def paintEvent(self, event):
+        # The card frame is painted here rather than by stylesheet rules, so selecting
+        # or hovering a card only repaints that card instead of re-polishing it
+        theme = thm.current()
+        if self.is_selected:
+            fill, border, width = theme.card_selected_fill, theme.card_selected_border, thm.CARD_SELECTED_BORDER_WIDTH
+        elif self.is_hovered:
+            fill, border, width = theme.card_hover_fill, theme.card_hover_border, 1
+        else:
+            fill, border, width = theme.card_fill, theme.card_border, 1
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(border, width))
+        painter.setBrush(fill)
+        painter.drawRoundedRect(QRectF(self.rect()).adjusted(width / 2, width / 2, -width / 2, -width / 2),
+                                thm.CARD_RADIUS, thm.CARD_RADIUS)
+
     def set_selected(self, selected: bool):
-        self.is_selected = selected
-        self.setProperty("selected", selected)
-        self.style().polish(self) # Re-polish to apply stylesheet based on property
+        if selected != self.is_selected:
+            self.is_selected = selected
+            self.update()
+
+class HostMultiPicker(QDialog):
+    """Checklist of hosts for bulk actions, with the same search as the host picker.
+
+    search_index may be None while the window's index is still being built;
+    set_search_index hands it over once it is ready.
+    """
+
+    def __init__(self, hosts, search_index, status_icons, host_status, checked=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Launch RDP on Several Hosts")
+        self.resize(360, 480)
+        self.hosts = hosts
+        self.search_index = search_index
+        layout = QVBoxLayout(self)
+
+        self.search_entry = QLineEdit()
+        self.search_entry.setPlaceholderText("Search hosts by name, IP, MAC or user..." if search_index is not None
+                                             else "Indexing hosts for search...")
+        self.search_entry.textChanged.connect(self.filter_hosts)
+        layout.addWidget(self.search_entry)
+
+        self.host_list = QListWidget()
+        self.items = {} # Host name -> QListWidgetItem
+        for host in hosts:
+            status = host_status.get(host['name'], ('unknown', None))[0]
+            item = QListWidgetItem(status_icons.get(status, status_icons['unknown']), host['name'])
+            item.setCheckState(Qt.CheckState.Checked if host['name'] in checked else Qt.CheckState.Unchecked)
+            self.host_list.addItem(item)
+            self.items[host['name']] = item
+        self.host_list.itemChanged.connect(self.update_count)
+        layout.addWidget(self.host_list)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.button(QDialogButtonBox.StandardButton.Ok).setText("Launch RDP")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.update_count()
+
+    def set_search_index(self, search_index):
+        self.search_index = search_index
+        self.search_entry.setPlaceholderText("Search hosts by name, IP, MAC or user...")
+        self.filter_hosts(self.search_entry.text()) # Anything typed while indexing
+
+    def filter_hosts(self, text):
+        if self.search_index is None:
+            return # Filtered once the index arrives
+        visible = None if not text.strip() else {host['name'] for host in self.search_index.search(text, limit=len(self.hosts))}
+        for name, item in self.items.items():
+            item.setHidden(visible is not None and name not in visible)
+
+    def update_count(self):
+        self.count_label.setText(f"{len(self.checked_names())} host(s) selected")
+
+    def checked_names(self):
+        return [name for name, item in self.items.items() if item.checkState() == Qt.CheckState.Checked]
 
 class App(QMainWindow):
+    command_output = pyqtSignal(str) # Output lines from VPN/RDP commands, emitted from any thread
+    rdp_session_ended = pyqtSignal(object, int) # (RdpSession, exit code), emitted from the session reaper thread
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Universal VPN & RDP Tool")
         self.setGeometry(100, 100, 900, 700)
         self.setMinimumSize(700, 500)
 
-        self.settings = sm.load_settings()
-        self.vpn_active = False
+        self.settings = sm.load_settings(first_batch=sm.HOST_BATCH) # The rest load after the first paint
+        startup_mark("load settings")
+        self.tunnel_paths = tm.get_tunnel_paths(self.settings)
+        vm.set_netlink_enabled(self.settings.get('netlink_backend', True))
+        rm.sessions.max_sessions = int(self.settings.get('max_rdp_sessions', rm.DEFAULT_MAX_SESSIONS))
+        rm.sessions.on_exit = self.rdp_session_ended.emit
+        self.tunnel_states = {} # Tunnel name -> True/False/None, from the last query or operation
+        self.tunnel_rows = {} # Tunnel name -> (status label, button)
+        self.tunnel_workers = {} # Tunnel name -> (worker, cancel event) while it is being brought up or down
+        self.tunnel_bulk_workers = [] # Workers bringing up several tunnels for one host
+        self.tunnel_state_worker = None
+        self.tunnel_monitor = tmon.TunnelMonitor()
+        self.tunnel_stats = {} # Tunnel name -> summary from the last monitor sample
+        self.tunnel_reconnected_at = {} # Tunnel name -> time.monotonic() of the last automatic reconnect or failover
+        self.monitor_worker = None
+        self.monitor_error = None
         self.current_selected_host = None # To store the currently selected host object
         self.host_dropdown = None # Initialize host_dropdown
         self.host_buttons = [] # To keep track of HostSelectionItem widgets
+        self.host_status = {} # Host name -> (status, latency_ms) from the last reachability probe
+        self.host_dropdown_index = {} # Host name -> dropdown row, so probe results update in O(1)
+        self.host_search_index = None # Built in the background when the search box gets focus, then kept up to date by the registry
+        self.search_index_worker = None
+        self.host_multi_picker = None # Open bulk launch picker, handed the search index once it is built
+        self.search_index_changes = None # Registry changes made while the index builds, replayed into it after
+        self.probe_worker = None
+        self.probe_stop_event = None
+        self.probe_pending = False
+        self.wake_launch_worker = None
+        self.wake_launch_cancel_event = None
+        self.rdp_workers = [] # Workers measuring the link and launching an RDP client
+        self.rdp_bulk_cancel_event = threading.Event() # Stops pending bulk launches when the window closes
+        self.rdp_bulk_checked = [] # Hosts ticked in the last bulk launch, ticked again next time
 
         # Load Icons
-        self.icons = {}
-        for name, path in im.get_all_icons().items():
-            self.icons[name] = QIcon(path)
-        try:
-            app_icon_path = im.get_app_icon()
-            self.setWindowIcon(QIcon(app_icon_path))
-        except Exception as e:
-            print(f"Error setting application icon: {e}")
+        self.icons = im.get_all_icons()
+        self.status_icons = im.get_status_icons()
+        self.setWindowIcon(im.get_app_icon())
+        startup_mark("create icons")
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -112,343 +294,124 @@ class App(QMainWindow):
         self.create_home_tab()
         self.create_settings_tab()
         self.apply_stylesheet()
+        hints = QApplication.styleHints()
+        if hasattr(hints, 'colorSchemeChanged'): # Qt 6.5+; lets "System" follow the desktop's light/dark switch
+            hints.colorSchemeChanged.connect(lambda _: self.apply_stylesheet())
 
         # Status Bar
-        self.status_bar = QLabel(f"Version: {um.CURRENT_VERSION}")
+        self.status_bar = QLabel(f"Version: {CURRENT_VERSION}")
         self.status_bar.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
         self.main_layout.addWidget(self.status_bar)
+        startup_mark("build widgets")
 
         self.log("Application started.")
-        # self.check_for_updates_on_startup() # Re-enable after update manager is integrated
+
+        # Keep host reachability badges fresh without blocking the event loop
+        self.probe_timer = QTimer(self)
+        self.probe_timer.timeout.connect(self.on_probe_timer)
+        self.probe_timer.start(int(self.settings.get('probe_interval', 30)) * 1000)
+        self.start_host_probe()
+
+        # Pick up config.json pushed by configuration management without a restart
+        self.config_reload_worker = None
+        self.config_reload_timer = QTimer(self)
+        self.config_reload_timer.setSingleShot(True)
+        self.config_reload_timer.setInterval(CONFIG_RELOAD_DEBOUNCE_MS)
+        self.config_reload_timer.timeout.connect(self.reload_config)
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.fileChanged.connect(self._on_config_file_event)
+        self.config_watcher.directoryChanged.connect(self._on_config_file_event)
+        self._watch_config_file()
+        self.refresh_tunnel_states()
+
+        # Handshake age and throughput for connected tunnels; stale tunnels are reconnected
+        self.monitor_timer = QTimer(self)
+        self.monitor_timer.timeout.connect(self.sample_tunnels)
+        self.monitor_timer.start(int(float(self.settings.get('monitor_interval', tmon.DEFAULT_MONITOR_INTERVAL)) * 1000))
+        # Open RDP sessions and their uptime
+        self.rdp_session_ended.connect(self.on_rdp_session_ended)
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self.update_rdp_sessions)
+        self.update_rdp_sessions()
+        # Update checks run in a worker after the first paint and are served from the release cache
+        # most of the time, so startup never waits on GitHub
+        self.update_worker = None
+        self.download_worker = None
+        self.restart_requested = False # Set when the user restarts into a staged update
+        self.download_cancel_event = threading.Event() # Set on close; the partial download resumes next time
+        self.profile_startup = False # Set by --profile-startup: print the startup profile and quit after the first paint
+        self.first_painted = False
+        self.startup_ms = None # Cold start to first paint
+        startup_mark("start timers and workers")
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), thm.current().window_gradient(self.rect()))
+        painter.end()
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            startup_mark("first paint")
+            self.on_first_paint()
+
+    def on_first_paint(self):
+        report, self.startup_ms = format_startup_profile(STARTUP_MARKS)
+        if self.profile_startup:
+            print(report)
+            QTimer.singleShot(0, self.close) # Through closeEvent, so the startup workers are waited for
+            return
+        if sm.has_more_hosts():
+            QTimer.singleShot(0, self.load_more_hosts)
+        if self.startup_ms > STARTUP_BUDGET_MS:
+            self.log(f"Startup took {self.startup_ms:.0f} ms, over the {STARTUP_BUDGET_MS} ms budget; run with --profile-startup for details.")
+        if self.settings.get('check_for_updates', True):
+            QTimer.singleShot(0, self.check_for_updates_on_startup)
+
+    def load_more_hosts(self):
+        # One batch per event loop pass keeps the window responsive while a large host list loads
+        if sm.load_more_hosts(self._append_loaded_hosts):
+            QTimer.singleShot(0, self.load_more_hosts)
+        else:
+            self.start_host_probe() # Now covering every host
+
+    def _append_loaded_hosts(self, records):
+        records = self.host_model.append_hosts(records)
+        if not records:
+            return records
+        if self._selection_needs_rebuild():
+            self.update_host_selection()
+        else:
+            for record in records:
+                self.host_dropdown_index[record.name] = self.host_dropdown.count()
+                self.host_dropdown.addItem(self.status_icons['unknown'], record.name, record.name)
+        return records
+
+    def closeEvent(self, event):
+        if self.probe_worker is not None and self.probe_worker.isRunning():
+            self.probe_stop_event.set()
+            self.probe_worker.wait()
+        if self.wake_launch_worker is not None and self.wake_launch_worker.isRunning():
+            self.wake_launch_cancel_event.set()
+            self.wake_launch_worker.wait()
+        if self.config_reload_worker is not None and self.config_reload_worker.isRunning():
+            self.config_reload_worker.wait()
+        if self.search_index_worker is not None and self.search_index_worker.isRunning():
+            self.search_index_worker.wait()
+        for worker, cancel_event in list(self.tunnel_workers.values()):
+            cancel_event.set()
+            worker.wait()
+        self.rdp_bulk_cancel_event.set()
+        for worker in self.tunnel_bulk_workers + self.rdp_workers:
+            worker.wait()
+        self.download_cancel_event.set()
+        for worker in (self.tunnel_state_worker, self.monitor_worker, self.update_worker, self.download_worker):
+            if worker is not None and worker.isRunning():
+                worker.wait()
+        super().closeEvent(event)
 
     def apply_stylesheet(self):
-        appearance_mode = self.settings.get("appearance_mode", "System")
-        if appearance_mode == "Dark":
-            # Dark Glassy Theme
-            stylesheet = """
-                QMainWindow {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2c3e50, stop:1 #34495e);
-                    color: #ecf0f1;
-                }
-                QTabWidget::pane {
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    background-color: rgba(0, 0, 0, 0.3); /* Semi-transparent background */
-                    border-radius: 8px;
-                }
-                QTabWidget::tab-bar {
-                    left: 10px;
-                }
-                QTabBar::tab {
-                    background: rgba(255, 255, 255, 0.1);
-                    color: #ecf0f1;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    border-bottom-left-radius: 5px;
-                    border-bottom-right-radius: 5px;
-                    padding: 10px 25px;
-                    margin-right: 2px;
-                }
-                QTabBar::tab:selected {
-                    background: rgba(255, 255, 255, 0.2);
-                    border-color: rgba(255, 255, 255, 0.3);
-                    border-bottom-color: rgba(255, 255, 255, 0.0); /* Make selected tab look like it's part of the pane */
-                }
-                QPushButton {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #3498db, stop:1 #2980b9);
-                    color: white;
-                    border: 1px solid #2980b9;
-                    padding: 10px 20px;
-                    border-radius: 5px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2980b9, stop:1 #3498db);
-                    border: 1px solid #3498db;
-                }
-                QPushButton:pressed {
-                    background-color: #2980b9;
-                }
-                QLineEdit, QTextEdit, QComboBox {
-                    background-color: rgba(255, 255, 255, 0.1);
-                    color: #ecf0f1;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    padding: 8px;
-                    border-radius: 5px;
-                }
-                QLabel {
-                    color: #ecf0f1;
-                }
-                QMessageBox {
-                    background-color: #2c3e50;
-                    color: #ecf0f1;
-                }
-                QMessageBox QPushButton {
-                    background-color: #3498db;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 3px;
-                }
-                QTableWidget {
-                    background-color: rgba(0, 0, 0, 0.2);
-                    alternate-background-color: rgba(0, 0, 0, 0.1);
-                    color: #ecf0f1;
-                    gridline-color: rgba(255, 255, 255, 0.1);
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    border-radius: 5px;
-                }
-                QHeaderView::section {
-                    background-color: rgba(255, 255, 255, 0.15);
-                    color: #ecf0f1;
-                    padding: 5px;
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                }
-                QTableWidget::item:selected {
-                    background-color: rgba(52, 152, 219, 0.5); /* Blue selection with transparency */
-                    color: white;
-                }
-                QProgressBar {
-                    text-align: center;
-                    color: white;
-                    border-radius: 5px;
-                    background-color: rgba(255, 255, 255, 0.1);
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }
-                QProgressBar::chunk {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2ecc71, stop:1 #27ae60);
-                    border-radius: 5px;
-                }
-                HostSelectionItem {
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    border-radius: 8px;
-                    background-color: rgba(255, 255, 255, 0.05);
-                }
-                HostSelectionItem:hover {
-                    border: 1px solid rgba(255, 255, 255, 0.4);
-                    background-color: rgba(255, 255, 255, 0.1);
-                }
-                HostSelectionItem[selected="true"] {
-                    border: 3px solid #3498db;
-                    background-color: rgba(52, 152, 219, 0.3);
-                    box-shadow: 0 0 8px rgba(52, 152, 219, 0.5);
-                }
-            """
-        elif appearance_mode == "Light":
-            # Light Glassy Theme
-            stylesheet = """
-                QMainWindow {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ecf0f1, stop:1 #bdc3c7);
-                    color: #2c3e50;
-                }
-                QTabWidget::pane {
-                    border: 1px solid rgba(0, 0, 0, 0.1);
-                    background-color: rgba(255, 255, 255, 0.7); /* Semi-transparent background */
-                    border-radius: 8px;
-                }
-                QTabWidget::tab-bar {
-                    left: 10px;
-                }
-                QTabBar::tab {
-                    background: rgba(255, 255, 255, 0.7);
-                    color: #2c3e50;
-                    border: 1px solid rgba(0, 0, 0, 0.2);
-                    border-bottom-left-radius: 5px;
-                    border-bottom-right-radius: 5px;
-                    padding: 10px 25px;
-                    margin-right: 2px;
-                }
-                QTabBar::tab:selected {
-                    background: rgba(255, 255, 255, 0.9);
-                    border-color: rgba(0, 0, 0, 0.3);
-                    border-bottom-color: rgba(255, 255, 255, 0.0); /* Make selected tab look like it's part of the pane */
-                }
-                QPushButton {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #3498db, stop:1 #2980b9);
-                    color: white;
-                    border: 1px solid #2980b9;
-                    padding: 10px 20px;
-                    border-radius: 5px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2980b9, stop:1 #3498db);
-                    border: 1px solid #3498db;
-                }
-                QPushButton:pressed {
-                    background-color: #2980b9;
-                }
-                QLineEdit, QTextEdit, QComboBox {
-                    background-color: rgba(255, 255, 255, 0.7);
-                    color: #2c3e50;
-                    border: 1px solid rgba(0, 0, 0, 0.2);
-                    padding: 8px;
-                    border-radius: 5px;
-                }
-                QLabel {
-                    color: #2c3e50;
-                }
-                QMessageBox {
-                    background-color: #ecf0f1;
-                    color: #2c3e50;
-                }
-                QMessageBox QPushButton {
-                    background-color: #3498db;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 3px;
-                }
-                QTableWidget {
-                    background-color: rgba(255, 255, 255, 0.6);
-                    alternate-background-color: rgba(255, 255, 255, 0.5);
-                    color: #2c3e50;
-                    gridline-color: rgba(0, 0, 0, 0.1);
-                    border: 1px solid rgba(0, 0, 0, 0.1);
-                    border-radius: 5px;
-                }
-                QHeaderView::section {
-                    background-color: rgba(0, 0, 0, 0.1);
-                    color: #2c3e50;
-                    padding: 5px;
-                    border: 1px solid rgba(0, 0, 0, 0.1);
-                }
-                QTableWidget::item:selected {
-                    background-color: rgba(52, 152, 219, 0.5); /* Blue selection with transparency */
-                    color: white;
-                }
-                QProgressBar {
-                    text-align: center;
-                    color: #2c3e50;
-                    border-radius: 5px;
-                    background-color: rgba(0, 0, 0, 0.1);
-                    border: 1px solid rgba(0, 0, 0, 0.2);
-                }
-                QProgressBar::chunk {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2ecc71, stop:1 #27ae60);
-                    border-radius: 5px;
-                }
-                HostSelectionItem {
-                    border: 1px solid rgba(0, 0, 0, 0.2);
-                    border-radius: 8px;
-                    background-color: rgba(255, 255, 255, 0.7);
-                }
-                HostSelectionItem:hover {
-                    border: 1px solid rgba(0, 0, 0, 0.4);
-                    background-color: rgba(255, 255, 255, 0.9);
-                }
-                HostSelectionItem[selected="true"] {
-                    border: 3px solid #3498db;
-                    background-color: rgba(52, 152, 219, 0.3);
-                    box-shadow: 0 0 8px rgba(52, 152, 219, 0.5);
-                }
-            """
-        else: # System or default to Dark
-            stylesheet = """
-                QMainWindow {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2c3e50, stop:1 #34495e);
-                    color: #ecf0f1;
-                }
-                QTabWidget::pane {
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    background-color: rgba(0, 0, 0, 0.3); /* Semi-transparent background */
-                    border-radius: 8px;
-                }
-                QTabWidget::tab-bar {
-                    left: 10px;
-                }
-                QTabBar::tab {
-                    background: rgba(255, 255, 255, 0.1);
-                    color: #ecf0f1;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    border-bottom-left-radius: 5px;
-                    border-bottom-right-radius: 5px;
-                    padding: 10px 25px;
-                    margin-right: 2px;
-                }
-                QTabBar::tab:selected {
-                    background: rgba(255, 255, 255, 0.2);
-                    border-color: rgba(255, 255, 255, 0.3);
-                    border-bottom-color: rgba(255, 255, 255, 0.0); /* Make selected tab look like it's part of the pane */
-                }
-                QPushButton {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #3498db, stop:1 #2980b9);
-                    color: white;
-                    border: 1px solid #2980b9;
-                    padding: 10px 20px;
-                    border-radius: 5px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2980b9, stop:1 #3498db);
-                    border: 1px solid #3498db;
-                }
-                QPushButton:pressed {
-                    background-color: #2980b9;
-                }
-                QLineEdit, QTextEdit, QComboBox {
-                    background-color: rgba(255, 255, 255, 0.1);
-                    color: #ecf0f1;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    padding: 8px;
-                    border-radius: 5px;
-                }
-                QLabel {
-                    color: #ecf0f1;
-                }
-                QMessageBox {
-                    background-color: #2c3e50;
-                    color: #ecf0f1;
-                }
-                QMessageBox QPushButton {
-                    background-color: #3498db;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 3px;
-                }
-                QTableWidget {
-                    background-color: rgba(0, 0, 0, 0.2);
-                    alternate-background-color: rgba(0, 0, 0, 0.1);
-                    color: #ecf0f1;
-                    gridline-color: rgba(255, 255, 255, 0.1);
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    border-radius: 5px;
-                }
-                QHeaderView::section {
-                    background-color: rgba(255, 255, 255, 0.15);
-                    color: #ecf0f1;
-                    padding: 5px;
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                }
-                QTableWidget::item:selected {
-                    background-color: rgba(52, 152, 219, 0.5); /* Blue selection with transparency */
-                    color: white;
-                }
-                QProgressBar {
-                    text-align: center;
-                    color: white;
-                    border-radius: 5px;
-                    background-color: rgba(255, 255, 255, 0.1);
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }
-                QProgressBar::chunk {
-                    background-color: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2ecc71, stop:1 #27ae60);
-                    border-radius: 5px;
-                }
-                HostSelectionItem {
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    border-radius: 8px;
-                    background-color: rgba(255, 255, 255, 0.05);
-                }
-                HostSelectionItem:hover {
-                    border: 1px solid rgba(255, 255, 255, 0.4);
-                    background-color: rgba(255, 255, 255, 0.1);
-                }
-                HostSelectionItem[selected="true"] {
-                    border: 2px solid #3498db;
-                    background-color: rgba(52, 152, 219, 0.2);
-                }
-            """
-        self.setStyleSheet(stylesheet)
+        # Themes are compiled once; switching only swaps the application palette
+        thm.apply_theme(self, self.settings.get("appearance_mode", "System"))
 
     def log(self, message):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -467,26 +430,61 @@ class App(QMainWindow):
         self.host_selection_container = QWidget()
         self.host_selection_layout = QVBoxLayout(self.host_selection_container) # This will hold either buttons or dropdown
         control_layout.addWidget(QLabel("Select Host:"))
+        self.host_search_entry = QLineEdit()
+        self.host_search_entry.setPlaceholderText("Search hosts by name, IP, MAC or user...")
+        self.host_search_entry.textChanged.connect(self.filter_host_selection)
+        self.host_search_entry.returnPressed.connect(self._select_first_search_result)
+        control_layout.addWidget(self.host_search_entry)
         control_layout.addWidget(self.host_selection_container)
+        # Build the search index as soon as the search box gets focus, before the first keystroke
+        QApplication.instance().focusChanged.connect(self._on_focus_changed)
 
         self.selected_host_label = QLabel("Selected Host: None")
+        # Its text changes on every selection; without this the controls column is resized to fit it,
+        # which re-lays out and repaints every host card
+        self.selected_host_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Preferred)
         control_layout.addWidget(self.selected_host_label)
 
-        self.vpn_status_label = QLabel("VPN: Disconnected")
-        control_layout.addWidget(self.vpn_status_label)
+        control_layout.addWidget(QLabel("VPN Tunnels:"))
+        self.tunnel_container = QWidget()
+        self.tunnel_layout = QVBoxLayout(self.tunnel_container)
+        self.tunnel_layout.setContentsMargins(0, 0, 0, 0)
+        control_layout.addWidget(self.tunnel_container)
+        self.update_tunnel_rows()
 
-        self.connect_btn = QPushButton(self.icons['connect'], "Connect VPN")
-        self.connect_btn.clicked.connect(self.toggle_vpn_connection)
+        self.connect_btn = QPushButton(self.icons['connect'], "Connect Host Tunnels")
+        self.connect_btn.clicked.connect(self.connect_host_tunnels)
         control_layout.addWidget(self.connect_btn)
 
         self.wake_btn = QPushButton(self.icons['wake'], "Wake Host")
         self.wake_btn.clicked.connect(self.wake_host)
         control_layout.addWidget(self.wake_btn)
 
+        self.wake_all_btn = QPushButton(self.icons['wake'], "Wake All Hosts")
+        self.wake_all_btn.clicked.connect(self.wake_all_hosts)
+        control_layout.addWidget(self.wake_all_btn)
+
         self.rdp_btn = QPushButton(self.icons['rdp'], "Launch RDP")
         self.rdp_btn.clicked.connect(self.launch_rdp)
         control_layout.addWidget(self.rdp_btn)
 
+        self.rdp_bulk_btn = QPushButton(self.icons['rdp'], "Launch RDP on Several Hosts...")
+        self.rdp_bulk_btn.clicked.connect(self.launch_rdp_bulk)
+        control_layout.addWidget(self.rdp_bulk_btn)
+
+        self.rdp_sessions_label = QLabel()
+        self.rdp_sessions_label.setWordWrap(True)
+        control_layout.addWidget(self.rdp_sessions_label)
+
+        self.wake_launch_btn = QPushButton(self.icons['wake'], "Wake && Connect")
+        self.wake_launch_btn.clicked.connect(self.wake_and_launch)
+        control_layout.addWidget(self.wake_launch_btn)
+
+        self.cancel_wake_launch_btn = QPushButton("Cancel")
+        self.cancel_wake_launch_btn.clicked.connect(self.cancel_wake_and_launch)
+        self.cancel_wake_launch_btn.hide()
+        control_layout.addWidget(self.cancel_wake_launch_btn)
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setTextVisible(True)
         self.progress_bar.setFormat("Downloading: %p%")
@@ -498,6 +496,7 @@ class App(QMainWindow):
         log_layout = QVBoxLayout(log_frame)
         log_layout.addWidget(QLabel("Activity Log"))
         self.log_textbox = QTextEdit()
+        self.command_output.connect(self.log)
         self.log_textbox.setReadOnly(True)
         log_layout.addWidget(self.log_textbox)
 
@@ -512,8 +511,9 @@ class App(QMainWindow):
         # WireGuard Config Path
         wg_frame = QWidget()
         wg_layout = QHBoxLayout(wg_frame)
-        wg_layout.addWidget(QLabel("WireGuard Config Path:"))
-        self.wg_path_entry = QLineEdit(self.settings.get('wireguard_config_path', ''))
+        wg_layout.addWidget(QLabel("WireGuard Configs:"))
+        self.wg_path_entry = QLineEdit("; ".join(self.tunnel_paths))
+        self.wg_path_entry.setPlaceholderText("One or more .conf files, separated by ';'")
         wg_layout.addWidget(self.wg_path_entry)
         browse_btn = QPushButton("Browse...")
         browse_btn.clicked.connect(self.browse_wg_config)
@@ -525,13 +525,27 @@ class App(QMainWindow):
         host_mgmt_layout = QVBoxLayout(host_mgmt_frame)
         host_mgmt_layout.addWidget(QLabel("Host Profiles"))
 
-        self.host_table = QTableWidget()
-        self.host_table.setColumnCount(4)
-        self.host_table.setHorizontalHeaderLabels(["Name", "IP Address", "MAC Address", "RDP User"])
+        self.host_filter_entry = QLineEdit()
+        self.host_filter_entry.setPlaceholderText("Filter hosts...")
+        host_mgmt_layout.addWidget(self.host_filter_entry)
+
+        # The model edits the host registry in place; the proxy handles sorting and filtering
+        self.host_model = HostTableModel(self.settings['hosts'])
+        self.host_model.host_edited.connect(self.on_host_edited)
+        self.host_proxy_model = HostFilterProxyModel()
+        self.host_proxy_model.setSourceModel(self.host_model)
+        self.host_filter_entry.textChanged.connect(self.host_proxy_model.setFilterFixedString)
+
+        self.host_table = QTableView()
+        self.host_table.setModel(self.host_proxy_model)
         self.host_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.host_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.host_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.host_table.itemSelectionChanged.connect(self.on_host_select)
+        self.host_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.host_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder) # Keep config order until a header is clicked
+        self.host_table.setSortingEnabled(True)
+        self.host_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.host_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.host_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.host_table.selectionModel().selectionChanged.connect(self.on_host_select)
         host_mgmt_layout.addWidget(self.host_table)
 
         edit_frame = QWidget()
@@ -548,6 +562,14 @@ class App(QMainWindow):
         edit_layout.addWidget(QLabel("RDP User:"))
         self.user_entry = QLineEdit()
         edit_layout.addWidget(self.user_entry)
+        edit_layout.addWidget(QLabel("Tunnel:"))
+        self.tunnel_entry = QLineEdit()
+        self.tunnel_entry.setPlaceholderText("default")
+        edit_layout.addWidget(self.tunnel_entry)
+        edit_layout.addWidget(QLabel("RDP Profile:"))
+        self.rdp_profile_entry = QComboBox()
+        self.rdp_profile_entry.addItems([rp.AUTO, *rp.PROFILES])
+        edit_layout.addWidget(self.rdp_profile_entry)
         host_mgmt_layout.addWidget(edit_frame)
 
         btn_frame = QWidget()
@@ -587,37 +609,37 @@ class App(QMainWindow):
         appearance_mode_layout.addWidget(self.appearance_mode_optionemenu)
         layout.addWidget(appearance_mode_frame)
 
-        self.update_host_table()
-
     def change_appearance_mode_event(self, new_appearance_mode: str):
         self.settings["appearance_mode"] = new_appearance_mode
         sm.save_settings(self.settings)
         self.apply_stylesheet()
 
     def browse_wg_config(self):
-        filepath, _ = QFileDialog.getOpenFileName(self, "Select WireGuard Configuration File")
-        if filepath:
-            self.wg_path_entry.setText(filepath)
-            self.log(f"Selected WireGuard config: {filepath}")
+        filepaths, _ = QFileDialog.getOpenFileNames(self, "Select WireGuard Configuration Files")
+        if filepaths:
+            paths = self._entered_tunnel_paths()
+            paths.extend(path for path in filepaths if path not in paths)
+            self.wg_path_entry.setText("; ".join(paths))
+            self.log(f"Selected WireGuard configs: {', '.join(filepaths)}")
+
+    def _entered_tunnel_paths(self):
+        return [path.strip() for path in self.wg_path_entry.text().split(';') if path.strip()]
 
     def update_host_table(self):
-        self.host_table.setRowCount(0) # Clear existing rows
-        for row_num, host in enumerate(self.settings.get('hosts', [])):
-            self.host_table.insertRow(row_num)
-            self.host_table.setItem(row_num, 0, QTableWidgetItem(host.get('name', '')))
-            self.host_table.setItem(row_num, 1, QTableWidgetItem(host.get('ip_address', '')))
-            self.host_table.setItem(row_num, 2, QTableWidgetItem(host.get('mac_address', '')))
-            self.host_table.setItem(row_num, 3, QTableWidgetItem(host.get('rdp_user', '')))
+        # Only needed when the whole host list is replaced; single-host changes go through the model
+        self.host_model.set_hosts(self.settings['hosts'])
 
     def on_host_select(self):
-        selected_items = self.host_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            host = self.settings.get('hosts', [])[row]
+        selected_rows = self.host_table.selectionModel().selectedRows()
+        if selected_rows:
+            row = self.host_proxy_model.mapToSource(selected_rows[0]).row()
+            host = self.host_model.host_at(row)
             self.name_entry.setText(host.get('name', ''))
             self.ip_entry.setText(host.get('ip_address', ''))
             self.mac_entry.setText(host.get('mac_address', ''))
             self.user_entry.setText(host.get('rdp_user', ''))
+            self.tunnel_entry.setText(host.get('tunnel', ''))
+            self.rdp_profile_entry.setCurrentText(host.get('rdp_profile') or rp.AUTO)
 
     def update_host_selection(self):
         # Clear existing widgets in the layout
@@ -628,6 +650,7 @@ class App(QMainWindow):
 
         hosts = self.settings.get('hosts', [])
         self.host_buttons = [] # Clear previous host buttons
+        self.host_dropdown_index = {}
 
         if not hosts:
             no_hosts_label = QLabel("No hosts configured. Go to Settings to add some.")
@@ -642,10 +665,12 @@ class App(QMainWindow):
             # Use a QHBoxLayout for the buttons to arrange them horizontally
             buttons_h_layout = QHBoxLayout()
             buttons_h_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+            pixmap = im.get_pixmap('pc', HOST_CARD_ICON_SIZE, self.devicePixelRatio())
             for host in hosts:
-                icon_path = im.create_icon('pc', im.draw_pc_icon) # Get the actual path for the icon
-                host_item = HostSelectionItem(host, icon_path)
+                host_item = HostSelectionItem(host, pixmap)
                 host_item.clicked.connect(self._select_host_by_item)
+                if host['name'] in self.host_status:
+                    host_item.set_status(*self.host_status[host['name']])
                 buttons_h_layout.addWidget(host_item)
                 self.host_buttons.append(host_item)
             self.host_selection_layout.addLayout(buttons_h_layout)
@@ -666,15 +691,106 @@ class App(QMainWindow):
         else:
             # Display as dropdown
             self.host_dropdown = QComboBox()
-            self.host_dropdown.addItems([h['name'] for h in hosts])
-            self.host_dropdown.currentTextChanged.connect(self._select_host_by_dropdown)
+            self._populate_host_dropdown(hosts)
+            self.host_dropdown.currentIndexChanged.connect(self._select_host_by_dropdown)
             self.host_selection_layout.addWidget(self.host_dropdown)
             # Select the first host by default if none is selected
             if self.current_selected_host is None and hosts:
-                self.host_dropdown.setCurrentText(hosts[0]['name'])
+                self.host_dropdown.setCurrentIndex(0)
+                self._select_host_by_dropdown(0)
             elif self.current_selected_host:
                 # Ensure dropdown reflects current_selected_host if it was set by buttons previously
-                self.host_dropdown.setCurrentText(self.current_selected_host['name'])
+                self.host_dropdown.setCurrentIndex(self.host_dropdown_index.get(self.current_selected_host['name'], 0))
+
+        if self.host_search_entry.text().strip():
+            self.filter_host_selection(self.host_search_entry.text())
+
+    def _populate_host_dropdown(self, hosts):
+        self.host_dropdown.blockSignals(True)
+        self.host_dropdown.clear()
+        self.host_dropdown_index = {}
+        for row, host in enumerate(hosts):
+            self.host_dropdown.addItem(self.status_icons['unknown'], host['name'], host['name'])
+            self.host_dropdown_index[host['name']] = row
+            if host['name'] in self.host_status:
+                self._set_dropdown_status(row, host['name'], *self.host_status[host['name']])
+        self.host_dropdown.blockSignals(False)
+
+    def filter_host_selection(self, text):
+        if not self.settings['hosts']:
+            return
+        if not text.strip():
+            hosts = self.settings['hosts']
+        else:
+            hosts = self._get_host_search_index().search(text, limit=HOST_SEARCH_LIMIT)
+
+        if self.host_dropdown is None:
+            visible = {host['name'] for host in hosts}
+            for item in self.host_buttons:
+                item.setVisible(item.host_data['name'] in visible)
+            return
+
+        self._populate_host_dropdown(hosts)
+        current_row = self.host_dropdown_index.get(self.current_selected_host['name']) if self.current_selected_host else None
+        if current_row is not None:
+            self.host_dropdown.blockSignals(True)
+            self.host_dropdown.setCurrentIndex(current_row)
+            self.host_dropdown.blockSignals(False)
+        elif hosts:
+            # Best match becomes the selection; only explicit picks are logged
+            self.current_selected_host = hosts[0]
+            self.selected_host_label.setText(f"Selected Host: {hosts[0]['name']}")
+
+    def _get_host_search_index(self):
+        from host_search import HostSearchIndex
+        if self.host_search_index is None or self.host_search_index.registry is not self.settings['hosts']:
+            # Searched before the background build finished; its result is dropped when it arrives
+            self._set_host_search_index(HostSearchIndex(self.settings['hosts']))
+        return self.host_search_index
+
+    def _set_host_search_index(self, index):
+        if self.host_search_index is not None:
+            self.host_search_index.detach()
+        self.host_search_index = index
+        if self.host_multi_picker is not None:
+            self.host_multi_picker.set_search_index(index)
+
+    def _on_focus_changed(self, old, new):
+        if new is self.host_search_entry and self.settings['hosts']:
+            self._build_host_search_index()
+
+    def _build_host_search_index(self):
+        from host_search import HostSearchIndex
+        registry = self.settings['hosts']
+        if self.host_search_index is not None and self.host_search_index.registry is registry:
+            return
+        if self.search_index_worker is not None and self.search_index_worker.isRunning():
+            return
+        # Building takes over a second at 50k hosts; edits made meanwhile are recorded and replayed
+        changes = []
+        self.search_index_changes = lambda action, record: changes.append((action, record))
+        registry.subscribe(self.search_index_changes)
+        self.search_index_worker = Worker(HostSearchIndex, registry, attach=False)
+        self.search_index_worker.finished.connect(lambda index: self._handle_search_index_built(index, changes))
+        self.search_index_worker.start()
+
+    def _handle_search_index_built(self, index, changes):
+        index.registry.unsubscribe(self.search_index_changes)
+        self.search_index_changes = None
+        if index.registry is not self.settings['hosts'] or (
+                self.host_search_index is not None and self.host_search_index.registry is index.registry):
+            return # Built on demand in the meantime, or the hosts were replaced
+        index.attach(changes)
+        self._set_host_search_index(index)
+
+    def _select_first_search_result(self):
+        if self.host_dropdown is not None and self.host_dropdown.count():
+            self.host_dropdown.setCurrentIndex(0)
+            self._select_host_by_dropdown(0)
+        else:
+            visible = [item for item in self.host_buttons if item.isVisibleTo(self.host_selection_container)]
+            if visible:
+                self._select_host_by_item(visible[0].host_data)
 
     def _select_host_by_item(self, host_data):
         # Deselect all other items
@@ -686,9 +802,61 @@ class App(QMainWindow):
         self.current_selected_host = host_data
         self.selected_host_label.setText(f"Selected Host: {host_data['name']}")
         self.log(f"Host selected: {host_data['name']}")
-        self.host_selection_container.style().polish(self.host_selection_container) # Re-polish container to update styles
 
-    
+    def _select_host_by_dropdown(self, index):
+        name = self.host_dropdown.itemData(index) if self.host_dropdown else None
+        host = self.settings['hosts'].get(name)
+        if host is None:
+            return
+        self.current_selected_host = host
+        self.selected_host_label.setText(f"Selected Host: {host['name']}")
+        self.log(f"Host selected: {host['name']}")
+
+    def on_probe_timer(self):
+        # A sweep over a large inventory can outlast the interval; let it finish instead of restarting it
+        if self.probe_worker is None or not self.probe_worker.isRunning():
+            self.start_host_probe()
+
+    def start_host_probe(self):
+        """Probe every host now; a running sweep is aborted since the host list changed"""
+        if self.probe_worker is not None and self.probe_worker.isRunning():
+            # Abort the running sweep and start a fresh one once it has wound down
+            self.probe_stop_event.set()
+            self.probe_pending = True
+            return
+        hosts = list(self.settings.get('hosts', []))
+        if not hosts:
+            return
+        self.probe_stop_event = threading.Event()
+        self.probe_worker = Worker(pm.probe_hosts, hosts, stop_event=self.probe_stop_event, report_progress=True)
+        self.probe_worker.progress.connect(self.on_host_probe_result)
+        self.probe_worker.finished.connect(self.on_host_probe_done)
+        self.probe_worker.start()
+
+    def on_host_probe_result(self, result):
+        name, status, latency = result
+        self.host_status[name] = (status, latency)
+        for item in self.host_buttons:
+            if item.host_data['name'] == name:
+                item.set_status(status, latency)
+        row = self.host_dropdown_index.get(name)
+        if self.host_dropdown is not None and row is not None:
+            self._set_dropdown_status(row, name, status, latency)
+
+    def on_host_probe_done(self, results):
+        if self.probe_pending:
+            self.probe_pending = False
+            self.start_host_probe()
+
+    def _set_dropdown_status(self, row, name, status, latency):
+        self.host_dropdown.setItemIcon(row, self.status_icons.get(status, self.status_icons['unknown']))
+        if status == pm.STATUS_UP:
+            self.host_dropdown.setItemText(row, f"{name}  ({latency:.0f} ms)")
+        elif status == pm.STATUS_NO_RDP:
+            self.host_dropdown.setItemText(row, f"{name}  (no RDP)")
+        else:
+            self.host_dropdown.setItemText(row, f"{name}  (down)")
+
 
     def add_host(self):
         host = {
@@ -696,10 +864,18 @@ class App(QMainWindow):
             "mac_address": self.mac_entry.text(), "rdp_user": self.user_entry.text()
         }
         if all(host.values()):
-            self.settings.setdefault('hosts', []).append(host)
-            self.update_host_table()
-            self.update_host_selection()
+            if self.tunnel_entry.text().strip():
+                host['tunnel'] = self.tunnel_entry.text().strip()
+            if self.rdp_profile_entry.currentText() != rp.AUTO:
+                host['rdp_profile'] = self.rdp_profile_entry.currentText()
+            try:
+                record = self.host_model.add_host(host)
+            except ValueError as e:
+                QMessageBox.warning(self, "Error", f"Cannot add host: {e}")
+                return
+            self.add_host_to_selection(record)
             self.clear_host_entries()
+            self.start_host_probe()
             self.log(f"Added host: {host['name']}")
         else:
             QMessageBox.warning(self, "Error", "All host fields are required.")
@@ -709,37 +885,205 @@ class App(QMainWindow):
         if not selected_host_name or selected_host_name == "No hosts configured":
             QMessageBox.warning(self, "Error", "No host selected to update.")
             return
-        for i, host in enumerate(self.settings.get('hosts', [])):
-            if host['name'] == selected_host_name:
-                updated_host = {
-                    "name": self.name_entry.text(), "ip_address": self.ip_entry.text(),
-                    "mac_address": self.mac_entry.text(), "rdp_user": self.user_entry.text()
-                }
-                self.settings['hosts'][i] = updated_host
-                self.update_host_table()
-                self.update_host_selection()
-                self.clear_host_entries()
-                self.log(f"Updated host: {updated_host['name']}")
-                return
+        if selected_host_name not in self.settings['hosts']:
+            return
+        try:
+            # Only the edited fields change, so optional keys such as rdp_port are kept
+            values = {
+                "name": self.name_entry.text(), "ip_address": self.ip_entry.text(),
+                "mac_address": self.mac_entry.text(), "rdp_user": self.user_entry.text()
+            }
+            tunnel = self.tunnel_entry.text().strip()
+            if tunnel or 'tunnel' in self.settings['hosts'].get(selected_host_name):
+                values['tunnel'] = tunnel
+            profile = self.rdp_profile_entry.currentText()
+            if profile != rp.AUTO or 'rdp_profile' in self.settings['hosts'].get(selected_host_name):
+                values['rdp_profile'] = profile
+            updated_host = self.host_model.update_host(selected_host_name, values)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Cannot update host: {e}")
+            return
+        self.refresh_host_in_selection(selected_host_name, updated_host)
+        self.clear_host_entries()
+        self.start_host_probe()
+        self.log(f"Updated host: {updated_host['name']}")
 
     def remove_host(self):
         selected_host_name = self.name_entry.text()
         if not selected_host_name or selected_host_name == "No hosts configured":
             QMessageBox.warning(self, "Error", "No host selected to remove.")
             return
-        self.settings['hosts'] = [h for h in self.settings.get('hosts', []) if h['name'] != selected_host_name]
-        self.update_host_table()
-        self.update_host_selection()
+        if selected_host_name not in self.settings['hosts']:
+            return
+        self.host_model.remove_host(selected_host_name)
+        self.remove_host_from_selection(selected_host_name)
         self.log(f"Removed host: {selected_host_name}")
 
+    def on_host_edited(self, previous_name, host):
+        self.refresh_host_in_selection(previous_name, host)
+        self.start_host_probe()
+        self.log(f"Updated host: {host['name']}")
+
+    def refresh_host_in_selection(self, previous_name, host):
+        """Update a single host in the picker without rebuilding it"""
+        self.refresh_hosts_in_selection({previous_name: host})
+
+    def refresh_hosts_in_selection(self, updated):
+        """Update hosts ({previous name: record}) in the picker without rebuilding it; names may have been swapped"""
+        # Records are edited in place, so match them by identity rather than by their (possibly new) names
+        records = {id(host) for host in updated.values()}
+        if id(self.current_selected_host) in records:
+            self.selected_host_label.setText(f"Selected Host: {self.current_selected_host['name']}")
+        for previous_name in updated:
+            self.host_status.pop(previous_name, None) # The address may have changed, so wait for the next probe
+        for item in self.host_buttons:
+            if id(item.host_data) in records:
+                item.name_label.setText(item.host_data['name'])
+                item.set_status(None, None)
+        rows = {previous_name: self.host_dropdown_index.pop(previous_name, None) for previous_name in updated}
+        if self.host_dropdown is None:
+            return
+        for previous_name, host in updated.items():
+            row = rows[previous_name]
+            if row is None:
+                continue
+            self.host_dropdown_index[host['name']] = row
+            self.host_dropdown.setItemData(row, host['name'])
+            self.host_dropdown.setItemText(row, host['name'])
+            self.host_dropdown.setItemIcon(row, self.status_icons['unknown'])
+
+    def _selection_needs_rebuild(self):
+        # Switching between cards and dropdown, or an active search, needs the full rebuild
+        hosts = self.settings['hosts']
+        cards_mode = self.host_dropdown is None
+        return (not hosts or cards_mode != (len(hosts) <= 5) or cards_mode
+                or bool(self.host_search_entry.text().strip()))
+
+    def add_host_to_selection(self, host):
+        if self._selection_needs_rebuild():
+            self.update_host_selection()
+            return
+        row = self.host_dropdown.count()
+        self.host_dropdown.addItem(self.status_icons['unknown'], host['name'], host['name'])
+        self.host_dropdown_index[host['name']] = row
+
+    def remove_host_from_selection(self, name):
+        self.host_status.pop(name, None)
+        was_selected = self.current_selected_host is not None and self.current_selected_host['name'] == name
+        if was_selected:
+            self.current_selected_host = None
+        if self._selection_needs_rebuild():
+            self.update_host_selection()
+            return
+        row = self.host_dropdown_index.pop(name, None)
+        if row is None:
+            return
+        self.host_dropdown.blockSignals(True)
+        self.host_dropdown.removeItem(row)
+        self.host_dropdown.blockSignals(False)
+        for later_row in range(row, self.host_dropdown.count()):
+            self.host_dropdown_index[self.host_dropdown.itemData(later_row)] = later_row
+        if was_selected:
+            self._select_host_by_dropdown(self.host_dropdown.currentIndex())
+
+    def _watch_config_file(self):
+        config_path = os.path.abspath(sm.CONFIG_FILE)
+        if os.path.dirname(config_path) not in self.config_watcher.directories():
+            self.config_watcher.addPath(os.path.dirname(config_path)) # Catches config.json being created or replaced
+        if os.path.exists(config_path) and config_path not in self.config_watcher.files():
+            self.config_watcher.addPath(config_path)
+
+    def _on_config_file_event(self, path):
+        self._watch_config_file() # Tools that replace the file drop the existing watch
+        self.config_reload_timer.start() # Restarting the timer coalesces bursts of writes
+
+    def reload_config(self):
+        if (self.config_reload_worker is not None and self.config_reload_worker.isRunning()) or sm.has_more_hosts():
+            self.config_reload_timer.start() # Diffing against a partly loaded host list would re-add the rest
+            return
+        if not sm.config_json_is_newer():
+            return
+        # Parse and diff off the GUI thread; only applying the diff touches widgets
+        self.config_reload_worker = Worker(sm.read_config_changes, self.settings)
+        self.config_reload_worker.finished.connect(self.apply_config_changes)
+        self.config_reload_worker.start()
+
+    def apply_config_changes(self, result):
+        success, changes = result
+        if not success:
+            self.log(changes)
+            return
+        hosts = self.settings['hosts']
+        failed = []
+        for name in changes['removed_hosts']:
+            if name in hosts:
+                self.host_model.remove_host(name)
+                self.remove_host_from_selection(name)
+        # One transaction, checked against the final state, so hosts may swap names or addresses
+        updated, errors = self.host_model.update_hosts(
+            {name: values for name, values in changes['updated_hosts'].items() if name in hosts})
+        self.refresh_hosts_in_selection(updated)
+        failed.extend(f"{name}: {error}" for name, error in errors.items())
+        for host in changes['added_hosts']:
+            try:
+                self.add_host_to_selection(self.host_model.add_host(host))
+            except ValueError as e:
+                failed.append(f"{host.get('name', '')}: {e}")
+        if changes['settings'] or changes['removed_settings']:
+            self.settings.update(changes['settings'])
+            for key in changes['removed_settings']:
+                self.settings.pop(key, None)
+            self.apply_reloaded_settings(set(changes['settings']).union(changes['removed_settings']))
+
+        sm.save_settings(self.settings)
+        sm.mark_config_json_imported(changes['mtime'])
+        for failure in failed:
+            self.log(f"Skipped host from {sm.CONFIG_FILE}: {failure}")
+        self.log(f"Reloaded {sm.CONFIG_FILE}: {len(changes['added_hosts'])} added, {len(changes['updated_hosts'])} updated, "
+                 f"{len(changes['removed_hosts'])} removed, "
+                 f"{len(changes['settings']) + len(changes['removed_settings'])} settings changed.")
+        if changes['added_hosts'] or changes['updated_hosts']:
+            self.start_host_probe()
+
+    def apply_reloaded_settings(self, changed):
+        # Read back from self.settings with the startup defaults, so removed keys revert too
+        if 'tunnels' in changed or 'wireguard_config_path' in changed:
+            self.set_tunnel_paths(tm.get_tunnel_paths(self.settings))
+            self.wg_path_entry.setText("; ".join(self.tunnel_paths))
+        if 'appearance_mode' in changed:
+            self.appearance_mode_optionemenu.setCurrentText(self.settings.get("appearance_mode", "System"))
+        if 'probe_interval' in changed:
+            self.probe_timer.setInterval(int(self.settings.get('probe_interval', 30)) * 1000)
+        if 'netlink_backend' in changed:
+            vm.set_netlink_enabled(self.settings.get('netlink_backend', True))
+        if 'monitor_interval' in changed:
+            self.monitor_timer.setInterval(int(float(self.settings.get('monitor_interval', tmon.DEFAULT_MONITOR_INTERVAL)) * 1000))
+        if 'max_rdp_sessions' in changed:
+            rm.sessions.max_sessions = int(self.settings.get('max_rdp_sessions', rm.DEFAULT_MAX_SESSIONS))
+            self.update_rdp_sessions()
+
     def clear_host_entries(self):
         self.name_entry.clear()
         self.ip_entry.clear()
         self.mac_entry.clear()
         self.user_entry.clear()
+        self.tunnel_entry.clear()
+        self.rdp_profile_entry.setCurrentText(rp.AUTO)
 
     def save_settings(self):
-        self.settings['wireguard_config_path'] = self.wg_path_entry.text()
+        import wireguard_config as wgc
+        paths = self._entered_tunnel_paths()
+        self.settings['tunnels'] = paths
+        self.settings['wireguard_config_path'] = paths[0] if paths else '' # Kept for older versions
+        self.set_tunnel_paths(paths)
+        invalid = []
+        for path in paths:
+            valid, message = wgc.validate_config(path)
+            self.log(message)
+            if valid is False:
+                invalid.append(message)
+        if invalid:
+            QMessageBox.warning(self, "WireGuard Config", "\n".join(invalid))
         sm.save_settings(self.settings)
         self.log("Settings saved successfully.")
         QMessageBox.information(self, "Success", "Settings have been saved.")
@@ -747,58 +1091,248 @@ class App(QMainWindow):
     def get_selected_host(self):
         return self.current_selected_host
 
-    def toggle_vpn_connection(self):
-        if self.vpn_active:
-            self.disconnect_vpn()
+    def set_tunnel_paths(self, paths):
+        if paths == self.tunnel_paths:
+            return
+        self.tunnel_paths = paths
+        self.update_tunnel_rows()
+        self.refresh_tunnel_states()
+
+    def update_tunnel_rows(self):
+        """One row per tunnel with its own status and Connect/Disconnect button"""
+        while self.tunnel_layout.count():
+            self.tunnel_layout.takeAt(0).widget().deleteLater()
+        self.tunnel_rows = {}
+        if not self.tunnel_paths:
+            self.tunnel_layout.addWidget(QLabel("No WireGuard configs set in Settings."))
+            return
+        for path in self.tunnel_paths:
+            name = tm.get_tunnel_name(path)
+            row = QWidget()
+            row_layout = QHBoxLayout(row)
+            row_layout.setContentsMargins(0, 0, 0, 0)
+            row_layout.addWidget(QLabel(name))
+            status_label = QLabel()
+            row_layout.addWidget(status_label, 1)
+            button = QPushButton()
+            button.clicked.connect(lambda _, path=path: self.toggle_tunnel(path))
+            row_layout.addWidget(button)
+            self.tunnel_layout.addWidget(row)
+            self.tunnel_rows[name] = (status_label, button)
+            self._show_tunnel_state(name)
+
+    def _show_tunnel_state(self, name, failed=False):
+        if name not in self.tunnel_rows:
+            return
+        status_label, button = self.tunnel_rows[name]
+        state = self.tunnel_states.get(name)
+        if name in self.tunnel_workers:
+            status_label.setText("Working...")
+            set_label_color(status_label, None)
+            button.setText("Cancel")
+            button.setIcon(QIcon())
+        elif state:
+            import endpoint_manager as em
+            stats = self.tunnel_stats.get(name)
+            text = "Connected"
+            endpoint, latency = em.active_endpoints.get(name, (stats and stats['endpoint'], None))
+            if endpoint:
+                text += f" via {endpoint}" + (f" ({latency:.0f} ms)" if latency is not None else "")
+            status_label.setText(f"{text}: {tmon.format_summary(stats)}" if stats else text)
+            set_label_color(status_label, "green")
+            button.setText("Disconnect")
+            button.setIcon(self.icons['disconnect'])
         else:
-            self.connect_vpn()
-
-    def connect_vpn(self):
-        config_path = self.settings.get('wireguard_config_path')
-        if not config_path:
-            QMessageBox.warning(self, "Error", "WireGuard config path not set in Settings.")
-            return
-        self.log("VPN connection process started...")
-        self.connect_btn.setEnabled(False)
-        
-        self.vpn_worker = Worker(vm.connect_vpn, config_path)
-        self.vpn_worker.finished.connect(self.on_vpn_connect_done)
-        self.vpn_worker.start()
-
-    def on_vpn_connect_done(self, success, message):
-        self.connect_btn.setEnabled(True)
+            status_label.setText("Failed" if failed else "Disconnected" if state is False else "Unknown")
+            set_label_color(status_label, "red")
+            button.setText("Connect")
+            button.setIcon(self.icons['connect'])
+        button.setEnabled(True)
+
+    def refresh_tunnel_states(self):
+        """Query every tunnel in the background so the rows reflect what is really up"""
+        if not self.tunnel_paths or (self.tunnel_state_worker is not None and self.tunnel_state_worker.isRunning()):
+            return
+        self.tunnel_state_worker = Worker(tm.query_states, list(self.tunnel_paths))
+        self.tunnel_state_worker.finished.connect(self.on_tunnel_states_done)
+        self.tunnel_state_worker.start()
+
+    def on_tunnel_states_done(self, states):
+        for name, active in states.items():
+            if name in self.tunnel_workers:
+                continue # An operation in flight will report the new state itself
+            if active is None:
+                self.log(f"Could not determine the state of tunnel {name}.")
+            self.tunnel_states[name] = active
+            self._show_tunnel_state(name)
+
+    def toggle_tunnel(self, path):
+        name = tm.get_tunnel_name(path)
+        if name in self.tunnel_workers:
+            self.tunnel_workers[name][1].set()
+            self.tunnel_rows[name][1].setEnabled(False)
+            self.log(f"Cancelling tunnel {name}...")
+            return
+        connecting = not self.tunnel_states.get(name)
+        self.log(f"{'Connecting' if connecting else 'Disconnecting'} tunnel {name}...")
+        self._start_tunnel_worker(path, connecting)
+
+    def _tunnel_alternatives(self, name):
+        return self.settings.get('tunnel_endpoints', {}).get(name, [])
+
+    def _start_tunnel_worker(self, path, connecting, interactive=True):
+        import endpoint_manager as em
+        name = tm.get_tunnel_name(path)
+        cancel_event = threading.Event()
+        if connecting:
+            worker = Worker(em.connect_with_failover, path, self._tunnel_alternatives(name),
+                            output_callback=self.command_output.emit, cancel_event=cancel_event)
+        else:
+            em.active_endpoints.pop(name, None)
+            worker = Worker(vm.disconnect_vpn, path, output_callback=self.command_output.emit, cancel_event=cancel_event)
+        worker.finished.connect(lambda result: self.on_tunnel_done(name, connecting, result, interactive))
+        self.tunnel_workers[name] = (worker, cancel_event)
+        self.tunnel_stats.pop(name, None)
+        self._show_tunnel_state(name)
+        worker.start()
+
+    def on_tunnel_done(self, name, connecting, result, interactive=True):
+        success, message = result
+        worker, cancel_event = self.tunnel_workers.pop(name)
+        worker.wait() # run() is returning; let the thread finish before the last reference goes
         self.log(message)
         if success:
-            self.vpn_active = True
-            self.vpn_status_label.setText("VPN: Connected")
-            self.vpn_status_label.setStyleSheet("color: green;")
-            self.connect_btn.setText("Disconnect VPN")
-            self.connect_btn.setIcon(self.icons['disconnect'])
-        else:
-            self.vpn_status_label.setText("VPN: Failed")
-            self.vpn_status_label.setStyleSheet("color: red;")
-            QMessageBox.critical(self, "VPN Error", message)
-
-    def disconnect_vpn(self):
-        config_path = self.settings.get('wireguard_config_path')
-        self.log("VPN disconnection process started...")
-        self.connect_btn.setEnabled(False)
-        
-        self.vpn_worker = Worker(vm.disconnect_vpn, config_path)
-        self.vpn_worker.finished.connect(self.on_vpn_disconnect_done)
-        self.vpn_worker.start()
-
-    def on_vpn_disconnect_done(self, success, message):
-        self.connect_btn.setEnabled(True)
+            self.tunnel_states[name] = connecting
+        self._show_tunnel_state(name, failed=not success)
+        if not success and interactive and not cancel_event.is_set():
+            QMessageBox.critical(self, "VPN Error", f"Tunnel {name}: {message}")
+
+    def sample_tunnels(self):
+        import endpoint_manager as em
+        if not any(self.tunnel_states.values()) or (self.monitor_worker is not None and self.monitor_worker.isRunning()):
+            return
+        self.monitor_worker = Worker(self.tunnel_monitor.sample, first_handshake_timeout=em.FIRST_HANDSHAKE_TIMEOUT)
+        self.monitor_worker.finished.connect(self.on_tunnel_sample_done)
+        self.monitor_worker.start()
+
+    def on_tunnel_sample_done(self, result):
+        import endpoint_manager as em
+        success, summaries = result
+        if not success:
+            if summaries != self.monitor_error:
+                self.log(summaries) # Only once; sampling keeps failing the same way (e.g. without root)
+                self.monitor_error = summaries
+            return
+        self.monitor_error = None
+        for path in self.tunnel_paths:
+            name = tm.get_tunnel_name(path)
+            if not self.tunnel_states.get(name) or name in self.tunnel_workers:
+                continue
+            summary = summaries.get(name)
+            if summary is None:
+                self.log(f"Tunnel {name} went down.")
+                self.tunnel_states[name] = False
+                self.tunnel_stats.pop(name, None)
+                self._show_tunnel_state(name)
+                continue
+            self.tunnel_stats[name] = summary
+            self._show_tunnel_state(name)
+            if not self.settings.get('auto_reconnect', True):
+                continue
+            last = self.tunnel_reconnected_at.get(name)
+            since_last = time.monotonic() - last if last is not None else None
+            if self._tunnel_alternatives(name) and (summary['stale'] or summary['no_handshake']):
+                if since_last is None or since_last > em.FIRST_HANDSHAKE_TIMEOUT:
+                    self.tunnel_reconnected_at[name] = time.monotonic()
+                    self.log(f"Tunnel {name} is not completing handshakes; trying another endpoint...")
+                    self._start_failover_worker(path)
+            elif summary['stale'] and (since_last is None or since_last > tmon.STALE_HANDSHAKE_AFTER):
+                self.tunnel_reconnected_at[name] = time.monotonic()
+                self.log(f"Tunnel {name} has not completed a handshake recently; reconnecting...")
+                self._start_tunnel_worker(path, True, interactive=False)
+
+    def _start_failover_worker(self, path):
+        import endpoint_manager as em
+        name = tm.get_tunnel_name(path)
+        worker = Worker(em.fail_over, path, self._tunnel_alternatives(name), output_callback=self.command_output.emit)
+        worker.finished.connect(lambda result: self.on_tunnel_failover_done(name, result))
+        self.tunnel_workers[name] = (worker, threading.Event()) # Switching endpoints is quick; Cancel just waits it out
+        self._show_tunnel_state(name)
+        worker.start()
+
+    def on_tunnel_failover_done(self, name, result):
+        success, message = result
+        worker, _ = self.tunnel_workers.pop(name)
+        worker.wait()
+        self.log(message)
+        self._show_tunnel_state(name)
+
+    def connect_host_tunnels(self):
+        host = self.get_selected_host()
+        if not host:
+            QMessageBox.warning(self, "Error", "No host selected.")
+            return
+        self._with_host_tunnels(host, lambda host: self.log(f"All tunnels for {host['name']} are up."))
+
+    def _with_host_tunnels(self, host, then):
+        """Bring up the tunnels `host` needs, in parallel, then call then(host)"""
+        self._with_tunnels_for([host], lambda hosts: then(host))
+
+    def _with_tunnels_for(self, hosts, then):
+        """Bring up the tunnels `hosts` need, in parallel, then call then(hosts whose tunnels all came up)"""
+        try:
+            host_paths = {host['name']: tm.tunnels_for_host(host, self.tunnel_paths) for host in hosts}
+        except KeyError as e:
+            QMessageBox.warning(self, "VPN Error", e.args[0])
+            return
+        needed = list(dict.fromkeys(path for paths in host_paths.values() for path in paths))
+        label = hosts[0]['name'] if len(hosts) == 1 else f"{len(hosts)} hosts"
+        busy = [tm.get_tunnel_name(path) for path in needed if tm.get_tunnel_name(path) in self.tunnel_workers]
+        if busy:
+            QMessageBox.warning(self, "VPN Error", f"Tunnel {', '.join(busy)} is still connecting or disconnecting.")
+            return
+        down = [path for path in needed if not self.tunnel_states.get(tm.get_tunnel_name(path))]
+        if not down:
+            then(hosts)
+            return
+        names = [tm.get_tunnel_name(path) for path in down]
+        self.log(f"Bringing up {', '.join(names)} for {label}...")
+        cancel_event = threading.Event()
+        worker = Worker(tm.connect_tunnels, down, output_callback=self.command_output.emit, cancel_event=cancel_event,
+                        endpoints=self.settings.get('tunnel_endpoints', {}), report_progress=True)
+        worker.progress.connect(self.on_host_tunnel_progress)
+        worker.finished.connect(lambda results: self.on_host_tunnels_done(worker, hosts, host_paths, names, results,
+                                                                          cancel_event, then))
+        self.tunnel_bulk_workers.append(worker)
+        # Every tunnel row involved shows Cancel, and cancelling any of them stops the whole bring-up
+        for name in names:
+            self.tunnel_workers[name] = (worker, cancel_event)
+            self._show_tunnel_state(name)
+        worker.start()
+
+    def on_host_tunnel_progress(self, result):
+        name, success, message = result
+        self.tunnel_workers.pop(name, None)
         self.log(message)
         if success:
-            self.vpn_active = False
-            self.vpn_status_label.setText("VPN: Disconnected")
-            self.vpn_status_label.setStyleSheet("color: red;")
-            self.connect_btn.setText("Connect VPN")
-            self.connect_btn.setIcon(self.icons['connect'])
-        else:
-            QMessageBox.critical(self, "VPN Error", message)
+            self.tunnel_states[name] = True
+        self._show_tunnel_state(name, failed=not success)
+
+    def on_host_tunnels_done(self, worker, hosts, host_paths, names, results, cancel_event, then):
+        worker.wait()
+        self.tunnel_bulk_workers.remove(worker)
+        for name in names:
+            if self.tunnel_workers.pop(name, None) is not None:
+                self._show_tunnel_state(name)
+        failed_names = {name for name, success, _ in results if not success}
+        ready = [host for host in hosts
+                 if not any(tm.get_tunnel_name(path) in failed_names for path in host_paths[host['name']])]
+        if ready and not cancel_event.is_set():
+            then(ready)
+        if failed_names and not cancel_event.is_set():
+            failed = [f"{name}: {message}" for name, success, message in results if not success]
+            label = hosts[0]['name'] if len(hosts) == 1 else f"{len(hosts) - len(ready)} of {len(hosts)} hosts"
+            QMessageBox.critical(self, "VPN Error", f"Could not bring up the tunnels for {label}:\n" + "\n".join(failed))
 
     def wake_host(self):
         host = self.get_selected_host()
@@ -813,179 +1347,311 @@ class App(QMainWindow):
         else:
             QMessageBox.critical(self, "Wake-on-LAN Error", message)
 
+    def wake_all_hosts(self):
+        hosts = list(self.settings.get('hosts', []))
+        if not hosts:
+            QMessageBox.warning(self, "Error", "No hosts configured.")
+            return
+        self.log(f"Sending Wake-on-LAN packets to {len(hosts)} hosts...")
+        self.wake_all_btn.setEnabled(False)
+        self.wake_worker = Worker(wm.wake_hosts, hosts, **self._wake_options())
+        self.wake_worker.finished.connect(self.on_wake_all_done)
+        self.wake_worker.start()
+
+    def _wake_options(self):
+        # Wake All and Wake & Connect send magic packets the same way
+        return {'repeat': int(self.settings.get('wol_repeat', 3)),
+                'packets_per_second': float(self.settings.get('wol_packets_per_second') or 0) or None,
+                'secureon_password': self.settings.get('secureon_password') or None}
+
+    def on_wake_all_done(self, results):
+        self.wake_all_btn.setEnabled(True)
+        failed = [(name, message) for name, success, message in results if not success]
+        for name, message in failed:
+            self.log(f"Wake-on-LAN failed for {name}: {message}")
+        self.log(f"Wake-on-LAN: {len(results) - len(failed)} of {len(results)} hosts sent.")
+        if failed:
+            QMessageBox.warning(self, "Wake-on-LAN", f"Magic packets could not be sent to {len(failed)} host(s). See the activity log.")
+
     def launch_rdp(self):
         host = self.get_selected_host()
         if not host:
             QMessageBox.warning(self, "Error", "No host selected.")
             return
+        self._with_host_tunnels(host, self._launch_rdp_for)
+
+    def _launch_rdp_for(self, host):
         self.log(f"Launching RDP for {host['name']} at {host['ip_address']}...")
-        success, message = rm.launch_rdp(host['ip_address'], host.get('rdp_user'))
+        # Picking the automatic profile measures the link first, so the launch runs off the GUI thread
+        worker = Worker(rm.launch_rdp, host['ip_address'], host.get('rdp_user'), self.command_output.emit,
+                        name=host['name'], port=pm.get_rdp_port(host), profile=host.get('rdp_profile') or rp.AUTO)
+        worker.finished.connect(lambda result: self.on_rdp_launch_done(worker, result))
+        self.rdp_workers.append(worker)
+        worker.start()
+
+    def on_rdp_launch_done(self, worker, result):
+        success, message = result
+        worker.wait()
+        self.rdp_workers.remove(worker)
         self.log(message)
+        self.update_rdp_sessions()
         if not success:
             QMessageBox.critical(self, "RDP Error", message)
 
+    def launch_rdp_bulk(self):
+        hosts = self.settings.get('hosts', [])
+        if not hosts:
+            QMessageBox.warning(self, "Error", "No hosts configured.")
+            return
+        # Never build the index on the GUI thread here; the picker gets it when the background build finishes
+        self._build_host_search_index()
+        ready = self.host_search_index is not None and self.host_search_index.registry is hosts
+        picker = HostMultiPicker(hosts, self.host_search_index if ready else None, self.status_icons, self.host_status,
+                                 checked=set(self.rdp_bulk_checked), parent=self)
+        self.host_multi_picker = picker
+        try:
+            accepted = picker.exec() == QDialog.DialogCode.Accepted
+        finally:
+            self.host_multi_picker = None
+        if not accepted:
+            return
+        self.rdp_bulk_checked = picker.checked_names()
+        selected = [hosts.get(name) for name in self.rdp_bulk_checked if hosts.get(name) is not None]
+        if not selected:
+            return
+        self._with_tunnels_for(selected, self._launch_rdp_bulk_for)
+
+    def _launch_rdp_bulk_for(self, hosts):
+        self.log(f"Launching RDP for {len(hosts)} host(s)...")
+        self.rdp_bulk_cancel_event.clear()
+        worker = Worker(rm.launch_many, [dict(host) for host in hosts], output_callback=self.command_output.emit,
+                        cancel_event=self.rdp_bulk_cancel_event,
+                        concurrency=int(self.settings.get('rdp_launch_concurrency', rm.DEFAULT_BULK_CONCURRENCY)),
+                        stagger=float(self.settings.get('rdp_launch_stagger', rm.DEFAULT_BULK_STAGGER)),
+                        report_progress=True)
+        worker.progress.connect(self.on_rdp_bulk_progress)
+        worker.finished.connect(lambda results: self.on_rdp_bulk_done(worker, results))
+        self.rdp_workers.append(worker)
+        worker.start()
+
+    def on_rdp_bulk_progress(self, result):
+        name, success, message, seconds = result
+        took = f" ({seconds:.1f} s)" if seconds is not None else ""
+        self.log(f"{name}: {message}{took}" if success else f"{name}: failed: {message}{took}")
+        self.update_rdp_sessions()
+
+    def on_rdp_bulk_done(self, worker, results):
+        worker.wait()
+        self.rdp_workers.remove(worker)
+        self.update_rdp_sessions()
+        failed = [(name, message) for name, success, message, _ in results if not success]
+        times = [seconds for _, success, _, seconds in results if success]
+        average = f", {sum(times) / len(times):.1f} s per launch on average" if times else ""
+        self.log(f"Bulk RDP launch: {len(results) - len(failed)} of {len(results)} hosts launched{average}.")
+        if failed and not self.rdp_bulk_cancel_event.is_set():
+            QMessageBox.warning(self, "RDP Error", f"RDP could not be launched for {len(failed)} host(s):\n" +
+                                "\n".join(f"{name}: {message}" for name, message in failed))
+
+    def update_rdp_sessions(self):
+        sessions = rm.sessions.sessions()
+        limit = f" of {rm.sessions.max_sessions}" if rm.sessions.max_sessions else ""
+        if not sessions:
+            self.rdp_sessions_label.setText(f"RDP sessions: 0{limit}")
+            self.session_timer.stop()
+            return
+        now = time.monotonic()
+        details = ", ".join(f"{session.name} {rm.format_uptime(session.uptime(now))}" for session in sessions)
+        self.rdp_sessions_label.setText(f"RDP sessions: {len(sessions)}{limit} ({details})")
+        if not self.session_timer.isActive():
+            self.session_timer.start(1000)
+
+    def on_rdp_session_ended(self, session, returncode):
+        self.log(f"RDP session to {session.name} closed after {rm.format_uptime(session.uptime())} "
+                 f"(exit code {returncode}).")
+        self.update_rdp_sessions()
+
+    def wake_and_launch(self):
+        host = self.get_selected_host()
+        if not host:
+            QMessageBox.warning(self, "Error", "No host selected.")
+            return
+        self._with_host_tunnels(host, self._start_wake_and_launch)
+
+    def _start_wake_and_launch(self, host):
+        import launch_manager as lm
+        self.log(f"Waking {host['name']} and launching RDP once it is ready...")
+        self.wake_launch_btn.setEnabled(False)
+        self.cancel_wake_launch_btn.show()
+        self.progress_bar.setFormat("Waiting for host: %p%")
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.wake_launch_cancel_event = threading.Event()
+        self.wake_launch_worker = Worker(lm.wake_and_launch, dict(host), cancel_event=self.wake_launch_cancel_event,
+                                         timeout=int(self.settings.get('boot_timeout', lm.DEFAULT_BOOT_TIMEOUT)),
+                                         report_progress=True, **self._wake_options())
+        self.wake_launch_worker.progress.connect(self.on_wake_and_launch_progress)
+        self.wake_launch_worker.finished.connect(self.on_wake_and_launch_done)
+        self.wake_launch_worker.start()
+
+    def cancel_wake_and_launch(self):
+        if self.wake_launch_cancel_event is not None:
+            self.wake_launch_cancel_event.set()
+            self.log("Cancelling wake and connect...")
+
+    def on_wake_and_launch_progress(self, progress):
+        message, elapsed, timeout = progress
+        self.progress_bar.setValue(min(100, int(elapsed / timeout * 100)))
+        self.progress_bar.setFormat(f"{message} {elapsed:.0f}s")
+
+    def on_wake_and_launch_done(self, result):
+        success, message, time_to_desktop = result
+        self.update_rdp_sessions()
+        self.wake_launch_btn.setEnabled(True)
+        self.cancel_wake_launch_btn.hide()
+        self.progress_bar.hide()
+        self.log(message)
+        if not success and not self.wake_launch_cancel_event.is_set():
+            QMessageBox.critical(self, "Wake && Connect Error", message)
+
     def check_for_updates_on_startup(self):
+        import update_manager as um
         self.log("Checking for updates...")
         self.update_worker = Worker(um.check_for_updates)
         self.update_worker.finished.connect(lambda result: self._handle_update_check_result(result, startup_check=True))
         self.update_worker.start()
 
     def check_for_updates_gui(self):
+        import update_manager as um
         self.log("Manually checking for updates...")
-        self.update_worker = Worker(um.check_for_updates)
+        self.update_worker = Worker(um.check_for_updates, max_age=0) # Still a conditional request; 304 when unchanged
         self.update_worker.finished.connect(lambda result: self._handle_update_check_result(result, startup_check=False))
         self.update_worker.start()
 
     def _handle_update_check_result(self, result, startup_check):
+        import update_manager as um
         update_available, latest_version, assets = result
         if update_available:
             self.log(f"Update available! Latest version: {latest_version}")
-            self.assets_for_download = assets # Store assets for later use
+            asset = um.get_appropriate_asset(assets)
+            if asset is None:
+                self.log("No update is published for this operating system.")
+                return
+            executable = inst.get_executable()
+            if executable is not None:
+                self._stage_update_quietly(executable, assets, latest_version, asset)
+                return
             reply = QMessageBox.question(self, "Update Available",
                                        f"A new version ({latest_version}) is available. Do you want to download it now?",
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 self.log("Downloading update...")
+                self.progress_bar.setFormat("Downloading: %p%")
                 self.progress_bar.show()
                 self.progress_bar.setValue(0)
-                self.download_worker = Worker(um.download_asset, um.get_appropriate_asset(assets)['browser_download_url'], 
-                                              os.path.join(os.path.expanduser("~"), um.get_appropriate_asset(assets)['name']), 
-                                              self._update_download_progress_gui)
-                self.download_worker.finished.connect(self._handle_download_finished)
+                download_path = os.path.join(os.path.expanduser("~"), asset['name'])
+                self.download_worker = Worker(um.download_update, assets, latest_version, download_path,
+                                              segments=int(self.settings.get('update_download_segments', 1)),
+                                              cancel_event=self.download_cancel_event, report_progress=True)
+                self.download_worker.progress.connect(self._update_download_progress_gui)
+                self.download_worker.finished.connect(lambda result: self._handle_download_finished(result, download_path))
                 self.download_worker.start()
         else:
             if not startup_check:
                 QMessageBox.information(self, "No Updates", "You are running the latest version.")
             self.log("No updates available.")
 
-    def _update_download_progress_gui(self, downloaded, total):
+    def _stage_update_quietly(self, executable, assets, latest_version, asset):
+        """Packaged builds download and verify the update in the background, then stage it for the next restart"""
+        if inst.staged_version(executable) == latest_version:
+            self._offer_restart(latest_version)
+            return
+        if inst.is_bad_version(executable, latest_version):
+            self.log(f"Skipping {latest_version}: it failed its startup check when it was last installed.")
+            return
+        if self.download_worker is not None and self.download_worker.isRunning():
+            return
+        self.log(f"Downloading {latest_version} in the background...")
+        # Downloaded next to the executable, so staging and the swap are renames within one directory
+        self.download_worker = Worker(self._download_and_stage, executable, assets, latest_version, asset)
+        self.download_worker.finished.connect(lambda result: self._handle_staging_finished(result, latest_version))
+        self.download_worker.start()
+
+    def _download_and_stage(self, executable, assets, latest_version, asset):
+        import update_manager as um
+        # The checksum lookup may fetch a SHA256SUMS asset, so it runs here rather than on the GUI thread
+        expected_sha256 = um.get_asset_checksum(asset, assets)
+        download_path = inst.download_path(executable)
+        success, message = um.download_update(assets, latest_version, download_path,
+                                              cancel_event=self.download_cancel_event,
+                                              segments=int(self.settings.get('update_download_segments', 1)),
+                                              current_path=executable, expected_sha256=expected_sha256)
+        if not success:
+            return False, message
+        self.command_output.emit(f"Update downloaded: {message}")
+        return inst.stage_update(executable, download_path, latest_version, expected_sha256)
+
+    def _handle_staging_finished(self, result, latest_version):
+        success, message = result
+        self.download_worker.wait()
+        self.log(message)
+        if success:
+            self._offer_restart(latest_version)
+
+    def _offer_restart(self, latest_version):
+        reply = QMessageBox.question(self, "Update Ready",
+                                   f"Version {latest_version} is ready. Restart now to use it? "
+                                   "Otherwise it is installed the next time the application starts.",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.restart_requested = True
+            self.close()
+
+    def _update_download_progress_gui(self, progress):
+        import download_manager as dlm
+        downloaded, total, rate, eta = progress
         if total > 0:
-            progress = int((downloaded / total) * 100)
-            self.progress_bar.setValue(progress)
-        else:
-            pass
+            self.progress_bar.setValue(int((downloaded / total) * 100))
+        self.progress_bar.setFormat(f"Downloading: %p% ({dlm.format_progress(downloaded, total, rate, eta)})")
 
-    def _handle_download_finished(self, success, error_message):
+    def _handle_download_finished(self, result, download_path):
+        success, message = result
         self.progress_bar.hide()
 
         if success:
-            # Pass the assets to _handle_download_finished so it doesn't re-call check_for_updates()
-            downloaded_path = os.path.join(os.path.expanduser("~"), um.get_appropriate_asset(self.assets_for_download)['name']) 
-            self.log(f"Update downloaded to {downloaded_path}")
-            reply = QMessageBox.question(self, "Update Ready",
-                                       "Update downloaded. Do you want to install it now and restart the application?",
-                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-            if reply == QMessageBox.StandardButton.Yes:
-                self._perform_self_update(downloaded_path)
-            else:
-                QMessageBox.information(self, "Update Deferred", "Update will be installed on next manual restart.")
+            self.log(f"Update downloaded to {download_path}: {message}")
+            QMessageBox.information(self, "Update Downloaded",
+                                    f"Update downloaded to {download_path}. "
+                                    "Automatic installation is only available for packaged executables.")
         else:
-            QMessageBox.critical(self, "Download Failed", f"Failed to download update: {error_message}")
-            self.log(f"Update download failed: {error_message}")
-
-    def _perform_self_update(self, downloaded_path):
-        current_executable = sys.executable if not getattr(sys, 'frozen', False) else sys.argv[0]
-        
-        if not getattr(sys, 'frozen', False):
-            QMessageBox.information(self, "Self-Update", "Self-update is only available for packaged executables.")
-            return
-
-        if platform.system() == "Windows":
-            updater_script_content = f"""
-@echo off
-setlocal
-
-set "current_exe_path={current_executable}"
-set "downloaded_exe_path={downloaded_path}"
-set "old_exe_path=%current_exe_path%.old"
-
-echo Waiting for application to close...
-taskkill /IM {os.path.basename(current_executable)} /F > NUL 2>&1
-timeout /t 5 /nobreak > NUL
-
-echo Renaming current executable...
-:retry_move
-move /Y "%current_exe_path%" "%old_exe_path%"
-if exist "%current_exe_path%" (
-    echo Failed to rename, retrying in 5 seconds...
-    timeout /t 5 /nobreak > NUL
-    goto retry_move
-)
-
-echo Moving new executable into place...
-move /Y "%downloaded_exe_path%" "%current_exe_path%"
-
-echo Starting new version...
-start "" "%current_exe_path%"
-
-echo Cleaning up...
-del "%old_exe_path%" > NUL 2>&1
-(goto) 2>nul & del "%~f0"
-
-endlocal
-"""
-            updater_script_path = os.path.join(os.path.dirname(current_executable), "update.bat")
-        elif platform.system() == "Darwin": # macOS
-            updater_script_content = f"""
-#!/bin/bash
-# Wait for the current application to fully exit
-sleep 2
-
-# Define paths
-CURRENT_APP="{current_executable}"
-DOWNLOADED_APP="{downloaded_path}"
-TEMP_APP="${CURRENT_APP}.temp"
-
-# Move the current app to a temporary location
-mv -f "$CURRENT_APP" "$TEMP_APP"
-
-# Move the downloaded app to the current app's location
-mv -f "$DOWNLOADED_APP" "$CURRENT_APP"
-
-# Make the new app executable
-chmod +x "$CURRENT_APP"
-
-# Start the new application in the background and detach from the shell
-nohup "$CURRENT_APP" > /dev/null 2>&1 &
-
-# Clean up the temporary old app and this script
-rm -f "$TEMP_APP"
-rm -- "$0"
-
-exit 0
-"""
-            updater_script_path = os.path.join(os.path.dirname(current_executable), "update.sh")
-            os.chmod(updater_script_path, 0o755) # Make executable
-        else: # Linux
-            updater_script_content = f"""
-#!/bin/bash
-sleep 5
-mv -f "{downloaded_path}" "{current_executable}"
-chmod +x "{current_executable}"
-exec "{current_executable}" &
-rm -- "$0"
-"""
-            updater_script_path = os.path.join(os.path.dirname(current_executable), "update.sh")
-            os.chmod(updater_script_path, 0o755) # Make executable
-
-        with open(updater_script_path, "w") as f:
-            f.write(updater_script_content)
-
-        self.log(f"Executing update script: {updater_script_path}")
-        
-        try:
-            if platform.system() == "Windows":
-                subprocess.Popen([updater_script_path], shell=True, creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP)
-            else: # Linux and macOS
-                subprocess.Popen([updater_script_path], shell=True, preexec_fn=os.setsid)
-        except Exception as e:
-            self.log(f"Error launching updater script: {e}")
-            QMessageBox.critical(self, "Update Error", f"Failed to launch updater script: {e}")
-        
-        QApplication.instance().quit() # Close the current application
+            QMessageBox.critical(self, "Download Failed", f"Failed to download update: {message}")
+            self.log(f"Update download failed: {message}")
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # A staged update is swapped in before anything else starts; once the new version
+    # reports healthy this process exits, otherwise it was rolled back and we carry on
+    profile_startup = '--profile-startup' in sys.argv
+    executable = inst.get_executable()
+    update_message = None
+    if executable is not None and not profile_startup:
+        handed_over, update_message = inst.run_staged_update(executable, sys.argv)
+        if handed_over:
+            sys.exit(0)
+    QApplication.setAttribute(thm.PROPAGATION_ATTRIBUTE) # Theme switches are then a palette swap
+    app = QApplication([arg for arg in sys.argv if arg != '--profile-startup'])
+    startup_mark("create QApplication")
     window = App()
+    window.profile_startup = profile_startup
+    if update_message:
+        window.log(update_message)
     window.show()
-    sys.exit(app.exec())
+    QTimer.singleShot(inst.HEALTHY_AFTER * 1000, inst.report_healthy)
+    exit_code = app.exec()
+    if profile_startup:
+        sys.exit(0 if window.startup_ms is not None and window.startup_ms <= STARTUP_BUDGET_MS else 1)
+    if window.restart_requested:
+        handed_over, update_message = inst.run_staged_update(executable, sys.argv)
+        if not handed_over: # Rolled back; start the previous version again
+            if update_message:
+                print(update_message)
+            os.execve(executable, sys.argv, inst.child_environment())
+    sys.exit(exit_code)
@@ -0,0 +1,126 @@
+import socket
+import time
+
+import wireguard_config as wgc
+
+# wg-quick features this backend does not reproduce; configs using them keep going through wg-quick
+UNSUPPORTED_KEYS = ('dns', 'table', 'preup', 'postup', 'predown', 'postdown', 'saveconfig')
+
+_pyroute2 = None # (IPRoute, WireGuard) once loaded, or () if pyroute2 is not installed
+
+def _load_pyroute2():
+    # Imported on first use rather than with this module, so pyroute2 stays out of startup
+    global _pyroute2
+    if _pyroute2 is None:
+        try:
+            from pyroute2 import IPRoute, WireGuard
+            _pyroute2 = (IPRoute, WireGuard)
+        except ImportError: # Optional; without it every tunnel goes through wg-quick
+            _pyroute2 = ()
+    return _pyroute2
+
+def is_available():
+    return bool(_load_pyroute2())
+
+def unsupported_reason(config):
+    """Why `config` needs wg-quick, or None if it can be brought up over netlink.
+
+    Default routes (/0 AllowedIPs) need wg-quick's fwmark policy routing, and
+    DNS and hook scripts are wg-quick features rather than kernel settings.
+    """
+    for key in UNSUPPORTED_KEYS:
+        if key in config.interface:
+            return f"{key} is handled by wg-quick"
+    if any(network.prefixlen == 0 for network in config.allowed_ips()):
+        return "default routes are handled by wg-quick"
+    return None
+
+def _resolve_endpoint(endpoint):
+    host, port = wgc.parse_endpoint(endpoint)
+    sockaddr = socket.getaddrinfo(host, port, proto=socket.IPPROTO_UDP)[0][4]
+    return sockaddr[0], port
+
+def bring_up(config, ipr=None, wg=None):
+    """Create and configure the interface for `config` over rtnetlink and genetlink.
+
+    ipr and wg default to pyroute2's IPRoute and WireGuard sockets; tests
+    can pass stand-ins. On failure the half-built interface is removed and
+    the exception is re-raised.
+    """
+    own_ipr, own_wg = ipr is None, wg is None
+    if own_ipr or own_wg:
+        IPRoute, WireGuard = _load_pyroute2()
+        ipr = ipr or IPRoute()
+        wg = wg or WireGuard()
+    name = config.name
+    try:
+        ipr.link('add', ifname=name, kind='wireguard')
+        try:
+            index = ipr.link_lookup(ifname=name)[0]
+            for address in config.interface.get('address', []):
+                ipr.addr('add', index=index, address=str(address.ip), prefixlen=address.network.prefixlen)
+            wg.set(name, private_key=config.interface['privatekey'],
+                   listen_port=config.interface.get('listenport'), fwmark=config.interface.get('fwmark') or None)
+            for peer in config.peers:
+                wg_peer = {'public_key': peer['publickey'],
+                           'allowed_ips': [str(network) for network in peer.get('allowedips', [])]}
+                if 'presharedkey' in peer:
+                    wg_peer['preshared_key'] = peer['presharedkey']
+                if peer.get('persistentkeepalive'):
+                    wg_peer['persistent_keepalive'] = peer['persistentkeepalive']
+                if 'endpoint' in peer:
+                    wg_peer['endpoint_addr'], wg_peer['endpoint_port'] = _resolve_endpoint(peer['endpoint'])
+                wg.set(name, peer=wg_peer)
+            ipr.link('set', index=index, mtu=config.interface.get('mtu', 1420), state='up')
+            for network in config.allowed_ips():
+                ipr.route('replace', dst=str(network), oif=index)
+        except BaseException:
+            ipr.link('del', ifname=name)
+            raise
+    finally:
+        if own_ipr:
+            ipr.close()
+        if own_wg:
+            wg.close()
+
+def tear_down(name, ipr=None):
+    """Delete the interface; its addresses and routes go with it"""
+    own_ipr = ipr is None
+    if own_ipr:
+        ipr = _load_pyroute2()[0]()
+    try:
+        ipr.link('del', ifname=name)
+    finally:
+        if own_ipr:
+            ipr.close()
+
+if __name__ == "__main__":
+    # Toggle latency against wg-quick (needs root and a WireGuard kernel module):
+    #     python netlink_backend.py /etc/wireguard/wg-test.conf [toggles]
+    import subprocess
+    import sys
+
+    if len(sys.argv) < 2 or not is_available():
+        sys.exit("usage: python netlink_backend.py CONFIG [TOGGLES]  (requires pyroute2)")
+    config = wgc.load_config(sys.argv[1])
+    toggles = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    reason = unsupported_reason(config)
+    if reason:
+        sys.exit(f"{config.name} cannot use the netlink backend: {reason}")
+
+    def timed(up, down):
+        samples = []
+        for _ in range(toggles):
+            start = time.perf_counter()
+            up()
+            down()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2], samples[-1]
+
+    quick = timed(lambda: subprocess.run(["wg-quick", "up", sys.argv[1]], check=True, capture_output=True),
+                  lambda: subprocess.run(["wg-quick", "down", sys.argv[1]], check=True, capture_output=True))
+    netlink = timed(lambda: bring_up(config), lambda: tear_down(config.name))
+    print(f"{toggles} up/down toggles of {config.name}")
+    print(f"  wg-quick: median {quick[0]:.0f} ms, max {quick[1]:.0f} ms")
+    print(f"  netlink:  median {netlink[0]:.1f} ms, max {netlink[1]:.1f} ms")
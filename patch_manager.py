@@ -0,0 +1,114 @@
+import hashlib
+import heapq
+import os
+import re
+
+try:
+    import zstandard
+except ImportError: # Optional; without it .zst patches are ignored
+    zstandard = None
+try:
+    import bsdiff4
+except ImportError: # Optional; without it .bsdiff patches are ignored
+    bsdiff4 = None
+
+# Patch assets are named '<full asset name>.<from tag>_to_<to tag>.<format>', e.g.
+# 'UniversalVPNTool.exe.v1.0.7_to_v1.0.8.zst'. 'zst' patches are made with `zstd --patch-from=OLD NEW`
+# and 'bsdiff' patches with bsdiff4; a release may carry patches from several earlier versions.
+PATCH_SUFFIX = re.compile(r'^(?P<source>[^_]+)_to_(?P<target>[^_]+)\.(?P<format>zst|bsdiff)$')
+MAX_WINDOW = 1 << 31 # zstd patches reference the whole old binary, so they need a window as large as it
+HASH_BLOCK = 1024 * 1024
+
+class PatchError(Exception):
+    pass
+
+class PatchStep:
+    __slots__ = ('asset', 'source', 'target', 'format', 'size')
+
+    def __init__(self, asset, source, target, patch_format):
+        self.asset = asset
+        self.source = source
+        self.target = target
+        self.format = patch_format
+        self.size = asset.get('size') or 0
+
+    def __repr__(self):
+        return f"PatchStep({self.source} -> {self.target}, {self.format}, {self.size} bytes)"
+
+def supported_formats():
+    return {name for name, module in (('zst', zstandard), ('bsdiff', bsdiff4)) if module is not None}
+
+def find_patches(releases, asset_name):
+    """Every usable patch for asset_name across releases, as PatchSteps"""
+    formats = supported_formats()
+    steps = []
+    for release in releases:
+        for asset in release.get('assets', []):
+            if not asset['name'].startswith(asset_name + '.'):
+                continue
+            match = PATCH_SUFFIX.match(asset['name'][len(asset_name) + 1:])
+            if match and match['format'] in formats:
+                steps.append(PatchStep(asset, match['source'], match['target'], match['format']))
+    return steps
+
+def plan_chain(steps, current, latest):
+    """Cheapest list of PatchSteps from version current to latest by total download size, or None"""
+    edges = {}
+    for step in steps:
+        edges.setdefault(step.source, []).append(step)
+    best = {current: 0}
+    queue = [(0, 0, current, [])]
+    counter = 1 # Tie-breaker so heapq never compares the step lists
+    while queue:
+        cost, _, version, path = heapq.heappop(queue)
+        if version == latest:
+            return path
+        if cost > best.get(version, cost):
+            continue
+        for step in edges.get(version, []):
+            total = cost + step.size
+            if total < best.get(step.target, float('inf')):
+                best[step.target] = total
+                heapq.heappush(queue, (total, counter, step.target, path + [step]))
+                counter += 1
+    return None
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+class _HashingWriter:
+    """File wrapper that hashes what is written, so the output is verified without reading it back"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.f.write(data)
+
+def apply_patch(source_path, patch_path, output_path, patch_format):
+    """Write the patched file to output_path and return its SHA-256 hex digest.
+
+    zstd patches are decoded as a stream with the old binary as the
+    dictionary; bsdiff4 needs old, new and patch in memory at once.
+    """
+    try:
+        if patch_format == 'zst':
+            with open(source_path, 'rb') as f:
+                dictionary = zstandard.ZstdCompressionDict(f.read(), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary, max_window_size=MAX_WINDOW)
+            with open(patch_path, 'rb') as patch, open(output_path, 'wb') as output:
+                writer = _HashingWriter(output)
+                decompressor.copy_stream(patch, writer)
+            return writer.sha256.hexdigest()
+        if patch_format == 'bsdiff':
+            bsdiff4.file_patch(source_path, output_path, patch_path)
+            return file_sha256(output_path)
+    except (zstandard.ZstdError if zstandard else (), ValueError) as e:
+        raise PatchError(f"Could not apply {os.path.basename(patch_path)}: {e}") from None
+    raise PatchError(f"Unsupported patch format {patch_format!r}")
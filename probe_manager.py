@@ -0,0 +1,113 @@
+import platform
+import socket
+import time
+
+DEFAULT_RDP_PORT = 3389
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_CONCURRENCY = 400 # Stays well below the common 1024 open-file limit
+
+STATUS_UP = "up"          # RDP port accepted the connection
+STATUS_NO_RDP = "no-rdp"  # Host answered, but nothing is listening on the RDP port
+STATUS_DOWN = "down"      # No answer at all
+
+ARP_CACHE_TTL = 1.0
+ARP_TABLE = '/proc/net/arp'
+
+def get_rdp_port(host):
+    try:
+        return int(host.get('rdp_port') or DEFAULT_RDP_PORT)
+    except (TypeError, ValueError):
+        return DEFAULT_RDP_PORT
+
+def parse_arp_table(lines):
+    """IPs with a resolved entry in the lines of /proc/net/arp, header included"""
+    entries = set()
+    for line in lines[1:]:
+        parts = line.split()
+        # Flags 0x0 means the ARP request went unanswered
+        if len(parts) >= 4 and parts[2] != '0x0' and parts[3] != '00:00:00:00:00:00':
+            entries.add(parts[0])
+    return entries
+
+def read_arp_table():
+    """Return the IPs that currently have a resolved neighbour entry (Linux only)"""
+    if platform.system() != "Linux":
+        return set()
+    try:
+        with open(ARP_TABLE, 'r') as f:
+            return parse_arp_table(f.readlines())
+    except OSError:
+        return set()
+
+def probe_host(ip_address, port=DEFAULT_RDP_PORT, timeout=DEFAULT_TIMEOUT):
+    """Blocking single-host probe. Returns (status, latency_ms)"""
+    start = time.perf_counter()
+    try:
+        with socket.create_connection((ip_address, port), timeout=timeout):
+            return STATUS_UP, (time.perf_counter() - start) * 1000
+    except ConnectionRefusedError:
+        return STATUS_NO_RDP, (time.perf_counter() - start) * 1000
+    except OSError:
+        if ip_address in read_arp_table():
+            return STATUS_NO_RDP, None
+        return STATUS_DOWN, None
+
+# asyncio is imported where a sweep needs it: the window uses this module's constants
+# before its first paint, but sweeps only run after it
+async def _probe_tcp(ip_address, port, timeout):
+    import asyncio
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip_address, port), timeout)
+    except ConnectionRefusedError:
+        return STATUS_NO_RDP, (time.perf_counter() - start) * 1000
+    except (asyncio.TimeoutError, OSError):
+        return STATUS_DOWN, None
+    latency = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return STATUS_UP, latency
+
+async def _probe_all(targets, progress_callback, concurrency, timeout, stop_event):
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+    arp = {'entries': set(), 'read_at': 0.0}
+
+    def arp_entries():
+        now = time.monotonic()
+        if now - arp['read_at'] > ARP_CACHE_TTL:
+            arp['entries'] = read_arp_table()
+            arp['read_at'] = now
+        return arp['entries']
+
+    async def run(name, ip_address, port):
+        async with semaphore:
+            if stop_event is not None and stop_event.is_set():
+                return
+            status, latency = await _probe_tcp(ip_address, port, timeout)
+        # A timed out TCP probe can still mean the host is up behind a firewall
+        if status == STATUS_DOWN and ip_address in arp_entries():
+            status = STATUS_NO_RDP
+        results[name] = (status, latency)
+        if progress_callback:
+            progress_callback((name, status, latency))
+
+    await asyncio.gather(*(run(*target) for target in targets))
+    return results
+
+def probe_hosts(hosts, progress_callback=None, concurrency=DEFAULT_CONCURRENCY,
+                timeout=DEFAULT_TIMEOUT, stop_event=None):
+    """Probe the RDP port of every host concurrently.
+
+    progress_callback receives (name, status, latency_ms) as each probe completes.
+    Returns a dict mapping host name to (status, latency_ms).
+    """
+    targets = [(h['name'], h['ip_address'], get_rdp_port(h)) for h in hosts if h.get('ip_address')]
+    if not targets:
+        return {}
+    import asyncio
+    return asyncio.run(_probe_all(targets, progress_callback, concurrency, timeout, stop_event))
@@ -1,23 +1,191 @@
-import subprocess
 import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import command_runner as cr
+import probe_manager as pm
+import rdp_profiles as rp
+
+DEFAULT_MAX_SESSIONS = 8
+REAP_INTERVAL = 1.0 # Seconds between checks for exited RDP clients
+FOCUS_TIMEOUT = 5
+DEFAULT_BULK_CONCURRENCY = 4 # Launches (link measurement + client start) in flight at once
+DEFAULT_BULK_STAGGER = 0.5 # Seconds between client starts, so they do not all initialise at the same moment
+
+class RdpSession:
+    __slots__ = ('key', 'name', 'process', 'started')
+
+    def __init__(self, key, name, process):
+        self.key = key
+        self.name = name
+        self.process = process
+        self.started = time.monotonic()
+
+    def uptime(self, now=None):
+        return (now or time.monotonic()) - self.started
+
+class SessionRegistry:
+    """Running RDP clients keyed by host, so a host never gets a second window.
+
+    A background thread polls the clients (which also reaps them) while any
+    are running and calls on_exit(session, returncode) from that thread when
+    one closes. At most max_sessions clients run at once.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.on_exit = None
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def get(self, key):
+        with self._lock:
+            session = self._sessions.get(key)
+        if session is not None and session.process.poll() is not None:
+            self.reap()
+            return None
+        return session
+
+    def sessions(self):
+        """Running sessions, oldest first"""
+        with self._lock:
+            return sorted(self._sessions.values(), key=lambda session: session.started)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def has_room(self):
+        return not self.max_sessions or len(self) < self.max_sessions
+
+    def add(self, key, name, process):
+        session = RdpSession(key, name, process)
+        with self._lock:
+            self._sessions[key] = session
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+                self._reaper.start()
+        return session
+
+    def reap(self):
+        """Drop sessions whose client has exited; returns [(session, returncode)]"""
+        with self._lock:
+            ended = [(session, session.process.poll()) for session in self._sessions.values()]
+            ended = [(session, code) for session, code in ended if code is not None]
+            for session, _ in ended:
+                del self._sessions[session.key]
+        for session, code in ended:
+            if self.on_exit:
+                self.on_exit(session, code)
+        return ended
 
-def launch_rdp(ip_address, username=None):
+    def _reap_loop(self):
+        while True:
+            time.sleep(REAP_INTERVAL)
+            self.reap()
+            with self._lock:
+                if not self._sessions:
+                    self._reaper = None
+                    return
+
+sessions = SessionRegistry()
+_launch_lock = threading.Lock() # Makes the duplicate check, the cap check and the spawn one step
+
+def focus_session(session):
+    """Bring an existing client window to the front; returns True if that worked"""
     system = platform.system()
+    if system == "Windows":
+        cmd = ['powershell', '-NoProfile', '-Command',
+               f"exit -not (New-Object -ComObject WScript.Shell).AppActivate({session.process.pid})"]
+    elif system == "Linux":
+        cmd = ['xdotool', 'search', '--pid', str(session.process.pid), 'windowactivate']
+    else:
+        return False
     try:
-        if system == "Windows":
-            cmd = ['mstsc.exe', f'/v:{ip_address}']
-            if username:
-                cmd.extend(['/prompt'])
-        elif system == "Linux":
-            cmd = ['xfreerdp', f'/v:{ip_address}']
-            if username:
-                cmd.extend([f'/u:{username}'])
-        else:
+        return cr.run_command(cmd, timeout=FOCUS_TIMEOUT).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def launch_rdp(ip_address, username=None, output_callback=None, name=None, port=pm.DEFAULT_RDP_PORT,
+               profile=rp.AUTO):
+    """Launch an RDP client for a host, or bring its running client to the front.
+
+    Clients are tracked in `sessions` by IP address; name is only used in
+    messages. Fails when sessions.max_sessions clients are already running.
+    The client is tuned with `profile`; 'auto' measures the link first,
+    which blocks for up to a few seconds.
+    """
+    name = name or ip_address
+    session = sessions.get(ip_address)
+    if session is not None:
+        if focus_session(session):
+            return True, f"RDP session to {name} is already open; brought it to the front."
+        return True, f"RDP session to {name} is already open."
+    if not sessions.has_room():
+        return False, f"Already {len(sessions)} RDP session(s) open (limit {sessions.max_sessions}); close one first."
+
+    system = platform.system()
+    try:
+        profile_name, quality = rp.resolve_profile(ip_address, port, profile)
+        cmd = rp.build_command(ip_address, username, profile_name, port, system)
+        if cmd is None:
             return False, f"Unsupported OS: {system}"
-        
-        subprocess.Popen(cmd)
-        return True, f"RDP client launched for {ip_address}"
+        if output_callback:
+            measured = f" ({quality})" if quality is not None else ""
+            output_callback(f"[profile] {name}: {profile_name}{measured}")
+
+        with _launch_lock: # Another launch may have started a client while the link was measured
+            if sessions.get(ip_address) is not None:
+                return True, f"RDP session to {name} is already open."
+            if not sessions.has_room():
+                return False, f"Already {len(sessions)} RDP session(s) open (limit {sessions.max_sessions}); close one first."
+            sessions.add(ip_address, name, cr.start_command(cmd, output_callback))
+        return True, f"RDP client launched for {ip_address} with the {profile_name} profile"
     except FileNotFoundError:
         return False, "RDP client (mstsc.exe or xfreerdp) not found."
+    except KeyError as e: # Unknown profile name
+        return False, e.args[0]
     except Exception as e:
         return False, str(e)
+
+def launch_many(hosts, progress_callback=None, output_callback=None, cancel_event=None,
+                concurrency=DEFAULT_BULK_CONCURRENCY, stagger=DEFAULT_BULK_STAGGER):
+    """Launch RDP for several hosts, at most `concurrency` at a time and `stagger` seconds apart.
+
+    progress_callback receives (name, success, message, seconds) as each
+    launch finishes, where seconds is how long that launch took. Returns
+    the same tuples in the order of `hosts`.
+    """
+    start = time.monotonic()
+
+    def launch(item):
+        position, host = item
+        delay = start + position * stagger - time.monotonic()
+        if cancel_event is not None:
+            cancel_event.wait(max(0.0, delay))
+        elif delay > 0:
+            time.sleep(delay)
+        if cancel_event is not None and cancel_event.is_set():
+            result = (host['name'], False, "Launch cancelled.", None)
+        else:
+            launch_start = time.monotonic()
+            success, message = launch_rdp(host['ip_address'], host.get('rdp_user'), output_callback, name=host['name'],
+                                          port=pm.get_rdp_port(host), profile=host.get('rdp_profile') or rp.AUTO)
+            result = (host['name'], success, message, time.monotonic() - launch_start)
+        if progress_callback:
+            progress_callback(result)
+        return result
+
+    if not hosts:
+        return []
+    # Tasks start in submission order, so the stagger holds even when the pool is saturated
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(hosts)))) as executor:
+        return list(executor.map(launch, enumerate(hosts)))
+
+def format_uptime(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
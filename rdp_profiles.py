@@ -0,0 +1,153 @@
+import os
+import platform
+import statistics
+import time
+
+import probe_manager as pm
+
+AUTO = "auto"
+RDP_FILES_DIR = 'rdp_files' # Generated .rdp files for mstsc, one per host
+MEASURE_SAMPLES = 5
+MEASURE_TIMEOUT = 1.0
+MEASURE_TTL = 300 # Seconds a link measurement is reused before the next launch measures again
+
+# Client settings per link class. gfx is the graphics pipeline codec ('avc444', 'avc420', 'rfx', or None
+# for plain bitmap updates); network is the connection type hint the server tunes its encoder for.
+PROFILES = {
+    'lan': {'gfx': 'avc444', 'color_depth': 32, 'compression': False, 'network': 'lan',
+            'wallpaper': True, 'themes': True, 'font_smoothing': True, 'animations': True},
+    'broadband': {'gfx': 'avc420', 'color_depth': 32, 'compression': True, 'network': 'broadband-high',
+                  'wallpaper': False, 'themes': True, 'font_smoothing': True, 'animations': False},
+    'wan': {'gfx': 'avc420', 'color_depth': 24, 'compression': True, 'network': 'broadband-low',
+            'wallpaper': False, 'themes': False, 'font_smoothing': False, 'animations': False},
+    'slow': {'gfx': None, 'color_depth': 16, 'compression': True, 'network': 'modem',
+             'wallpaper': False, 'themes': False, 'font_smoothing': False, 'animations': False},
+}
+DEFAULT_PROFILE = 'broadband' # Used when the link cannot be measured
+
+# (profile, highest median RTT in ms, highest loss fraction), checked in order. One lost connect out of
+# MEASURE_SAMPLES is noise rather than a lossy link: a dropped SYN is only resent after MEASURE_TIMEOUT.
+THRESHOLDS = (('lan', 5, 0.2), ('broadband', 40, 0.2), ('wan', 150, 0.4))
+
+# mstsc "connection type" values for each network hint
+_CONNECTION_TYPES = {'modem': 1, 'broadband-low': 2, 'satellite': 3, 'broadband-high': 4, 'wan': 5, 'lan': 6}
+
+_measurements = {} # (ip, port) -> (time.monotonic(), LinkQuality)
+_command_cache = {} # ip -> (signature, command)
+
+class LinkQuality:
+    __slots__ = ('rtt', 'jitter', 'loss')
+
+    def __init__(self, rtt, jitter, loss):
+        self.rtt = rtt # Median TCP connect time in ms, or None if nothing answered
+        self.jitter = jitter
+        self.loss = loss # Fraction of probes that got no answer
+
+    def __str__(self):
+        if self.rtt is None:
+            return "no answer"
+        return f"RTT {self.rtt:.0f} ms ±{self.jitter:.0f}, {self.loss:.0%} loss"
+
+def measure_link(ip_address, port=pm.DEFAULT_RDP_PORT, samples=MEASURE_SAMPLES, max_age=MEASURE_TTL):
+    """Measure the path to a host with a few TCP connects to its RDP port.
+
+    Connect time is one round trip through the tunnel, so its median and
+    spread stand in for RTT and jitter. Results are reused for max_age seconds.
+    """
+    cached = _measurements.get((ip_address, port))
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+    latencies = [pm.probe_host(ip_address, port, MEASURE_TIMEOUT)[1] for _ in range(samples)]
+    answered = [latency for latency in latencies if latency is not None]
+    if answered:
+        quality = LinkQuality(statistics.median(answered), max(answered) - min(answered),
+                              (samples - len(answered)) / samples)
+    else:
+        quality = LinkQuality(None, None, 1.0)
+    _measurements[(ip_address, port)] = (time.monotonic(), quality)
+    return quality
+
+def choose_profile(quality):
+    if quality.rtt is None:
+        return DEFAULT_PROFILE
+    for name, max_rtt, max_loss in THRESHOLDS:
+        if quality.rtt + quality.jitter / 2 <= max_rtt and quality.loss <= max_loss:
+            return name
+    return 'slow'
+
+def _xfreerdp_args(address, username, profile):
+    cmd = ['xfreerdp', f'/v:{address}']
+    if username:
+        cmd.append(f'/u:{username}')
+    if profile['gfx'] == 'rfx':
+        cmd.append('/rfx')
+    elif profile['gfx']:
+        cmd.append(f"/gfx:{profile['gfx'].upper()}")
+    cmd.append(f"/bpp:{profile['color_depth']}")
+    cmd.append(f"/network:{profile['network']}")
+    cmd.append('+compression' if profile['compression'] else '-compression')
+    cmd.extend(['+bitmap-cache', '+glyph-cache', '+offscreen-cache'])
+    for flag, key in (('wallpaper', 'wallpaper'), ('themes', 'themes'), ('fonts', 'font_smoothing'),
+                      ('menu-anims', 'animations'), ('window-drag', 'animations')):
+        cmd.append(('+' if profile[key] else '-') + flag)
+    return cmd
+
+def _rdp_file_text(address, username, profile):
+    lines = [
+        f"full address:s:{address}",
+        f"session bpp:i:{profile['color_depth']}",
+        f"connection type:i:{_CONNECTION_TYPES[profile['network']]}",
+        "networkautodetect:i:0",
+        "bandwidthautodetect:i:1",
+        f"compression:i:{int(profile['compression'])}",
+        "bitmapcachepersistenable:i:1",
+        f"disable wallpaper:i:{int(not profile['wallpaper'])}",
+        f"disable themes:i:{int(not profile['themes'])}",
+        f"allow font smoothing:i:{int(profile['font_smoothing'])}",
+        f"disable menu anims:i:{int(not profile['animations'])}",
+        f"disable full window drag:i:{int(not profile['animations'])}",
+        f"allow desktop composition:i:{int(profile['gfx'] == 'avc444')}",
+    ]
+    if username:
+        lines += [f"username:s:{username}", "prompt for credentials:i:1"]
+    return "\n".join(lines) + "\n"
+
+def _write_rdp_file(ip_address, text):
+    os.makedirs(RDP_FILES_DIR, exist_ok=True)
+    path = os.path.abspath(os.path.join(RDP_FILES_DIR, f"{ip_address.replace(':', '_')}.rdp"))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+    return path
+
+def build_command(ip_address, username, profile_name, port=pm.DEFAULT_RDP_PORT, system=None):
+    """Client command line for a host with the named profile, or None on an unsupported OS.
+
+    On Windows this points mstsc at a generated .rdp file. Commands (and
+    .rdp files) are cached per host and rebuilt only when an input changes.
+    """
+    system = system or platform.system()
+    profile = PROFILES[profile_name]
+    signature = (system, ip_address, port, username, profile_name, tuple(sorted(profile.items())))
+    cached = _command_cache.get(ip_address)
+    if cached is not None and cached[0] == signature and (system != "Windows" or os.path.exists(cached[1][1])):
+        return cached[1]
+    address = ip_address if port == pm.DEFAULT_RDP_PORT else f"{ip_address}:{port}"
+    if system == "Windows":
+        cmd = ['mstsc.exe', _write_rdp_file(ip_address, _rdp_file_text(address, username, profile))]
+    elif system == "Linux":
+        cmd = _xfreerdp_args(address, username, profile)
+    else:
+        return None
+    _command_cache[ip_address] = (signature, cmd)
+    return cmd
+
+def resolve_profile(ip_address, port=pm.DEFAULT_RDP_PORT, requested=AUTO):
+    """(profile name, LinkQuality or None): the requested profile, or with 'auto' the one the link calls for"""
+    if requested and requested != AUTO:
+        if requested not in PROFILES:
+            raise KeyError(f"Unknown RDP profile {requested!r}; choose one of {', '.join(PROFILES)} or {AUTO}")
+        return requested, None
+    quality = measure_link(ip_address, port)
+    return choose_profile(quality), quality
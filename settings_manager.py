@@ -1,14 +1,320 @@
 import json
 import os
+import sqlite3
+from contextlib import closing
 
-CONFIG_FILE = 'config.json'
+import install_manager as inst
+from host_registry import CORE_FIELDS, HostRecord, HostRegistry
 
-def load_settings():
-    if not os.path.exists(CONFIG_FILE):
-        return {'wireguard_config_path': '', 'hosts': []}
+# Settings live next to the packaged executable (or main.py when running from source),
+# never in the working directory, so starting the app from a shortcut finds the same files
+APP_DIR = os.path.dirname(inst.get_executable() or os.path.abspath(__file__))
+
+def settings_path(filename):
+    return os.path.join(APP_DIR, filename)
+
+CONFIG_FILE = settings_path('config.json')     # Imported whenever it is newer than the last import
+DATABASE_FILE = settings_path('config.db')
+
+DEFAULT_SETTINGS = {'wireguard_config_path': ''}
+HOST_BATCH = 2000 # Hosts read per batch when loading is spread over the event loop
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS hosts (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        ip_address TEXT,
+        mac_address TEXT,
+        rdp_user TEXT,
+        extra TEXT
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_journal = None # Host changes since the last save, for the registry handed out by load_settings
+_saved_values = {} # Non-host settings as last written, JSON encoded, so only changed keys are saved
+_pending_hosts = None # (last row id read, last row id to read) while load_settings held hosts back
+
+class _HostJournal:
+    """Tracks which hosts changed since the last save, keyed by their database row id"""
+
+    def __init__(self, registry, ids):
+        self.registry = registry
+        self.ids = ids # record -> row id
+        self.dirty = set()
+        self.removed = set()
+        registry.subscribe(self._on_change)
+
+    def _on_change(self, action, record):
+        if action == 'remove':
+            self.dirty.discard(record)
+            row_id = self.ids.pop(record, None)
+            if row_id is not None:
+                self.removed.add(row_id)
+        else:
+            self.dirty.add(record)
+
+def _connect():
+    conn = sqlite3.connect(DATABASE_FILE)
+    # WAL keeps the previous state readable until a commit lands, so a crash never corrupts the file
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def _host_row(record):
+    return (record.name, record.ip_address, record.mac_address, record.rdp_user,
+            json.dumps(record.extra) if record.extra else None)
+
+def _host_records(rows):
+    # Rows stream from the cursor straight into compact records, no intermediate dicts
+    for row_id, name, ip_address, mac_address, rdp_user, extra in rows:
+        yield row_id, HostRecord(name, ip_address or '', mac_address or '', rdp_user or '',
+                                 json.loads(extra) if extra else None)
+
+def _get_meta(conn, key):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+def _set_meta(conn, key, value):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+def _write_all_hosts(conn, registry):
+    conn.execute('DELETE FROM hosts')
+    ids = {}
+    for record in registry:
+        cursor = conn.execute('INSERT INTO hosts (name, ip_address, mac_address, rdp_user, extra) VALUES (?, ?, ?, ?, ?)',
+                              _host_row(record))
+        ids[record] = cursor.lastrowid
+    _set_meta(conn, 'rejected_hosts', json.dumps(registry.rejected))
+    return ids
+
+def _import_config_json(conn):
+    """Replace the stored settings with the contents of config.json; keys missing from it are dropped"""
     with open(CONFIG_FILE, 'r') as f:
-        return json.load(f)
+        settings = json.load(f)
+    registry = HostRegistry.from_dicts(settings.pop('hosts', []))
+    with conn:
+        conn.execute('DELETE FROM settings')
+        conn.executemany('INSERT INTO settings (key, value) VALUES (?, ?)',
+                         [(key, json.dumps(value)) for key, value in settings.items()])
+        _write_all_hosts(conn, registry)
+        _set_meta(conn, 'config_json_mtime', repr(os.path.getmtime(CONFIG_FILE)))
+
+def config_json_is_newer(conn=None):
+    """True if config.json changed since it was last imported"""
+    if not os.path.exists(CONFIG_FILE):
+        return False
+    if conn is None:
+        with closing(_connect()) as conn:
+            return config_json_is_newer(conn)
+    imported = _get_meta(conn, 'config_json_mtime')
+    return imported is None or os.path.getmtime(CONFIG_FILE) > float(imported)
+
+def load_settings(first_batch=None):
+    """Settings with the hosts in a HostRegistry.
+
+    With first_batch, only that many hosts are read; call load_more_hosts
+    for the rest once the window is up.
+    """
+    global _journal, _saved_values, _pending_hosts
+    _pending_hosts = None
+    if not os.path.exists(DATABASE_FILE) and not os.path.exists(CONFIG_FILE):
+        _journal = None
+        _saved_values = {}
+        return dict(DEFAULT_SETTINGS, hosts=HostRegistry())
+
+    with closing(_connect()) as conn:
+        if config_json_is_newer(conn):
+            _import_config_json(conn)
+
+        settings = dict(DEFAULT_SETTINGS)
+        _saved_values = {}
+        for key, value in conn.execute('SELECT key, value FROM settings'):
+            settings[key] = json.loads(value)
+            _saved_values[key] = value
+
+        registry = HostRegistry()
+        ids = {}
+        query = 'SELECT id, name, ip_address, mac_address, rdp_user, extra FROM hosts ORDER BY id'
+        rows = conn.execute(f"{query} LIMIT ?", (first_batch,)) if first_batch else conn.execute(query)
+        row_id = 0
+        for row_id, record in _host_records(rows):
+            try:
+                ids[registry.add(record)] = row_id
+            except ValueError as e:
+                print(f"Skipping host {record.name!r}: {e}")
+                registry.rejected.append(record.to_dict())
+        registry.rejected.extend(json.loads(_get_meta(conn, 'rejected_hosts') or '[]'))
+        if first_batch:
+            # Hosts saved from now on get higher row ids and are already in the registry
+            last_id = conn.execute('SELECT MAX(id) FROM hosts').fetchone()[0]
+            if last_id is not None and last_id > row_id:
+                _pending_hosts = (row_id, last_id)
+
+    _journal = _HostJournal(registry, ids)
+    settings['hosts'] = registry
+    return settings
+
+def has_more_hosts():
+    return _pending_hosts is not None
+
+def load_more_hosts(append, batch=HOST_BATCH):
+    """Read the next batch of the hosts load_settings held back; returns True while more remain.
+
+    append(records) must add records to the registry load_settings returned
+    and return the ones it added; the others clash with hosts added since
+    and are set aside in the registry's `rejected`, as at load time.
+    """
+    global _pending_hosts
+    if _pending_hosts is None or _journal is None:
+        return False
+    after, last = _pending_hosts
+    with closing(_connect()) as conn:
+        loaded = list(_host_records(conn.execute(
+            'SELECT id, name, ip_address, mac_address, rdp_user, extra FROM hosts WHERE id > ? AND id <= ? '
+            'ORDER BY id LIMIT ?', (after, last, batch))))
+    _pending_hosts = (loaded[-1][0], last) if len(loaded) == batch and loaded[-1][0] < last else None
+    added = set(append([record for _, record in loaded]))
+    for row_id, record in loaded:
+        if record in added:
+            _journal.ids[record] = row_id
+            _journal.dirty.discard(record) # Just read, so nothing to write back
+        else:
+            print(f"Skipping host {record.name!r}: it clashes with a host added while loading")
+            _journal.registry.rejected.append(record.to_dict())
+    return _pending_hosts is not None
 
 def save_settings(settings):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(settings, f, indent=4)
+    """Commit changed settings and hosts in a single transaction"""
+    global _journal, _pending_hosts
+    hosts = settings.get('hosts', [])
+    if not isinstance(hosts, HostRegistry):
+        hosts = HostRegistry.from_dicts(hosts)
+
+    with closing(_connect()) as conn, conn:
+        for key, value in settings.items():
+            if key == 'hosts':
+                continue
+            encoded = json.dumps(value)
+            if _saved_values.get(key) != encoded:
+                conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, encoded))
+                _saved_values[key] = encoded
+        for key in [key for key in _saved_values if key not in settings]:
+            conn.execute('DELETE FROM settings WHERE key = ?', (key,))
+            del _saved_values[key]
+
+        if _journal is not None and _journal.registry is hosts:
+            conn.executemany('DELETE FROM hosts WHERE id = ?', [(row_id,) for row_id in _journal.removed])
+            for record in _journal.dirty:
+                row_id = _journal.ids.get(record)
+                if row_id is None:
+                    cursor = conn.execute('INSERT INTO hosts (name, ip_address, mac_address, rdp_user, extra) '
+                                          'VALUES (?, ?, ?, ?, ?)', _host_row(record))
+                    _journal.ids[record] = cursor.lastrowid
+                else:
+                    conn.execute('UPDATE hosts SET name = ?, ip_address = ?, mac_address = ?, rdp_user = ?, extra = ? '
+                                 'WHERE id = ?', _host_row(record) + (row_id,))
+            _journal.dirty.clear()
+            _journal.removed.clear()
+        else:
+            # A registry this module has not seen before: store it wholesale and track it from now on
+            _journal = _HostJournal(hosts, _write_all_hosts(conn, hosts))
+            _pending_hosts = None # Rows held back for the old registry were just replaced
+
+def mark_config_json_imported(mtime):
+    with closing(_connect()) as conn, conn:
+        _set_meta(conn, 'config_json_mtime', repr(mtime))
+
+def diff_settings(settings, new_settings):
+    """Structural diff between the live settings and a freshly parsed config.json.
+
+    Hosts are matched by name; a renamed host shows up as a removal plus an
+    addition. A key missing from a host in the file is reported as None (or
+    '' for the core fields), which HostRegistry.update removes. Settings
+    missing from the file go the same way as on import: keys with a default
+    revert to it, the rest are listed under 'removed_settings'.
+    """
+    registry = settings['hosts']
+    added_hosts = []
+    updated_hosts = {}
+    seen = set()
+    for host in new_settings.get('hosts', []):
+        name = host.get('name')
+        seen.add(name)
+        record = registry.get(name)
+        if record is None:
+            added_hosts.append(host)
+            continue
+        changes = {key: value for key, value in host.items() if record.get(key) != value}
+        for key, value in record.items():
+            if key not in host and value not in ('', None):
+                changes[key] = '' if key in CORE_FIELDS else None
+        if changes:
+            updated_hosts[name] = changes
+    new_values = dict(DEFAULT_SETTINGS, **{key: value for key, value in new_settings.items() if key != 'hosts'})
+    return {
+        'settings': {key: value for key, value in new_values.items() if settings.get(key) != value},
+        'removed_settings': [key for key in settings if key != 'hosts' and key not in new_values],
+        'added_hosts': added_hosts,
+        'updated_hosts': updated_hosts,
+        'removed_hosts': [record.name for record in registry if record.name not in seen]
+    }
+
+def read_config_changes(settings):
+    """Parse config.json and diff it against settings.
+
+    Returns (True, changes) with the file's mtime under 'mtime', or
+    (False, error message) if the file is missing or half written.
+    """
+    try:
+        mtime = os.path.getmtime(CONFIG_FILE)
+        with open(CONFIG_FILE, 'r') as f:
+            new_settings = json.load(f)
+    except (OSError, ValueError) as e:
+        return False, f"Could not read {CONFIG_FILE}: {e}"
+    changes = diff_settings(settings, new_settings)
+    changes['mtime'] = mtime
+    return True, changes
+
+if __name__ == "__main__":
+    # Load/save benchmark against the old whole-file JSON path: python settings_manager.py
+    import tempfile
+    import time
+
+    def timed(func):
+        start = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - start) * 1000
+
+    APP_DIR = tempfile.mkdtemp()
+    CONFIG_FILE = settings_path('config.json')
+    DATABASE_FILE = settings_path('config.db')
+    print(f"{'hosts':>7} | {'json load':>9} {'json save':>9} | {'db import':>9} {'db load':>9} {'db save 1':>9}")
+    for count in (1_000, 10_000, 100_000):
+        for path in (CONFIG_FILE, DATABASE_FILE, DATABASE_FILE + '-wal', DATABASE_FILE + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        data = {'wireguard_config_path': '/etc/wireguard/wg0.conf', 'hosts': [
+            {'name': f"host-{i:06d}", 'ip_address': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+             'mac_address': f"00:16:3e:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+             'rdp_user': 'admin'} for i in range(count)]}
+
+        def json_save():
+            with open(CONFIG_FILE, 'w') as f:
+                json.dump(data, f, indent=4)
+
+        def json_load():
+            # The old load path, including building the registry that the app works on
+            with open(CONFIG_FILE, 'r') as f:
+                return HostRegistry.from_dicts(json.load(f)['hosts'])
+
+        _, json_save_ms = timed(json_save)
+        _, json_load_ms = timed(json_load)
+        _, import_ms = timed(load_settings) # First load imports config.json
+        settings, load_ms = timed(load_settings)
+        settings['hosts'].update(f"host-{count // 2:06d}", {'rdp_user': 'operator'})
+        _, save_ms = timed(lambda: save_settings(settings))
+        print(f"{count:>7} | {json_load_ms:>7.0f}ms {json_save_ms:>7.0f}ms | "
+              f"{import_ms:>7.0f}ms {load_ms:>7.0f}ms {save_ms:>7.1f}ms")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import command_runner as cr # noqa: E402
+
+@pytest.fixture
+def fake_backend():
+    """A FakeBackend installed for the test; the previous backend is restored afterwards"""
+    previous = cr.get_backend()
+    backend = cr.FakeBackend()
+    cr.set_backend(backend)
+    yield backend
+    cr.set_backend(previous)
+
+PRIVATE_KEY = 'yAnz5TF+lXXJte14tji3zlMNq+hd2rYUIgJBgB3fBmk='
+PUBLIC_KEY = 'xTIBA5rboUvnH4htodjb6e697QjLERt1NAB4mZqp8Dg='
+
+@pytest.fixture
+def wg_config(tmp_path):
+    """Path of a valid wg-quick config for tunnel wg0 with one peer at vpn.example.com:51820"""
+    path = tmp_path / 'wg0.conf'
+    path.write_text(f"[Interface]\nPrivateKey = {PRIVATE_KEY}\nAddress = 10.8.0.2/24\n\n"
+                    f"[Peer]\nPublicKey = {PUBLIC_KEY}\nAllowedIPs = 10.8.0.0/24\nEndpoint = vpn.example.com:51820\n")
+    return str(path)
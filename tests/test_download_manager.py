@@ -0,0 +1,147 @@
+import hashlib
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+import download_manager as dm
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, length):
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', '"v1"')
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self._headers(len(DATA))
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        requested = self.headers.get('Range')
+        server.ranges_requested.append(requested)
+        start, end = 0, len(DATA) - 1
+        partial = bool(requested and server.ranges)
+        if partial:
+            match = re.match(r'bytes=(\d+)-(\d*)', requested)
+            start, end = int(match[1]), int(match[2]) if match[2] else end
+        body = DATA[start:end + 1]
+        self.send_response(206 if partial else 200)
+        self._headers(len(body))
+        if partial:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(DATA)}")
+        self.end_headers()
+        if server.drop_after is not None and len(body) > server.drop_after:
+            count, server.drop_after = server.drop_after, None
+            self.wfile.write(body[:count])
+            self.wfile.flush()
+            self.connection.shutdown(2) # Interrupted mid-transfer
+            return
+        for i in range(0, len(body), 64 * 1024):
+            if server.pause is not None:
+                server.pause.wait()
+            self.wfile.write(body[i:i + 64 * 1024])
+
+@pytest.fixture
+def server():
+    """Serves DATA at /asset; drop_after, ranges and pause change how it behaves"""
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.drop_after = None # Close the next response after this many bytes
+    httpd.ranges = True # False: ignore Range and answer 200 with the whole file
+    httpd.pause = None # An Event the response waits on between blocks
+    httpd.ranges_requested = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}/asset"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    if httpd.pause is not None:
+        httpd.pause.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(dm, 'RETRY_DELAY', 0.01)
+    monkeypatch.setattr(dm, 'MIN_SEGMENT', 1024 * 1024)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_download_verifies_checksum(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    assert dm.download(server.url, path, expected_sha256=SHA256) == SHA256
+    assert read(path) == DATA
+    assert not os.path.exists(path + '.part') and not os.path.exists(path + '.part.json')
+
+def test_interrupted_transfer_resumes_with_range(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    server.drop_after = 1_000_000
+    assert dm.download(server.url, path, expected_sha256=SHA256) == SHA256
+    assert read(path) == DATA
+    assert server.ranges_requested[0] is None
+    resumed_from = int(re.match(r'bytes=(\d+)-', server.ranges_requested[1])[1])
+    assert 0 < resumed_from <= 1_000_000
+
+def test_interrupted_segment_resumes_with_range(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    server.drop_after = 500_000
+    assert dm.download(server.url, path, expected_sha256=SHA256, segments=3) == SHA256
+    assert read(path) == DATA
+    starts = [int(re.match(r'bytes=(\d+)-', requested)[1]) for requested in server.ranges_requested]
+    assert len(starts) == 4 # Three segments plus the one that was cut off
+    assert len(set(starts)) == 4 # Resumed past what it had, not from the segment's start
+
+def test_server_ignoring_range_starts_over(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    server.ranges = False
+    server.drop_after = 1_000_000
+    assert dm.download(server.url, path, expected_sha256=SHA256, segments=3) == SHA256
+    assert read(path) == DATA
+    # The resume was answered with 200, so the partial data was thrown away and fetched again whole
+    assert server.ranges_requested[0] is None
+    assert server.ranges_requested[1] is not None
+    assert server.ranges_requested[-1] is None
+
+def test_checksum_mismatch_discards_the_download(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    with pytest.raises(dm.ChecksumMismatch):
+        dm.download(server.url, path, expected_sha256='0' * 64)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + '.part') and not os.path.exists(path + '.part.json')
+
+def test_cancelled_download_resumes_later(server, tmp_path):
+    path = str(tmp_path / 'asset')
+    server.pause = threading.Event()
+    cancel_event = threading.Event()
+
+    def progress(report):
+        if report[0]:
+            cancel_event.set()
+            server.pause.set()
+
+    timer = threading.Timer(0.3, server.pause.set) # Lets the first blocks through so there is something to keep
+    timer.start()
+    with pytest.raises(dm.DownloadCancelled):
+        dm.download(server.url, path, progress_callback=progress, cancel_event=cancel_event)
+    timer.cancel()
+    assert not os.path.exists(path)
+    assert os.path.exists(path + '.part') and os.path.exists(path + '.part.json')
+
+    server.pause = None
+    assert dm.download(server.url, path, expected_sha256=SHA256) == SHA256
+    assert read(path) == DATA
+    assert server.ranges_requested[-1] is not None and not server.ranges_requested[-1].startswith('bytes=0-')
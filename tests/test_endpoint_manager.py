@@ -0,0 +1,47 @@
+import pytest
+
+import endpoint_manager as em
+import vpn_manager as vm
+from conftest import PUBLIC_KEY
+
+@pytest.fixture
+def connected(monkeypatch):
+    """Records the config path connect_vpn is called with, instead of running wg-quick"""
+    paths = []
+    def connect_vpn(config_path, output_callback=None, cancel_event=None):
+        paths.append(config_path)
+        return True, f"Successfully connected to VPN using {config_path}"
+    monkeypatch.setattr(vm, 'connect_vpn', connect_vpn)
+    monkeypatch.setattr(vm, 'get_wg_command', lambda: 'wg')
+    monkeypatch.setattr(em, 'active_endpoints', {})
+    return paths
+
+def ranking(*endpoints):
+    return lambda candidates: [(endpoint, True, latency, None) for endpoint, latency in endpoints]
+
+def test_faster_alternative_is_set_on_the_running_tunnel(wg_config, connected, fake_backend, monkeypatch):
+    monkeypatch.setattr(em, 'rank_endpoints', ranking(('backup.example.com:51820', 12.0),
+                                                      ('vpn.example.com:51820', 80.0)))
+    fake_backend.add(['wg', 'set'])
+    success, message = em.connect_with_failover(wg_config, ['backup.example.com:51820'])
+    assert success, message
+    assert connected == [wg_config] # The user's own file, which the Windows tunnel service keeps using
+    assert fake_backend.calls == [['wg', 'set', 'wg0', 'peer', PUBLIC_KEY, 'endpoint', 'backup.example.com:51820']]
+    assert em.active_endpoints['wg0'] == ('backup.example.com:51820', 12.0)
+
+def test_configured_endpoint_needs_no_switch(wg_config, connected, fake_backend, monkeypatch):
+    monkeypatch.setattr(em, 'rank_endpoints', ranking(('vpn.example.com:51820', 10.0),
+                                                      ('backup.example.com:51820', 30.0)))
+    success, _ = em.connect_with_failover(wg_config, ['backup.example.com:51820'])
+    assert success
+    assert fake_backend.calls == []
+    assert em.active_endpoints['wg0'] == ('vpn.example.com:51820', 10.0)
+
+def test_failed_switch_keeps_the_tunnel_on_its_configured_endpoint(wg_config, connected, fake_backend, monkeypatch):
+    monkeypatch.setattr(em, 'rank_endpoints', ranking(('backup.example.com:51820', 12.0),
+                                                      ('vpn.example.com:51820', 80.0)))
+    fake_backend.add(['wg', 'set'], returncode=1, stderr='Unable to modify interface: Operation not permitted')
+    success, message = em.connect_with_failover(wg_config, ['backup.example.com:51820'])
+    assert success
+    assert 'Operation not permitted' in message
+    assert em.active_endpoints['wg0'] == ('vpn.example.com:51820', None)
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from host_registry import HostRegistry, normalize_mac
+from host_search import HostSearchIndex
+
+def make_hosts(count):
+    return [{'name': f"{'Lab' if i % 3 else 'lab'}{i // 100:02d}-pc{i % 100:02d}",
+             'ip_address': f"10.0.{i >> 8 & 255}.{i & 255}",
+             'mac_address': f"00:16:3e:00:{i >> 8 & 255:02x}:{i & 255:02x}",
+             'rdp_user': f"user{i % 7}"} for i in range(count)]
+
+def tier(record, term):
+    # The ranking rules from HostSearchIndex._score, applied to the record directly
+    name = record.name.lower()
+    others = [record.ip_address.lower(), normalize_mac(record.mac_address), (record.rdp_user or '').lower()]
+    if name == term:
+        return 100
+    if name.startswith(term):
+        return 80
+    if any(value.startswith(term) for value in others):
+        return 60
+    if term in name:
+        return 50
+    if any(term in value for value in others):
+        return 40
+    return 0
+
+def brute_force(registry, terms):
+    scores = {}
+    for record in registry:
+        term_scores = [tier(record, term) for term in terms]
+        if all(term_scores):
+            scores[record] = sum(term_scores)
+    return sorted(scores, key=lambda record: (-scores[record], record.name.lower(), record.name))
+
+@pytest.fixture
+def registry():
+    return HostRegistry.from_dicts(make_hosts(1000))
+
+@pytest.mark.parametrize('text', ['l 7', 'pc 7', '7 pc', 'u 3', 'lab 1', '0 9', 'e 5 pc', 'lab0 user3', 'zz 1'])
+def test_multi_term_matches_brute_force(registry, text):
+    index = HostSearchIndex(registry)
+    expected = brute_force(registry, text.split())
+    assert index.search(text, limit=len(registry)) == expected
+    assert index.search(text, limit=25) == expected[:25]
+
+@pytest.mark.parametrize('term', ['7', 'c9', 'e', 'r3', 'q'])
+def test_short_term_finds_every_substring_match(registry, term):
+    index = HostSearchIndex(registry)
+    results = index.search(term, limit=len(registry))
+    assert set(results) == {record for record in registry if tier(record, term)}
+    assert len(results) == len(set(results))
+
+def test_short_term_page_is_ranked_by_tier(registry):
+    index = HostSearchIndex(registry)
+    page = index.search('7', limit=50)
+    assert len(page) == 50
+    assert all('7' in record.name for record in page) # Plenty of names contain a 7, so nothing lower ranks
+
+def test_short_terms_follow_registry_changes(registry):
+    index = HostSearchIndex(registry)
+    assert index.search('qx') == []
+    registry.add({'name': 'qx-box', 'ip_address': '10.9.9.9', 'mac_address': '00:16:3e:99:99:99'})
+    assert [record.name for record in index.search('qx')] == ['qx-box']
+    registry.update('qx-box', {'name': 'renamed'})
+    assert index.search('qx') == []
+    registry.remove('renamed')
+    assert index.search('ren') == []
+
+def test_detached_build_replays_changes(registry):
+    index = HostSearchIndex(registry, attach=False)
+    changes = []
+    listener = lambda action, record: changes.append((action, record))
+    registry.subscribe(listener)
+    registry.add({'name': 'late', 'ip_address': '10.9.9.9', 'mac_address': '00:16:3e:99:99:99'})
+    registry.remove('lab00-pc00')
+    registry.unsubscribe(listener)
+    index.attach(changes)
+    assert [record.name for record in index.search('late')] == ['late']
+    assert all(record.name != 'lab00-pc00' for record in index.search('lab00-pc00'))
+    index.detach()
+    registry.add({'name': 'after', 'ip_address': '10.9.9.8', 'mac_address': '00:16:3e:99:99:98'})
+    assert index.search('after') == []
+
+def test_random_queries_match_brute_force(registry):
+    index = HostSearchIndex(registry)
+    rng = random.Random(7)
+    alphabet = 'labpc0123456789-u.e'
+    for _ in range(200):
+        terms = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(2, 3))]
+        expected = brute_force(registry, terms)
+        if expected:
+            assert index.search(' '.join(terms), limit=30) == expected[:30], terms
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('PyQt6.QtCore')
+
+from host_registry import HostRegistry
+from host_table_model import HOST_COLUMNS, HostTableModel
+
+HOST = {'name': 'pc1', 'ip_address': '10.0.0.1', 'mac_address': '00:11:22:33:44:55', 'rdp_user': 'bob',
+        'tunnel': 'wg0'}
+
+@pytest.fixture
+def model():
+    return HostTableModel(HostRegistry.from_dicts([HOST]))
+
+def cell(model, key):
+    return model.index(0, [column for _, column in HOST_COLUMNS].index(key))
+
+@pytest.mark.parametrize('key', ['name', 'ip_address', 'mac_address'])
+def test_required_columns_cannot_be_cleared(model, key):
+    assert not model.setData(cell(model, key), '  ')
+    assert model.host_at(0)[key] == HOST[key]
+
+def test_clearing_tunnel_removes_it(model):
+    edited = []
+    model.host_edited.connect(lambda name, host: edited.append(name))
+    assert model.setData(cell(model, 'tunnel'), '')
+    assert 'tunnel' not in model.host_at(0)
+    assert edited == ['pc1']
+    assert not model.setData(cell(model, 'tunnel'), '') # Already gone
+
+def test_clearing_rdp_user(model):
+    assert model.setData(cell(model, 'rdp_user'), '')
+    assert model.host_at(0)['rdp_user'] == ''
+
+def test_update_hosts_swaps_names(model):
+    model.add_host({'name': 'pc2', 'ip_address': '10.0.0.2'})
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+    updated, errors = model.update_hosts({'pc1': {'name': 'pc2'}, 'pc2': {'name': 'pc1'}})
+    assert errors == {}
+    assert [model.data(model.index(row, 0)) for row in range(2)] == ['pc2', 'pc1']
+    assert sorted(changed) == [0, 1]
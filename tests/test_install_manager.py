@@ -0,0 +1,53 @@
+import os
+import platform
+import time
+
+import pytest
+
+import install_manager as inst
+
+pytestmark = pytest.mark.skipif(platform.system() == "Windows", reason="uses a POSIX shell and process groups")
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z' # A killed child waits as a zombie until init reaps it
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+def wait_for_file(path, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) or not open(path).read().strip():
+        assert time.monotonic() < deadline, f"{path} was never written"
+        time.sleep(0.01)
+    return int(open(path).read())
+
+@pytest.mark.parametrize('parent', ['wait', 'exit'])
+def test_unhealthy_version_is_killed_with_its_children(tmp_path, parent):
+    # Like a onefile bootloader: the parent starts the real app as a child, then waits for it or exits early
+    child_pid = tmp_path / 'child.pid'
+    script = f"sleep 60 & echo $! > {child_pid}; " + ("wait" if parent == 'wait' else "exit 1")
+    process = inst._start('/bin/sh', ['app', '-c', script], dict(os.environ))
+    child = wait_for_file(child_pid)
+    assert not inst._wait_until_healthy(process, str(tmp_path / 'healthy'), timeout=0.5)
+    assert process.returncode is not None
+    deadline = time.monotonic() + 5
+    while alive(child) and time.monotonic() < deadline:
+        time.sleep(0.01) # SIGKILL is delivered asynchronously
+    assert not alive(child)
+
+def test_healthy_version_keeps_running(tmp_path):
+    health = tmp_path / 'healthy'
+    process = inst._start('/bin/sh', ['app', '-c', f"touch {health}; sleep 60"], dict(os.environ))
+    try:
+        assert inst._wait_until_healthy(process, str(health), timeout=5)
+        assert process.poll() is None
+    finally:
+        inst._kill_tree(process)
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+import launch_manager as lm
+import probe_manager as pm
+
+HOST = {'name': 'pc1', 'ip_address': '10.0.0.1', 'mac_address': '00:11:22:33:44:55', 'rdp_user': 'bob'}
+
+class FakeClock:
+    """Stands in for the time module, so waits advance the clock instead of sleeping"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class FakeEvent:
+    """Cancel event whose waits advance the clock; set after `cancel_after` waits if given"""
+
+    def __init__(self, clock, cancel_after=None):
+        self.clock = clock
+        self.cancel_after = cancel_after
+        self.waits = []
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.clock.sleep(timeout)
+        return self.is_set()
+
+    def is_set(self):
+        return self.cancel_after is not None and len(self.waits) >= self.cancel_after
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """Fake clock, port check, WoL and RDP launch; the port opens once the clock reaches env.up_at"""
+    class Env:
+        clock = FakeClock()
+        up_at = float('inf')
+        probes = []
+        wakes = []
+        launches = []
+
+    def probe_host(ip_address, port, timeout=None):
+        Env.probes.append(Env.clock.now)
+        return (pm.STATUS_UP, 1.0) if Env.clock.now >= Env.up_at else (pm.STATUS_DOWN, None)
+
+    def wake_hosts(hosts, **options):
+        Env.wakes.append((Env.clock.now, options))
+        return [(host['name'], True, "sent") for host in hosts]
+
+    def launch_rdp(ip_address, username, **kwargs):
+        Env.launches.append(ip_address)
+        return True, "RDP launched"
+
+    monkeypatch.setattr(lm, 'time', Env.clock)
+    monkeypatch.setattr(lm.random, 'uniform', lambda low, high: high) # No jitter
+    monkeypatch.setattr(lm.pm, 'probe_host', probe_host)
+    monkeypatch.setattr(lm.wm, 'wake_hosts', wake_hosts)
+    monkeypatch.setattr(lm.rm, 'launch_rdp', launch_rdp)
+    monkeypatch.setattr(lm, 'BOOT_TIMES_FILE', str(tmp_path / 'boot_times.json'))
+    return Env
+
+def test_polls_with_exponential_backoff_until_the_port_opens(env):
+    env.up_at = 20
+    event = FakeEvent(env.clock)
+    success, message, time_to_desktop = lm.wake_and_launch(
+        HOST, cancel_event=event, packets_per_second=50, secureon_password='00:11:22:33:44:55')
+    assert success and time_to_desktop == 23
+    assert event.waits == [1, 2, 4, 8, 8]
+    assert env.wakes == [(0.0, {'repeat': 3, 'packets_per_second': 50, 'secureon_password': '00:11:22:33:44:55'})]
+    assert env.launches == ['10.0.0.1']
+    assert "ready after 23.0 s" in message
+    with open(lm.BOOT_TIMES_FILE) as f:
+        assert json.load(f) == {'pc1': [23]}
+
+def test_resends_the_magic_packet_while_waiting(env, monkeypatch):
+    monkeypatch.setattr(lm, 'WAKE_RESEND_INTERVAL', 10)
+    env.up_at = 60
+    lm.wake_and_launch(HOST, cancel_event=FakeEvent(env.clock), secureon_password='pw')
+    # Resent on the first poll more than 10 s after the previous packet, with the same options
+    assert [at for at, _ in env.wakes] == [0, 15, 31, 47]
+    assert all(options['secureon_password'] == 'pw' for _, options in env.wakes)
+
+def test_cancel_stops_waiting(env):
+    success, message, time_to_desktop = lm.wake_and_launch(HOST, cancel_event=FakeEvent(env.clock, cancel_after=2))
+    assert not success and "cancelled" in message and time_to_desktop is None
+    assert len(env.probes) == 2 # The initial check and one poll; none after the cancel
+    assert env.launches == []
+
+def test_gives_up_after_the_timeout(env):
+    success, message, _ = lm.wake_and_launch(HOST, cancel_event=FakeEvent(env.clock), timeout=30)
+    assert not success and "within 30 seconds" in message
+    assert env.launches == []
+
+def test_sleeps_without_a_cancel_event(env):
+    env.up_at = 2
+    assert lm.wake_and_launch(HOST)[0]
+    assert env.clock.now == 3
+
+def test_already_up_host_is_not_woken(env):
+    env.up_at = 0
+    success, _, time_to_desktop = lm.wake_and_launch(HOST, cancel_event=FakeEvent(env.clock))
+    assert success and time_to_desktop is None
+    assert env.wakes == [] and env.launches == ['10.0.0.1']
+
+def test_failed_wake_is_reported(env, monkeypatch):
+    monkeypatch.setattr(lm.wm, 'wake_hosts', lambda hosts, **options: [('pc1', False, "Invalid MAC address")])
+    assert lm.wake_and_launch(HOST, cancel_event=FakeEvent(env.clock)) == (False, "Invalid MAC address", None)
+
+def test_boot_times_live_next_to_the_settings():
+    assert lm.BOOT_TIMES_FILE == lm.sm.settings_path('boot_times.json')
@@ -0,0 +1,116 @@
+import ipaddress
+
+import pytest
+
+import netlink_backend as nb
+import wireguard_config as wgc
+from conftest import PRIVATE_KEY, PUBLIC_KEY
+
+PEER_KEY = 'HIgo9xNzJMWLKASShiTqIybxZ0U3wGLiUeJ1PKf8ykw='
+
+class FakeIPRoute:
+    """Records rtnetlink requests; `fail_on` names the call ('link add', 'addr', 'route', ...) that raises"""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.closed = False
+
+    def _call(self, request, command, kwargs):
+        self.calls.append((f"{request} {command}", kwargs))
+        if self.fail_on in (request, f"{request} {command}"):
+            raise OSError(f"{request} {command} failed")
+
+    def link(self, command, **kwargs):
+        self._call('link', command, kwargs)
+
+    def link_lookup(self, ifname):
+        return [7]
+
+    def addr(self, command, **kwargs):
+        self._call('addr', command, kwargs)
+
+    def route(self, command, **kwargs):
+        self._call('route', command, kwargs)
+
+    def close(self):
+        self.closed = True
+
+class FakeWireGuard:
+    def __init__(self, fail_on_peer=None):
+        self.calls = []
+        self.fail_on_peer = fail_on_peer
+        self.closed = False
+
+    def set(self, interface, **kwargs):
+        self.calls.append((interface, kwargs))
+        peer = kwargs.get('peer')
+        if peer is not None and peer['public_key'] == self.fail_on_peer:
+            raise OSError("peer rejected")
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'wg5.conf'
+    path.write_text(f"[Interface]\nPrivateKey = {PRIVATE_KEY}\nAddress = 10.8.0.2/24, fd00::2/64\n"
+                    f"ListenPort = 51000\nMTU = 1380\n\n"
+                    f"[Peer]\nPublicKey = {PUBLIC_KEY}\nAllowedIPs = 10.8.0.0/24, 192.168.50.0/24\n"
+                    f"Endpoint = 192.0.2.1:51820\nPersistentKeepalive = 25\n\n"
+                    f"[Peer]\nPublicKey = {PEER_KEY}\nAllowedIPs = 10.9.0.0/16\n")
+    return wgc.load_config(str(path))
+
+def test_bring_up_programs_link_addresses_peers_and_routes(config):
+    ipr, wg = FakeIPRoute(), FakeWireGuard()
+    nb.bring_up(config, ipr, wg)
+    assert ipr.calls == [
+        ('link add', {'ifname': 'wg5', 'kind': 'wireguard'}),
+        ('addr add', {'index': 7, 'address': '10.8.0.2', 'prefixlen': 24}),
+        ('addr add', {'index': 7, 'address': 'fd00::2', 'prefixlen': 64}),
+        ('link set', {'index': 7, 'mtu': 1380, 'state': 'up'}),
+        ('route replace', {'dst': '10.8.0.0/24', 'oif': 7}),
+        ('route replace', {'dst': '192.168.50.0/24', 'oif': 7}),
+        ('route replace', {'dst': '10.9.0.0/16', 'oif': 7}),
+    ]
+    assert wg.calls == [
+        ('wg5', {'private_key': PRIVATE_KEY, 'listen_port': 51000, 'fwmark': None}),
+        ('wg5', {'peer': {'public_key': PUBLIC_KEY, 'allowed_ips': ['10.8.0.0/24', '192.168.50.0/24'],
+                          'persistent_keepalive': 25, 'endpoint_addr': '192.0.2.1', 'endpoint_port': 51820}}),
+        ('wg5', {'peer': {'public_key': PEER_KEY, 'allowed_ips': ['10.9.0.0/16']}}),
+    ]
+    assert not ipr.closed and not wg.closed # Sockets passed in belong to the caller
+
+@pytest.mark.parametrize('fail_on', ['addr', 'link set', 'route'])
+def test_partial_failure_removes_the_interface(config, fail_on):
+    ipr = FakeIPRoute(fail_on=fail_on)
+    with pytest.raises(OSError):
+        nb.bring_up(config, ipr, FakeWireGuard())
+    assert ipr.calls[0][0] == 'link add'
+    assert ipr.calls[-1] == ('link del', {'ifname': 'wg5'})
+
+def test_rejected_peer_removes_the_interface_before_routes(config):
+    ipr = FakeIPRoute()
+    with pytest.raises(OSError, match="peer rejected"):
+        nb.bring_up(config, ipr, FakeWireGuard(fail_on_peer=PEER_KEY))
+    assert ipr.calls[-1] == ('link del', {'ifname': 'wg5'})
+    assert not any(call == 'route replace' for call, _ in ipr.calls)
+
+def test_failed_link_creation_leaves_nothing_to_remove(config):
+    ipr = FakeIPRoute(fail_on='link add')
+    with pytest.raises(OSError):
+        nb.bring_up(config, ipr, FakeWireGuard())
+    assert [call for call, _ in ipr.calls] == ['link add']
+
+def test_tear_down(config):
+    ipr = FakeIPRoute()
+    nb.tear_down('wg5', ipr)
+    assert ipr.calls == [('link del', {'ifname': 'wg5'})]
+
+def test_wg_quick_features_are_left_to_wg_quick(config):
+    assert nb.unsupported_reason(config) is None
+    config.interface['dns'] = ['1.1.1.1']
+    assert nb.unsupported_reason(config) == "dns is handled by wg-quick"
+    del config.interface['dns']
+    config.peers[1]['allowedips'] = [ipaddress.ip_network('0.0.0.0/0')]
+    assert nb.unsupported_reason(config) == "default routes are handled by wg-quick"
@@ -0,0 +1,101 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+import probe_manager as pm
+
+ARP = """IP address       HW type     Flags       HW address            Mask     Device
+192.168.1.1      0x1         0x2         aa:bb:cc:dd:ee:01     *        eth0
+192.168.1.7      0x1         0x0         00:00:00:00:00:00     *        eth0
+192.168.1.9      0x1         0x2         00:00:00:00:00:00     *        eth0
+10.0.0.5         0x1         0x6         aa:bb:cc:dd:ee:05     *        wg0
+"""
+
+@pytest.fixture
+def listener():
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen(16)
+        yield server.getsockname()[1]
+
+@pytest.fixture
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def unanswered_port():
+    # A listener whose accept queue is full drops further SYNs, so connecting times out
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen(0)
+        port = server.getsockname()[1]
+        fillers = []
+        for _ in range(4):
+            filler = socket.socket()
+            filler.setblocking(False)
+            filler.connect_ex(('127.0.0.1', port))
+            fillers.append(filler)
+        time.sleep(0.05)
+        yield port
+        for filler in fillers:
+            filler.close()
+
+@pytest.fixture
+def no_arp(monkeypatch):
+    arp = set()
+    monkeypatch.setattr(pm, 'read_arp_table', lambda: arp)
+    return arp
+
+def test_parse_arp_table():
+    assert pm.parse_arp_table(ARP.splitlines()) == {'192.168.1.1', '10.0.0.5'}
+    assert pm.parse_arp_table(ARP.splitlines()[:1]) == set()
+
+def test_probe_classifies_hosts(listener, closed_port, unanswered_port, no_arp):
+    hosts = [{'name': 'up', 'ip_address': '127.0.0.1', 'rdp_port': listener},
+             {'name': 'no-rdp', 'ip_address': '127.0.0.1', 'rdp_port': closed_port},
+             {'name': 'down', 'ip_address': '127.0.0.1', 'rdp_port': unanswered_port},
+             {'name': 'no-ip', 'ip_address': ''}]
+    seen = []
+    results = pm.probe_hosts(hosts, progress_callback=seen.append, timeout=0.3)
+    assert {name: status for name, (status, _) in results.items()} == {
+        'up': pm.STATUS_UP, 'no-rdp': pm.STATUS_NO_RDP, 'down': pm.STATUS_DOWN}
+    assert results['up'][1] >= 0 and results['down'][1] is None
+    assert sorted(name for name, _, _ in seen) == ['down', 'no-rdp', 'up']
+
+def test_arp_entry_turns_timeout_into_no_rdp(unanswered_port, no_arp):
+    host = {'name': 'pc', 'ip_address': '127.0.0.1', 'rdp_port': unanswered_port}
+    assert pm.probe_hosts([host], timeout=0.3) == {'pc': (pm.STATUS_DOWN, None)}
+    no_arp.add('127.0.0.1') # Answered ARP, so the host is up with the port filtered
+    assert pm.probe_hosts([host], timeout=0.3) == {'pc': (pm.STATUS_NO_RDP, None)}
+    assert pm.probe_host('127.0.0.1', unanswered_port, timeout=0.3) == (pm.STATUS_NO_RDP, None)
+
+def test_probe_host(listener, closed_port, no_arp):
+    assert pm.probe_host('127.0.0.1', listener)[0] == pm.STATUS_UP
+    assert pm.probe_host('127.0.0.1', closed_port)[0] == pm.STATUS_NO_RDP
+
+def test_concurrency_is_capped(monkeypatch, no_arp):
+    in_flight = peak = 0
+
+    async def fake_probe(ip_address, port, timeout):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return pm.STATUS_UP, 1.0
+
+    monkeypatch.setattr(pm, '_probe_tcp', fake_probe)
+    hosts = [{'name': f"pc{i}", 'ip_address': f"10.0.{i // 256}.{i % 256}"} for i in range(50)]
+    results = pm.probe_hosts(hosts, concurrency=7)
+    assert len(results) == 50
+    assert peak == 7
+
+def test_stop_event_skips_pending_probes(listener, no_arp):
+    stop = threading.Event()
+    stop.set()
+    assert pm.probe_hosts([{'name': 'up', 'ip_address': '127.0.0.1', 'rdp_port': listener}], stop_event=stop) == {}
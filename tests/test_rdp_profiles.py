@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import rdp_profiles as rp
+
+@pytest.fixture(autouse=True)
+def clean_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(rp, 'RDP_FILES_DIR', str(tmp_path / 'rdp_files'))
+    monkeypatch.setattr(rp, '_command_cache', {})
+    monkeypatch.setattr(rp, '_measurements', {})
+
+@pytest.mark.parametrize('rtt, jitter, loss, profile', [
+    (1, 0, 0.0, 'lan'),
+    (1, 0, 0.2, 'lan'), # One lost connect out of five is noise
+    (5, 0, 0.0, 'lan'),
+    (4, 2, 0.0, 'lan'), # Half the jitter counts against the RTT
+    (4, 4, 0.0, 'broadband'),
+    (1, 0, 0.4, 'wan'),
+    (40, 0, 0.2, 'broadband'),
+    (41, 0, 0.0, 'wan'),
+    (150, 0, 0.4, 'wan'),
+    (150, 0, 0.6, 'slow'),
+    (151, 0, 0.0, 'slow'),
+    (None, None, 1.0, rp.DEFAULT_PROFILE), # Nothing answered
+])
+def test_choose_profile(rtt, jitter, loss, profile):
+    assert rp.choose_profile(rp.LinkQuality(rtt, jitter, loss)) == profile
+
+def test_measure_link_with_one_lost_connect(monkeypatch):
+    answers = iter([(None, 1.0), (None, None), (None, 1.0), (None, 2.0), (None, 1.0)])
+    monkeypatch.setattr(rp.pm, 'probe_host', lambda ip, port, timeout: next(answers))
+    quality = rp.measure_link('10.0.0.1')
+    assert (quality.rtt, quality.jitter, quality.loss) == (1.0, 1.0, 0.2)
+    assert rp.choose_profile(quality) == 'lan'
+    assert rp.measure_link('10.0.0.1') is quality # Reused within MEASURE_TTL
+
+def test_linux_command_is_cached_until_an_input_changes():
+    command = rp.build_command('10.0.0.1', 'bob', 'lan', system="Linux")
+    assert command[:3] == ['xfreerdp', '/v:10.0.0.1', '/u:bob'] and '/gfx:AVC444' in command
+    assert rp.build_command('10.0.0.1', 'bob', 'lan', system="Linux") is command
+    assert rp.build_command('10.0.0.1', 'alice', 'lan', system="Linux") is not command
+    slow = rp.build_command('10.0.0.1', 'alice', 'slow', 3390, system="Linux")
+    assert slow[1] == '/v:10.0.0.1:3390' and not any(arg.startswith('/gfx') for arg in slow)
+
+def test_windows_rdp_file_is_cached_and_rewritten_when_missing():
+    command = rp.build_command('10.0.0.1', 'bob', 'wan', system="Windows")
+    program, path = command
+    assert program == 'mstsc.exe'
+    with open(path) as f:
+        text = f.read()
+    assert "full address:s:10.0.0.1\n" in text and "connection type:i:2\n" in text and "username:s:bob\n" in text
+    assert rp.build_command('10.0.0.1', 'bob', 'wan', system="Windows") is command
+
+    os.remove(path)
+    rebuilt = rp.build_command('10.0.0.1', 'bob', 'wan', system="Windows")
+    assert rebuilt is not command and os.path.exists(path)
+
+def test_unsupported_system():
+    assert rp.build_command('10.0.0.1', 'bob', 'lan', system="Darwin") is None
+
+def test_resolve_profile_rejects_unknown_names():
+    assert rp.resolve_profile('10.0.0.1', requested='slow') == ('slow', None)
+    with pytest.raises(KeyError):
+        rp.resolve_profile('10.0.0.1', requested='turbo')
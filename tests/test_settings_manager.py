@@ -0,0 +1,137 @@
+import json
+import os
+
+import pytest
+
+import settings_manager as sm
+from host_registry import HostRegistry
+
+HOST = {'name': 'pc1', 'ip_address': '10.0.0.1', 'mac_address': '00:11:22:33:44:55', 'rdp_user': 'bob',
+        'tunnel': '/etc/wireguard/wg0.conf', 'rdp_port': 3390}
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sm, 'APP_DIR', str(tmp_path))
+    monkeypatch.setattr(sm, 'CONFIG_FILE', sm.settings_path('config.json'))
+    monkeypatch.setattr(sm, 'DATABASE_FILE', sm.settings_path('config.db'))
+    return tmp_path
+
+def write_config(data):
+    with open(sm.CONFIG_FILE, 'w') as f:
+        json.dump(data, f)
+
+def test_diff_reports_removed_host_keys():
+    settings = dict(sm.DEFAULT_SETTINGS, hosts=HostRegistry.from_dicts([HOST]))
+    host = {key: value for key, value in HOST.items() if key not in ('tunnel', 'rdp_user')}
+    changes = sm.diff_settings(settings, dict(sm.DEFAULT_SETTINGS, hosts=[host]))
+    assert changes['updated_hosts'] == {'pc1': {'tunnel': None, 'rdp_user': ''}}
+    record = settings['hosts'].update('pc1', changes['updated_hosts']['pc1'])
+    assert record.to_dict() == dict(host, rdp_user='')
+    assert record.extra == {'rdp_port': 3390}
+
+def test_update_removing_last_extra_key():
+    registry = HostRegistry.from_dicts([{'name': 'pc1', 'tunnel': 'wg0'}])
+    assert registry.update('pc1', {'tunnel': None, 'missing': None}).extra is None
+    assert 'tunnel' not in registry.get('pc1')
+
+PAIR = [{'name': 'pc1', 'ip_address': '10.0.0.1', 'mac_address': '00:11:22:33:44:01'},
+        {'name': 'pc2', 'ip_address': '10.0.0.2', 'mac_address': '00:11:22:33:44:02'}]
+
+def test_config_diff_can_swap_host_addresses():
+    registry = HostRegistry.from_dicts(PAIR)
+    swapped = [dict(PAIR[0], ip_address='10.0.0.2', mac_address='00:11:22:33:44:02'),
+               dict(PAIR[1], ip_address='10.0.0.1', mac_address='00:11:22:33:44:01')]
+    changes = sm.diff_settings(dict(sm.DEFAULT_SETTINGS, hosts=registry), dict(sm.DEFAULT_SETTINGS, hosts=swapped))
+    notified = []
+    registry.subscribe(lambda action, record: notified.append((action, record.name)))
+    updated, errors = registry.update_many(changes['updated_hosts'])
+    assert errors == {}
+    assert [record.to_dict() for record in registry] == [dict(host, rdp_user='') for host in swapped]
+    assert registry.by_ip('10.0.0.1').name == 'pc2' and registry.by_mac('00:11:22:33:44:02').name == 'pc1'
+    assert sorted(notified) == [('update', 'pc1'), ('update', 'pc2')]
+
+def test_hosts_can_swap_names():
+    registry = HostRegistry.from_dicts(PAIR)
+    updated, errors = registry.update_many({'pc1': {'name': 'pc2'}, 'pc2': {'name': 'pc1'}})
+    assert errors == {} and updated['pc1'].ip_address == '10.0.0.1'
+    assert registry.get('pc2').ip_address == '10.0.0.1'
+    assert [registry.row_of('pc2'), registry.row_of('pc1')] == [0, 1]
+
+def test_update_many_skips_updates_that_still_clash():
+    registry = HostRegistry.from_dicts(PAIR + [{'name': 'pc3', 'ip_address': '10.0.0.3'}])
+    updated, errors = registry.update_many({'pc1': {'ip_address': '10.0.0.2'}, 'pc2': {'ip_address': '10.0.0.3'}})
+    # pc2 cannot take pc3's address, so it keeps its own and pc1 cannot have it either
+    assert updated == {}
+    assert errors == {'pc1': "ip address '10.0.0.2' is already used by 'pc2'",
+                      'pc2': "ip address '10.0.0.3' is already used by 'pc3'"}
+    assert [record.ip_address for record in registry] == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+
+def test_update_many_leaves_a_value_with_the_host_that_keeps_it():
+    registry = HostRegistry.from_dicts(PAIR)
+    updated, errors = registry.update_many({'pc1': {'ip_address': '10.0.0.2'}, 'pc2': {'rdp_user': 'bob'}})
+    assert list(updated) == ['pc2']
+    assert errors == {'pc1': "ip address '10.0.0.2' is already used by 'pc2'"}
+    assert registry.by_ip('10.0.0.2').name == 'pc2' and registry.get('pc1').ip_address == '10.0.0.1'
+
+def test_reload_drops_missing_settings_like_import(workdir):
+    write_config({'wireguard_config_path': '/etc/wg0.conf', 'probe_interval': 10, 'hosts': [HOST]})
+    settings = sm.load_settings()
+    assert settings['probe_interval'] == 10
+
+    write_config({'hosts': [HOST]})
+    success, changes = sm.read_config_changes(settings)
+    assert success
+    assert changes['settings'] == {'wireguard_config_path': ''}
+    assert changes['removed_settings'] == ['probe_interval']
+
+    # Applying the diff ends where importing the same file does
+    settings.update(changes['settings'])
+    for key in changes['removed_settings']:
+        settings.pop(key)
+    imported = sm.load_settings()
+    assert {key: value for key, value in settings.items() if key != 'hosts'} == \
+           {key: value for key, value in imported.items() if key != 'hosts'}
+
+def test_unchanged_file_has_no_changes(workdir):
+    write_config({'probe_interval': 10, 'hosts': [HOST]})
+    settings = sm.load_settings()
+    changes = sm.diff_settings(settings, {'probe_interval': 10, 'hosts': [HOST]})
+    assert changes == {'settings': {}, 'removed_settings': [], 'added_hosts': [],
+                       'updated_hosts': {}, 'removed_hosts': []}
+
+def test_hosts_load_in_batches(workdir):
+    hosts = [{'name': f"pc{i}", 'ip_address': f"10.0.0.{i}"} for i in range(5)]
+    write_config({'hosts': hosts})
+    sm.save_settings(sm.load_settings()) # Imports config.json into the database
+    settings = sm.load_settings(first_batch=2)
+    registry = settings['hosts']
+    assert [host['name'] for host in registry] == ['pc0', 'pc1']
+    assert sm.has_more_hosts()
+
+    # Added while loading: gets a newer row than the held-back hosts and must not be read back
+    registry.add({'name': 'pc9', 'ip_address': '10.0.0.3'})
+    sm.save_settings(settings)
+
+    def append(records):
+        records = registry.addable(records)
+        for record in records:
+            registry.add(record)
+        return records
+
+    batches = 1
+    while sm.load_more_hosts(append, batch=2):
+        batches += 1
+    assert batches == 2
+    assert not sm.has_more_hosts()
+    assert sorted(host['name'] for host in registry) == ['pc0', 'pc1', 'pc2', 'pc4', 'pc9']
+    assert [host['name'] for host in registry.rejected] == ['pc3'] # Its IP went to pc9
+
+    registry.update('pc4', {'rdp_user': 'bob'})
+    sm.save_settings(settings)
+    assert sm.load_settings()['hosts'].get('pc4')['rdp_user'] == 'bob' # Rows read late are saved in place
+
+def test_files_live_next_to_the_app_not_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app_dir = os.path.dirname(os.path.abspath(sm.__file__))
+    assert sm.DATABASE_FILE == os.path.join(app_dir, 'config.db')
+    assert sm.CONFIG_FILE == os.path.join(app_dir, 'config.json')
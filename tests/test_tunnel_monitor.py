@@ -0,0 +1,120 @@
+import pytest
+
+import tunnel_monitor as tmon
+import vpn_manager as vm
+
+NOW = 1_700_000_000
+
+def dump(*peers, interface='wg0'):
+    """`wg show all dump` text: the interface line, then one line per (key, handshake, rx, tx, keepalive)"""
+    lines = [f"{interface}\tprivkey=\tpubkey=\t51820\toff"]
+    for public_key, handshake, rx, tx, keepalive in peers:
+        lines.append(f"{interface}\t{public_key}\t(none)\t203.0.113.7:51820\t10.8.0.0/24\t{handshake}\t{rx}\t{tx}\t{keepalive}")
+    return "\n".join(lines) + "\n"
+
+@pytest.fixture(autouse=True)
+def wg(monkeypatch):
+    monkeypatch.setattr(vm, 'get_wg_command', lambda: 'wg')
+
+def test_parse_dump():
+    text = dump(('peerA=', NOW - 5, 1000, 2000, 25), ('peerB=', 0, 0, 0, 'off'))
+    text += "wg1\tpriv=\tpub=\t51821\toff\n"
+    text += "wg2\tpriv=\tpub=\t51822\toff\nwg2\tpeerC=\t(none)\t(none)\t(none)\t0\t0\t0\toff\n"
+    assert tmon.parse_dump(text) == {
+        'wg0': [('peerA=', '203.0.113.7:51820', NOW - 5, 1000, 2000, 25),
+                ('peerB=', '203.0.113.7:51820', 0, 0, 0, 0)],
+        'wg1': [],
+        'wg2': [('peerC=', None, 0, 0, 0, 0)],
+    }
+
+def test_sample_summarizes_wg_show_dump(fake_backend):
+    monitor = tmon.TunnelMonitor()
+    fake_backend.add(['wg', 'show', 'all', 'dump'], stdout=dump(('peerA=', NOW - 5, 1000, 2000, 25)))
+    success, summaries = monitor.sample()
+    assert success
+    assert fake_backend.calls == [['wg', 'show', 'all', 'dump']]
+    summary = summaries['wg0']
+    assert summary['peers'] == 1
+    assert summary['endpoint'] == '203.0.113.7:51820'
+    assert summary['rx_rate'] == summary['tx_rate'] == 0.0 # One sample has no rate yet
+
+@pytest.mark.parametrize('response, message', [
+    (None, "wg command not found; tunnel statistics are unavailable."),
+    ({'returncode': 1, 'stderr': 'Unable to access interface: Operation not permitted\n'},
+     "Could not read tunnel statistics: Unable to access interface: Operation not permitted"),
+    ({'delay': 1}, "Reading tunnel statistics timed out."),
+])
+def test_sample_errors(fake_backend, monkeypatch, response, message):
+    monkeypatch.setattr(tmon, 'SAMPLE_TIMEOUT', 0.01)
+    if response is not None:
+        fake_backend.add(['wg', 'show', 'all', 'dump'], **response)
+    assert tmon.TunnelMonitor().sample() == (False, message)
+
+def test_rates_over_successive_dumps():
+    monitor = tmon.TunnelMonitor()
+    for tick in range(6):
+        summaries = monitor.record(tmon.parse_dump(dump(('peerA=', NOW, 1000 * tick, 500 * tick, 25))),
+                                   now=NOW + tick, timestamp=100.0 + tick)
+    assert summaries['wg0']['rx_rate'] == pytest.approx(1000)
+    assert summaries['wg0']['tx_rate'] == pytest.approx(500)
+    assert summaries['wg0']['handshake_age'] == 5
+
+def test_ring_buffer_wraps_around():
+    history = tmon.PeerHistory(size=4)
+    for tick in range(10):
+        history.append(100.0 + tick, 1000.0 * tick, 10.0 * tick)
+    assert history.count == 4
+    assert history.head == 10 % 4
+    assert history.span() == 3.0 # Only the four newest samples are left
+    assert list(history.times)[history._slot(0)] == 109.0
+    assert list(history.times)[history._slot(3)] == 106.0
+    assert history.rates(window=10) == (1000.0, 10.0) # The window is clamped to what the ring holds
+
+def test_counter_reset_does_not_give_negative_rates():
+    history = tmon.PeerHistory(size=8)
+    history.append(100.0, 50_000, 50_000)
+    history.append(101.0, 100, 200) # Interface recreated
+    assert history.rates() == (0.0, 0.0)
+
+def test_stale_handshake_with_keepalive():
+    history = tmon.PeerHistory()
+    history.keepalive = 25
+    history.latest_handshake = NOW - 60
+    assert not history.is_stale(now=NOW)
+    history.latest_handshake = NOW - tmon.STALE_HANDSHAKE_AFTER - 1
+    assert history.is_stale(now=NOW)
+
+def test_idle_peer_without_keepalive_is_not_stale():
+    history = tmon.PeerHistory()
+    history.latest_handshake = NOW - 3600
+    history.append(100.0, 0, 0)
+    history.append(101.0, 0, 0)
+    assert not history.is_stale(now=NOW)
+    history.append(102.0, 0, 500) # Sending without getting a handshake back
+    assert history.is_stale(now=NOW)
+
+def test_new_tunnel_gets_time_for_its_first_handshake():
+    monitor = tmon.TunnelMonitor()
+    for tick in range(0, 40, 2):
+        summaries = monitor.record(tmon.parse_dump(dump(('peerA=', 0, 0, 148 * tick, 25))),
+                                   now=NOW + tick, timestamp=100.0 + tick, first_handshake_timeout=15)
+        if tick <= 15:
+            assert not summaries['wg0']['no_handshake']
+    assert summaries['wg0']['no_handshake']
+    assert summaries['wg0']['handshake_age'] is None
+    assert not summaries['wg0']['stale'] # Stale is about sessions going old, not never starting
+
+def test_stale_summary_needs_every_peer_stale():
+    monitor = tmon.TunnelMonitor()
+    old = NOW - tmon.STALE_HANDSHAKE_AFTER - 10
+    assert monitor.record(tmon.parse_dump(dump(('peerA=', old, 0, 0, 25), ('peerB=', NOW - 1, 0, 0, 25))),
+                          now=NOW, timestamp=1.0)['wg0']['stale'] is False
+    assert monitor.record(tmon.parse_dump(dump(('peerA=', old, 0, 0, 25))),
+                          now=NOW, timestamp=2.0)['wg0']['stale'] is True
+    assert list(monitor.peers['wg0']) == ['peerA='] # peerB left the dump, so its history went too
+
+def test_interfaces_that_disappear_are_forgotten():
+    monitor = tmon.TunnelMonitor()
+    monitor.record(tmon.parse_dump(dump(('peerA=', NOW, 0, 0, 25))), now=NOW, timestamp=1.0)
+    assert monitor.record({}, now=NOW, timestamp=2.0) == {}
+    assert monitor.peers == {}
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+import requests
+
+import update_manager as um
+
+RELEASE = {'tag_name': 'v1.0.10', 'assets': []}
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, etag=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {'ETag': etag} if etag else {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+class FakeSession:
+    """Answers GETs from a queue of responses (or exceptions) and records the headers sent"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = tmp_path / 'release_cache.json'
+    monkeypatch.setattr(um, 'RELEASE_CACHE_FILE', str(path))
+    return path
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(*responses):
+        fake = FakeSession(*responses)
+        monkeypatch.setattr(um, '_session', fake)
+        return fake
+    return install
+
+@pytest.mark.parametrize('older, newer', [
+    ('v1.0.9', 'v1.0.10'),
+    ('1.0.0-rc.1', '1.0.0'),
+    ('1.0.0-rc.9', '1.0.0-rc.10'),
+    ('1.0.0-alpha', '1.0.0-beta'),
+    ('1.0.0-rc.1', 'v1.0.0'),
+    ('1.9', '1.10.0'),
+])
+def test_version_ordering(older, newer):
+    assert um.parse_version(older) < um.parse_version(newer)
+    assert um.is_newer(newer, current=older)
+    assert not um.is_newer(older, current=newer)
+
+def test_v_prefix_and_build_metadata_are_ignored():
+    assert um.parse_version('v1.2.3') == um.parse_version('1.2.3') == um.parse_version('1.2.3+build.7')
+    assert not um.is_newer('v1.2.3', current='1.2.3')
+
+def test_unparseable_versions_are_never_newer():
+    assert um.parse_version('latest') is None
+    assert not um.is_newer('latest', current='1.0.0')
+    assert not um.is_newer('v2.0.0', current='dev')
+
+def test_cache_hit_within_ttl(cache_file, session):
+    fake = session(FakeResponse(200, RELEASE, etag='"a"'))
+    assert um.get_latest_release() == RELEASE
+    assert um.get_latest_release() == RELEASE
+    assert len(fake.requests) == 1
+
+def test_304_revalidates_the_cached_copy(cache_file, session):
+    fake = session(FakeResponse(200, RELEASE, etag='"a"'), FakeResponse(304))
+    um.get_latest_release()
+    assert um.get_latest_release(max_age=0) == RELEASE
+    assert fake.requests[1]['If-None-Match'] == '"a"'
+    entry, = json.loads(cache_file.read_text()).values()
+    assert entry['etag'] == '"a"' and entry['data'] == RELEASE
+
+def test_200_replaces_the_cache(cache_file, session):
+    newer = {'tag_name': 'v1.1.0', 'assets': []}
+    session(FakeResponse(200, RELEASE, etag='"a"'), FakeResponse(200, newer, etag='"b"'))
+    um.get_latest_release()
+    assert um.get_latest_release(max_age=0) == newer
+    entry, = json.loads(cache_file.read_text()).values()
+    assert entry['etag'] == '"b"' and entry['data'] == newer
+
+def test_network_error_falls_back_to_the_stale_copy(cache_file, session):
+    session(FakeResponse(200, RELEASE, etag='"a"'), requests.exceptions.ConnectionError("offline"),
+            FakeResponse(500))
+    um.get_latest_release()
+    assert um.get_latest_release(max_age=0) == RELEASE
+    assert um.get_latest_release(max_age=0) == RELEASE
+
+def test_network_error_without_a_cache(cache_file, session):
+    session(requests.exceptions.ConnectionError("offline"))
+    assert um.get_latest_release() is None
+    assert not cache_file.exists()
@@ -0,0 +1,133 @@
+import io
+import threading
+
+import pytest
+
+import vpn_manager as vm
+
+@pytest.fixture(autouse=True)
+def linux(monkeypatch):
+    monkeypatch.setattr(vm.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr(vm, '_netlink_enabled', False)
+    monkeypatch.setattr(vm, '_state_cache', {})
+
+def commands(backend):
+    return [call[:2] for call in backend.calls]
+
+def test_connect_brings_a_down_tunnel_up(wg_config, fake_backend):
+    fake_backend.add(['wg', 'show', 'interfaces'], stdout='wg7\n')
+    fake_backend.add(['wg-quick', 'up'])
+    success, message = vm.connect_vpn(wg_config)
+    assert success, message
+    assert fake_backend.calls[-1] == ['wg-quick', 'up', wg_config]
+    assert ['wg-quick', 'down'] not in commands(fake_backend)
+    assert 'wg0' not in vm._state_cache # Queried afresh next time
+
+def test_connect_restarts_a_tunnel_that_is_up(wg_config, fake_backend):
+    fake_backend.add(['wg', 'show', 'interfaces'], stdout='wg0\n')
+    fake_backend.add(['wg-quick'])
+    success, _ = vm.connect_vpn(wg_config)
+    assert success
+    assert commands(fake_backend) == [['wg', 'show'], ['wg-quick', 'down'], ['wg-quick', 'up']]
+
+def test_connect_reports_wg_quick_errors(wg_config, fake_backend):
+    fake_backend.add(['wg', 'show', 'interfaces'])
+    fake_backend.add(['wg-quick', 'up'], returncode=1, stderr='RTNETLINK answers: Operation not permitted')
+    success, message = vm.connect_vpn(wg_config)
+    assert not success
+    assert message == "VPN connection failed:\nRTNETLINK answers: Operation not permitted"
+
+def test_connect_rejects_an_invalid_config(tmp_path, fake_backend):
+    path = tmp_path / 'bad.conf'
+    path.write_text("[Interface]\nPrivateKey = nope\n")
+    success, message = vm.connect_vpn(str(path))
+    assert not success and message.startswith("Invalid WireGuard config")
+    assert fake_backend.calls == []
+
+def test_connect_times_out(wg_config, fake_backend, monkeypatch):
+    monkeypatch.setattr(vm, 'COMMAND_TIMEOUT', 0.05)
+    fake_backend.add(['wg', 'show', 'interfaces'])
+    fake_backend.add(['wg-quick', 'up'], delay=5)
+    success, message = vm.connect_vpn(wg_config)
+    assert not success
+    assert message == "VPN connection timed out after 0.05 seconds."
+
+def test_connect_can_be_cancelled(wg_config, fake_backend):
+    fake_backend.add(['wg', 'show', 'interfaces'])
+    fake_backend.add(['wg-quick', 'up'], delay=5)
+    cancel_event = threading.Event()
+    threading.Timer(0.05, cancel_event.set).start()
+    success, message = vm.connect_vpn(wg_config, cancel_event=cancel_event)
+    assert (success, message) == (False, "VPN connection cancelled.")
+
+def test_missing_wireguard_tools(wg_config, fake_backend):
+    success, message = vm.connect_vpn(wg_config)
+    assert not success and "WireGuard command not found" in message
+
+def test_disconnect(wg_config, fake_backend):
+    fake_backend.add(['wg-quick', 'down'], stdout='[#] ip link delete dev wg0')
+    output = []
+    success, _ = vm.disconnect_vpn(wg_config, output_callback=output.append)
+    assert success
+    assert fake_backend.calls == [['wg-quick', 'down', wg_config]]
+    assert output[0] == '[wg-quick] [#] ip link delete dev wg0'
+
+def test_disconnecting_a_missing_tunnel_succeeds(wg_config, fake_backend):
+    fake_backend.add(['wg-quick', 'down'], returncode=1, stderr='Cannot find device "wg0": No such device')
+    success, message = vm.disconnect_vpn(wg_config)
+    assert success
+    assert message == "VPN tunnel wg0 was not active or already disconnected."
+
+def test_disconnect_can_be_cancelled(wg_config, fake_backend):
+    fake_backend.add(['wg-quick', 'down'], delay=5)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert vm.disconnect_vpn(wg_config, cancel_event=cancel_event) == (False, "VPN disconnection cancelled.")
+
+def test_windows_uses_the_tunnel_service(wg_config, fake_backend, monkeypatch):
+    monkeypatch.setattr(vm.platform, 'system', lambda: 'Windows')
+    monkeypatch.setattr(vm, 'find_wireguard_windows', lambda: 'wireguard.exe')
+    monkeypatch.setattr(vm, 'find_wg_windows', lambda: 'wg.exe')
+    fake_backend.add(['wg.exe', 'show', 'interfaces'], stdout='wg0\n')
+    fake_backend.add(['wireguard.exe'])
+    assert vm.connect_vpn(wg_config)[0]
+    assert fake_backend.calls[1:] == [['wireguard.exe', '/uninstalltunnelservice', 'wg0'],
+                                      ['wireguard.exe', '/installtunnelservice', wg_config]]
+
+def test_active_tunnels_from_wg_show_interfaces(fake_backend):
+    fake_backend.add(['wg', 'show', 'interfaces'], stdout='wg0 office\tlab\n')
+    assert vm.list_active_tunnels() == {'wg0', 'office', 'lab'}
+
+def test_active_tunnels_fall_back_to_sysfs(fake_backend, monkeypatch):
+    fake_backend.add(['wg', 'show', 'interfaces'], returncode=1, stderr='Operation not permitted')
+    uevents = {'lo': 'INTERFACE=lo\n', 'wg0': 'DEVTYPE=wireguard\nINTERFACE=wg0\n', 'eth0': 'INTERFACE=eth0\n'}
+    monkeypatch.setattr(vm.os, 'listdir', lambda path: list(uevents))
+    monkeypatch.setattr(vm, 'open', lambda path, mode: io.StringIO(uevents[path.split('/')[-2]]), raising=False)
+    assert vm.list_active_tunnels() == {'wg0'}
+
+def test_tunnel_state_is_unknown_without_wg_or_sysfs(wg_config, fake_backend, monkeypatch):
+    def listdir(path):
+        raise PermissionError(path)
+    monkeypatch.setattr(vm.os, 'listdir', listdir)
+    assert vm.is_tunnel_active(wg_config) is None
+
+def test_windows_falls_back_to_the_tunnel_service(wg_config, fake_backend, monkeypatch):
+    monkeypatch.setattr(vm.platform, 'system', lambda: 'Windows')
+    monkeypatch.setattr(vm, 'find_wg_windows', lambda: 'wg.exe')
+    fake_backend.add(['sc', 'query', 'WireGuardTunnel$wg0'], stdout='        STATE              : 4  RUNNING\n')
+    assert vm.is_tunnel_active(wg_config) is True
+    assert fake_backend.calls[0] == ['wg.exe', 'show', 'interfaces'] # Missing, so the service was asked
+
+def test_tunnel_states_are_cached(tmp_path, fake_backend):
+    paths = [str(tmp_path / 'wg0.conf'), str(tmp_path / 'lab.conf')]
+    fake_backend.add(['wg', 'show', 'interfaces'], stdout='lab\n')
+    assert vm.tunnel_states(paths) == {'wg0': False, 'lab': True}
+    assert vm.tunnel_states(paths) == {'wg0': False, 'lab': True}
+    assert len(fake_backend.calls) == 1 # One listing answered both, and the second call hit the cache
+
+    fake_backend.add(['wg', 'show', 'interfaces'], stdout='wg0\nlab\n')
+    vm.invalidate_tunnel_state(paths[0])
+    assert vm.tunnel_states(paths) == {'wg0': True, 'lab': True}
+    assert len(fake_backend.calls) == 2
+    assert vm.tunnel_states(paths, max_age=0) == {'wg0': True, 'lab': True}
+    assert len(fake_backend.calls) == 3
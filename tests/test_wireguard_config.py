@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+import wireguard_config as wgc
+from conftest import PRIVATE_KEY, PUBLIC_KEY
+
+def config_text(*peer_lines, interface_lines=()):
+    return "\n".join(["[Interface]", f"PrivateKey = {PRIVATE_KEY}", *interface_lines,
+                      "[Peer]", f"PublicKey = {PUBLIC_KEY}", *peer_lines])
+
+def test_hash_inside_a_value_is_kept():
+    config = wgc.parse_config_text(config_text(
+        "  # a comment line, indented", interface_lines=["PostUp = iptables -A FORWARD -m comment --comment '#vpn' -j ACCEPT"]))
+    assert config.interface['postup'] == "iptables -A FORWARD -m comment --comment '#vpn' -j ACCEPT"
+
+@pytest.mark.parametrize('text, error', [
+    ("PrivateKey = x", "line 1: privatekey appears before any section"),
+    (config_text("AllowedIPs = 10.0.0.0/33"), "line 5: allowedips has an invalid address '10.0.0.0/33'"),
+    (config_text("Endpoint = vpn.example.com"), "line 5: endpoint 'vpn.example.com' has no port"),
+    (config_text(interface_lines=["ListenPort = 70000"]), "line 3: listenport must be a number between 0 and 65535"),
+    (config_text(interface_lines=["Colour = blue"]), "line 3: unknown key 'colour'"),
+    (config_text(interface_lines=["[Interface]"]), "line 3: more than one [Interface] section"),
+    (config_text("[Peers]"), "line 5: unknown section [Peers]"),
+    (config_text("just some words"), "line 5: expected 'Key = Value'"),
+    ("[Interface]\nPrivateKey = bm90IGEga2V5", "line 2: privatekey is not a valid WireGuard key"),
+    ("[Peer]\n", "no [Interface] section"),
+    (f"[Interface]\nPrivateKey = {PRIVATE_KEY}\n[Peer]\nEndpoint = vpn:51820", "peer 1 has no PublicKey"),
+])
+def test_validation_errors_name_the_line(text, error):
+    with pytest.raises(wgc.WireGuardConfigError) as excinfo:
+        wgc.parse_config_text(text)
+    assert str(excinfo.value) == error
+
+def test_validate_config_reports_the_file(tmp_path):
+    path = tmp_path / 'site.conf'
+    path.write_text(config_text("AllowedIPs = nonsense"))
+    assert wgc.validate_config(str(path)) == (False, "site.conf: line 5: allowedips has an invalid address 'nonsense'")
+    assert wgc.validate_config(str(tmp_path / 'missing.conf'))[0] is None
+
+def test_load_config_is_cached_until_the_file_changes(wg_config):
+    config = wgc.load_config(wg_config)
+    assert wgc.load_config(wg_config) is config
+    os.utime(wg_config, ns=(0, os.stat(wg_config).st_mtime_ns + 1_000_000_000)) # Touched, same content
+    touched = wgc.load_config(wg_config)
+    assert touched is not config
+    stat = os.stat(wg_config)
+    with open(wg_config, 'a') as f:
+        f.write("PersistentKeepalive = 25\n")
+    os.utime(wg_config, ns=(stat.st_atime_ns, stat.st_mtime_ns)) # Same mtime, new size
+    assert wgc.load_config(wg_config).peers[0]['persistentkeepalive'] == 25
+
+def test_longest_prefix_wins():
+    index = wgc.RouteIndex()
+    index.insert('10.0.0.0/8', 'corp')
+    index.insert('10.1.0.0/16', 'site-a')
+    index.insert('10.1.2.0/24', 'lab')
+    index.insert('10.1.0.0/16', 'duplicate') # The first mapping of a prefix is kept
+    index.insert('fd00::/8', 'ula')
+    index.insert('fd00:1::/32', 'site-b')
+    assert index.prefix_count == 5
+    assert index.lookup('10.1.2.3') == 'lab'
+    assert index.lookup('10.1.3.4') == 'site-a'
+    assert index.lookup('10.200.0.1') == 'corp'
+    assert index.lookup('fd00:1::5') == 'site-b'
+    assert index.lookup('fd12::1') == 'ula'
+    assert index.lookup('192.168.1.1') is None # Miss
+    assert index.lookup('2001:db8::1') is None
+    assert index.lookup('not an address') is None
+
+def test_default_route_matches_everything_of_its_family():
+    index = wgc.RouteIndex()
+    index.insert('0.0.0.0/0', 'full')
+    index.insert('10.0.0.0/8', 'corp')
+    assert index.lookup('8.8.8.8') == 'full'
+    assert index.lookup(' 10.0.0.1 ') == 'corp'
+    assert index.lookup('::1') is None
+
+def test_build_route_index_skips_bad_configs_and_is_cached(tmp_path, wg_config):
+    broken = tmp_path / 'broken.conf'
+    broken.write_text("[Interface]\n")
+    paths = [wg_config, str(broken), str(tmp_path / 'missing.conf')]
+    index, skipped = wgc.build_route_index(paths)
+    assert index.lookup('10.8.0.9') == 'wg0'
+    assert [path for path, _ in skipped] == paths[1:]
+    assert wgc.build_route_index(paths)[0] is index
+    broken.write_text(config_text("AllowedIPs = 192.168.50.0/24"))
+    index, skipped = wgc.build_route_index(paths)
+    assert index.lookup('192.168.50.1') == 'broken' and len(skipped) == 1
@@ -0,0 +1,54 @@
+import socket
+import time
+
+import pytest
+
+import wol_manager as wm
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(2)
+    yield sock
+    sock.close()
+
+def receive(sock, count):
+    return [sock.recvfrom(1024)[0] for _ in range(count)]
+
+def test_magic_packet_bytes(listener):
+    hosts = [{'name': 'pc1', 'mac_address': '00:11:22:aa:bb:cc', 'ip_address': '10.0.0.5'}]
+    results = wm.wake_hosts(hosts, broadcast_address='127.0.0.1', port=listener.getsockname()[1])
+    assert results == [('pc1', True, "Magic packet sent to 00:11:22:aa:bb:cc via 127.0.0.1")]
+    packet, = receive(listener, 1)
+    assert packet == b'\xff' * 6 + bytes.fromhex('001122aabbcc') * 16
+    assert len(packet) == 102
+
+def test_secureon_password_is_appended(listener):
+    hosts = [{'name': 'pc1', 'mac_address': '00-11-22-AA-BB-CC', 'secureon_password': 'de:ad:be:ef:00:01'}]
+    wm.wake_hosts(hosts, broadcast_address='127.0.0.1', port=listener.getsockname()[1])
+    packet, = receive(listener, 1)
+    assert packet[:102] == b'\xff' * 6 + bytes.fromhex('001122aabbcc') * 16
+    assert packet[102:] == bytes.fromhex('deadbeef0001')
+
+def test_packets_are_rate_limited(listener):
+    hosts = [{'name': f"pc{i}", 'mac_address': f"00:11:22:33:44:{i:02x}"} for i in range(3)]
+    start = time.monotonic()
+    results = wm.wake_hosts(hosts, repeat=2, packets_per_second=20.0,
+                            broadcast_address='127.0.0.1', port=listener.getsockname()[1])
+    elapsed = time.monotonic() - start
+    packets = receive(listener, 6)
+    assert elapsed >= 5 / 20 - 0.01 # Six packets, so five intervals of 50 ms
+    assert [packet[6:12] for packet in packets] == [bytes.fromhex(f"0011223344{i:02x}") for i in range(3)] * 2
+    assert [success for _, success, _ in results] == [True] * 3
+
+def test_invalid_mac_is_reported_in_order(listener):
+    hosts = [{'name': 'bad', 'mac_address': 'zz'}, {'name': 'good', 'mac_address': '00:11:22:33:44:55'}]
+    results = wm.wake_hosts(hosts, broadcast_address='127.0.0.1', port=listener.getsockname()[1])
+    assert [(name, success) for name, success, _ in results] == [('bad', False), ('good', True)]
+    assert len(receive(listener, 1)) == 1
+
+def test_directed_broadcast_address():
+    assert wm.get_broadcast_address({'ip_address': '192.168.1.20'}) == '192.168.1.255'
+    assert wm.get_broadcast_address({'ip_address': '10.1.2.3', 'subnet_mask': '255.255.0.0'}) == '10.1.255.255'
+    assert wm.get_broadcast_address({'ip_address': 'not an ip'}) == '255.255.255.255'
@@ -0,0 +1,140 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QGuiApplication, QLinearGradient, QPalette
+from PyQt6.QtWidgets import QApplication
+
+# Everything that differs between themes lives in a QPalette; the Fusion style draws inputs, tabs, tables
+# and progress bars from it, so switching themes is a palette swap. Stylesheet colours are resolved once
+# when a widget is polished, so the only stylesheet is theme-neutral and is set once.
+THEMES = {
+    'dark': {
+        'window_start': '#2c3e50', 'window_stop': '#34495e', 'text': '#ecf0f1',
+        'base': (255, 255, 255, 26), 'alternate_base': (0, 0, 0, 26), 'button': (255, 255, 255, 38),
+        'card_fill': (255, 255, 255, 13), 'card_border': (255, 255, 255, 51),
+        'card_hover_fill': (255, 255, 255, 26), 'card_hover_border': (255, 255, 255, 102),
+    },
+    'light': {
+        'window_start': '#ecf0f1', 'window_stop': '#bdc3c7', 'text': '#2c3e50',
+        'base': (255, 255, 255, 179), 'alternate_base': (255, 255, 255, 128), 'button': (0, 0, 0, 26),
+        'card_fill': (255, 255, 255, 179), 'card_border': (0, 0, 0, 51),
+        'card_hover_fill': (255, 255, 255, 230), 'card_hover_border': (0, 0, 0, 102),
+    },
+}
+ACCENT = '#3498db'
+CARD_SELECTED_FILL = (52, 152, 219, 77)
+CARD_SELECTED_BORDER_WIDTH = 3
+CARD_RADIUS = 8
+DEFAULT_THEME = 'dark' # Used for "System" when the platform does not report a colour scheme
+# Lets widgets under a stylesheet follow application palette changes; set it before creating QApplication
+PROPAGATION_ATTRIBUTE = Qt.ApplicationAttribute.AA_UseStyleSheetPropagationInWidgetStyles
+
+STYLESHEET = """
+    QPushButton {
+        background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #3498db, stop:1 #2980b9);
+        color: white;
+        border: 1px solid #2980b9;
+        padding: 10px 20px;
+        border-radius: 5px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #2980b9, stop:1 #3498db);
+        border: 1px solid #3498db;
+    }
+    QPushButton:pressed {
+        background-color: #2980b9;
+    }
+    QMessageBox QPushButton {
+        background-color: #3498db;
+        border: none;
+        padding: 8px 15px;
+        border-radius: 3px;
+    }
+"""
+
+class Theme:
+    """A theme compiled once: its palette, the window gradient and the colours host cards paint with"""
+
+    def __init__(self, name, colors):
+        self.name = name
+        text = QColor(colors['text'])
+        self.palette = QPalette(QColor(colors['window_start']), QColor(colors['window_start']))
+        for role in (QPalette.ColorRole.WindowText, QPalette.ColorRole.Text, QPalette.ColorRole.ButtonText,
+                     QPalette.ColorRole.ToolTipText):
+            self.palette.setColor(role, text)
+        self.palette.setColor(QPalette.ColorRole.ToolTipBase, QColor(colors['window_stop']))
+        self.palette.setColor(QPalette.ColorRole.Base, QColor(*colors['base']))
+        self.palette.setColor(QPalette.ColorRole.AlternateBase, QColor(*colors['alternate_base']))
+        self.palette.setColor(QPalette.ColorRole.Button, QColor(*colors['button']))
+        self.palette.setColor(QPalette.ColorRole.Highlight, QColor(ACCENT))
+        self.palette.setColor(QPalette.ColorRole.HighlightedText, QColor('white'))
+        muted = QColor(text)
+        muted.setAlpha(128)
+        self.palette.setColor(QPalette.ColorRole.PlaceholderText, muted)
+        for role in (QPalette.ColorRole.WindowText, QPalette.ColorRole.Text, QPalette.ColorRole.ButtonText):
+            self.palette.setColor(QPalette.ColorGroup.Disabled, role, muted)
+        self.window_start = QColor(colors['window_start'])
+        self.window_stop = QColor(colors['window_stop'])
+        self.card_fill = QColor(*colors['card_fill'])
+        self.card_border = QColor(*colors['card_border'])
+        self.card_hover_fill = QColor(*colors['card_hover_fill'])
+        self.card_hover_border = QColor(*colors['card_hover_border'])
+        self.card_selected_fill = QColor(*CARD_SELECTED_FILL)
+        self.card_selected_border = QColor(ACCENT)
+
+    def window_gradient(self, rect):
+        gradient = QLinearGradient(rect.topLeft().toPointF(), rect.bottomRight().toPointF())
+        gradient.setColorAt(0, self.window_start)
+        gradient.setColorAt(1, self.window_stop)
+        return gradient
+
+_compiled = {} # Theme name -> Theme
+_current = None
+
+def get_theme(name):
+    theme = _compiled.get(name)
+    if theme is None:
+        theme = _compiled[name] = Theme(name, THEMES[name])
+    return theme
+
+def resolve(appearance_mode):
+    """Theme name for an appearance mode setting ("Light", "Dark" or "System")"""
+    if appearance_mode == "Light":
+        return 'light'
+    if appearance_mode == "Dark":
+        return 'dark'
+    hints = QGuiApplication.styleHints() if QGuiApplication.instance() is not None else None
+    scheme = hints.colorScheme() if hints is not None and hasattr(hints, 'colorScheme') else None # Qt 6.5+
+    if scheme == Qt.ColorScheme.Light:
+        return 'light'
+    if scheme == Qt.ColorScheme.Dark:
+        return 'dark'
+    return DEFAULT_THEME
+
+def current():
+    return _current or get_theme(DEFAULT_THEME)
+
+def apply_theme(window, appearance_mode):
+    """Switch to the theme for appearance_mode; returns True if anything changed.
+
+    The Fusion style and the stylesheet are set once per window; after
+    that only the application palette (which dialogs follow too) is
+    swapped, and nothing happens if the theme is already active. Without
+    the PROPAGATION_ATTRIBUTE set before QApplication was created, widgets
+    under a stylesheet keep their old palette, so the whole window has to
+    be re-polished instead.
+    """
+    global _current
+    if window.styleSheet() != STYLESHEET:
+        if QApplication.style().name() != 'fusion':
+            QApplication.setStyle('Fusion') # Native styles on Windows and macOS ignore parts of the palette
+        window.setStyleSheet(STYLESHEET)
+    theme = get_theme(resolve(appearance_mode))
+    if theme is _current:
+        return False
+    _current = theme
+    QApplication.setPalette(theme.palette)
+    if not QApplication.testAttribute(PROPAGATION_ATTRIBUTE):
+        window.setStyleSheet("")
+        window.setStyleSheet(STYLESHEET)
+    window.update()
+    return True
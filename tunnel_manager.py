@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import vpn_manager as vm
+import wireguard_config as wgc
+
+NO_TUNNEL = "none" # Host 'tunnel' value for hosts reachable without a VPN
+
+def get_tunnel_paths(settings):
+    """Configured WireGuard config paths; the legacy single wireguard_config_path counts as one tunnel"""
+    paths = settings.get('tunnels')
+    if paths is None:
+        paths = [settings.get('wireguard_config_path', '')]
+    return [path for path in paths if path]
+
+def get_tunnel_name(config_path):
+    return vm.get_tunnel_name(config_path)
+
+def tunnels_for_host(host, tunnel_paths):
+    """Config paths of the tunnels a host needs.
+
+    A host's 'tunnel' key names one tunnel or several separated by commas;
+    'none' means no tunnel. Hosts without one use the tunnel whose AllowedIPs
+    route their IP address (longest prefix wins). If some config could not be
+    read and nothing routes the address, the first tunnel is assumed.
+    """
+    wanted = (host.get('tunnel') or '').strip()
+    if not wanted:
+        index, skipped = wgc.build_route_index(tunnel_paths)
+        name = index.lookup(host.get('ip_address') or '')
+        if name is not None:
+            return [path for path in tunnel_paths if get_tunnel_name(path) == name][:1]
+        return tunnel_paths[:1] if skipped else []
+    if wanted.lower() == NO_TUNNEL:
+        return []
+    by_name = {get_tunnel_name(path): path for path in tunnel_paths}
+    paths = []
+    for name in wanted.split(','):
+        name = name.strip()
+        if name not in by_name:
+            raise KeyError(f"Tunnel {name!r} for host {host.get('name')!r} is not configured")
+        paths.append(by_name[name])
+    return paths
+
+def query_states(tunnel_paths):
+    """Tunnel name -> True/False/None (unknown), from a single interface listing"""
+    return vm.tunnel_states(tunnel_paths, max_age=0)
+
+def _run_parallel(func, tunnel_paths, progress_callback, output_callback, cancel_event):
+    def run(path):
+        success, message = func(path, output_callback, cancel_event)
+        result = (get_tunnel_name(path), success, message)
+        if progress_callback:
+            progress_callback(result)
+        return result
+
+    if not tunnel_paths:
+        return []
+    # Each tunnel is its own interface, so wg-quick / wireguard.exe can bring them up side by side
+    with ThreadPoolExecutor(max_workers=len(tunnel_paths)) as executor:
+        return list(executor.map(run, tunnel_paths))
+
+def connect_tunnels(tunnel_paths, progress_callback=None, output_callback=None, cancel_event=None, endpoints=None):
+    """Bring up tunnels in parallel; returns [(name, success, message)] in the given order.
+
+    Tunnels that are already up are left alone. progress_callback receives
+    each (name, success, message) as soon as that tunnel finishes. endpoints
+    maps tunnel names to alternative endpoints to race against the config's own.
+    """
+    import endpoint_manager as em # Only needed once a tunnel is brought up, so kept out of startup
+    endpoints = endpoints or {}
+
+    def connect(path, output_callback, cancel_event):
+        return em.connect_with_failover(path, endpoints.get(get_tunnel_name(path)), output_callback, cancel_event)
+
+    tunnel_paths = list(dict.fromkeys(tunnel_paths))
+    states = vm.tunnel_states(tunnel_paths, max_age=0)
+    results = {}
+    for path in tunnel_paths:
+        name = get_tunnel_name(path)
+        if states[name] is True:
+            results[path] = (name, True, f"Tunnel {name} is already up.")
+            if progress_callback:
+                progress_callback(results[path])
+    pending = [path for path in tunnel_paths if path not in results]
+    results.update(zip(pending, _run_parallel(connect, pending, progress_callback, output_callback, cancel_event)))
+    return [results[path] for path in tunnel_paths]
+
+def disconnect_tunnels(tunnel_paths, progress_callback=None, output_callback=None, cancel_event=None):
+    return _run_parallel(vm.disconnect_vpn, list(dict.fromkeys(tunnel_paths)), progress_callback, output_callback, cancel_event)
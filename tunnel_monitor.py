@@ -0,0 +1,210 @@
+import subprocess
+import time
+from array import array
+
+import command_runner as cr
+import vpn_manager as vm
+
+DEFAULT_MONITOR_INTERVAL = 1 # Seconds between samples
+HISTORY_LENGTH = 120 # Samples kept per peer
+RATE_WINDOW = 5 # Seconds of history averaged for the displayed rates
+STALE_HANDSHAKE_AFTER = 180 # WireGuard rejects sessions older than this (REJECT_AFTER_TIME)
+SAMPLE_TIMEOUT = 5
+
+class PeerHistory:
+    """Fixed-size ring buffer of (time, rx bytes, tx bytes) samples for one peer.
+
+    The samples live in three preallocated arrays of doubles, so a peer costs
+    the same 24 bytes per slot no matter how long the monitor runs.
+    """
+    __slots__ = ('times', 'rx', 'tx', 'head', 'count', 'latest_handshake', 'endpoint', 'keepalive')
+
+    def __init__(self, size=HISTORY_LENGTH):
+        self.times = array('d', bytes(8 * size))
+        self.rx = array('d', bytes(8 * size))
+        self.tx = array('d', bytes(8 * size))
+        self.head = 0 # Slot the next sample goes into
+        self.count = 0
+        self.latest_handshake = 0 # Unix time; 0 means never
+        self.endpoint = None
+        self.keepalive = 0
+
+    def append(self, timestamp, rx, tx):
+        head = self.head
+        self.times[head] = timestamp
+        self.rx[head] = rx
+        self.tx[head] = tx
+        self.head = (head + 1) % len(self.times)
+        if self.count < len(self.times):
+            self.count += 1
+
+    def _slot(self, age):
+        """Slot of the sample `age` positions before the newest one"""
+        return (self.head - 1 - age) % len(self.times)
+
+    def span(self):
+        """Seconds between the oldest and newest sample held"""
+        if self.count < 2:
+            return 0.0
+        return self.times[self._slot(0)] - self.times[self._slot(self.count - 1)]
+
+    def rates(self, window=RATE_WINDOW):
+        """(rx, tx) in bytes per second over roughly the last `window` seconds"""
+        if self.count < 2:
+            return 0.0, 0.0
+        size = len(self.times)
+        newest = (self.head - 1) % size
+        interval = self.times[newest] - self.times[(newest - 1) % size]
+        # Samples arrive at a steady interval, so the start of the window is found without walking the ring
+        back = min(self.count - 1, max(1, round(window / interval))) if interval > 0 else 1
+        oldest = (newest - back) % size
+        elapsed = self.times[newest] - self.times[oldest]
+        if elapsed <= 0:
+            return 0.0, 0.0
+        # Counters restart from zero when the interface is recreated
+        return (max(0.0, self.rx[newest] - self.rx[oldest]) / elapsed,
+                max(0.0, self.tx[newest] - self.tx[oldest]) / elapsed)
+
+    def handshake_age(self, now=None):
+        if not self.latest_handshake:
+            return None
+        return max(0.0, (now or time.time()) - self.latest_handshake)
+
+    def is_stale(self, now=None, threshold=STALE_HANDSHAKE_AFTER):
+        """True if the peer should have handshaken recently but has not.
+
+        WireGuard only handshakes when there is traffic to send, so an idle
+        peer without PersistentKeepalive is never considered stale.
+        """
+        age = self.handshake_age(now)
+        if age is not None and age <= threshold:
+            return False
+        if age is None and self.span() <= threshold:
+            return False # Give a fresh tunnel time for its first handshake
+        if self.keepalive:
+            return True
+        return self.rates()[1] > 0
+
+    def awaiting_first_handshake(self, threshold):
+        """True if the peer has been trying for `threshold` seconds without ever completing a handshake"""
+        return not self.latest_handshake and self.span() > threshold and bool(self.keepalive or self.rates()[1] > 0)
+
+def parse_dump(text):
+    """Parse `wg show all dump` into {interface: [(public key, endpoint, latest handshake, rx, tx, keepalive)]}"""
+    interfaces = {}
+    for line in text.splitlines():
+        fields = line.split('\t')
+        if len(fields) == 5: # interface, private key, public key, listen port, fwmark
+            interfaces.setdefault(fields[0], [])
+        elif len(fields) == 9: # interface, public key, preshared key, endpoint, allowed ips, handshake, rx, tx, keepalive
+            interface, public_key, _, endpoint, _, handshake, rx, tx, keepalive = fields
+            interfaces.setdefault(interface, []).append((
+                public_key, None if endpoint == '(none)' else endpoint, int(handshake), int(rx), int(tx),
+                0 if keepalive == 'off' else int(keepalive)))
+    return interfaces
+
+class TunnelMonitor:
+    """Samples every WireGuard interface with one `wg show all dump` per tick"""
+
+    def __init__(self, history_length=HISTORY_LENGTH):
+        self.history_length = history_length
+        self.peers = {} # interface -> {public key: PeerHistory}
+
+    def sample(self, first_handshake_timeout=None):
+        """Take one sample; returns (True, summaries) or (False, error message)"""
+        try:
+            result = cr.run_command([vm.get_wg_command(), "show", "all", "dump"], timeout=SAMPLE_TIMEOUT, check=True)
+        except FileNotFoundError:
+            return False, "wg command not found; tunnel statistics are unavailable."
+        except subprocess.CalledProcessError as e:
+            return False, f"Could not read tunnel statistics: {(e.stderr or '').strip()}"
+        except subprocess.TimeoutExpired:
+            return False, "Reading tunnel statistics timed out."
+        return True, self.record(parse_dump(result.stdout), first_handshake_timeout=first_handshake_timeout)
+
+    def record(self, interfaces, now=None, timestamp=None, first_handshake_timeout=None):
+        now = now or time.time()
+        timestamp = timestamp or time.monotonic()
+        for interface, peers in interfaces.items():
+            histories = self.peers.setdefault(interface, {})
+            seen = set()
+            for public_key, endpoint, handshake, rx, tx, keepalive in peers:
+                history = histories.get(public_key)
+                if history is None:
+                    history = histories[public_key] = PeerHistory(self.history_length)
+                history.append(timestamp, rx, tx)
+                history.latest_handshake = handshake
+                history.endpoint = endpoint
+                history.keepalive = keepalive
+                seen.add(public_key)
+            for public_key in [key for key in histories if key not in seen]:
+                del histories[public_key]
+        for interface in [name for name in self.peers if name not in interfaces]:
+            del self.peers[interface]
+        return {interface: self.summary(interface, now, first_handshake_timeout) for interface in interfaces}
+
+    def summary(self, interface, now=None, first_handshake_timeout=None):
+        """Totals for one interface: rx/tx rates, youngest handshake age, the first peer's endpoint
+        and whether every peer is stale (or, with first_handshake_timeout, never handshook in time)"""
+        histories = list(self.peers.get(interface, {}).values())
+        rx_rate = tx_rate = 0.0
+        ages = []
+        for history in histories:
+            rx, tx = history.rates()
+            rx_rate += rx
+            tx_rate += tx
+            age = history.handshake_age(now)
+            if age is not None:
+                ages.append(age)
+        return {
+            'peers': len(histories),
+            'rx_rate': rx_rate,
+            'tx_rate': tx_rate,
+            'handshake_age': min(ages) if ages else None,
+            'endpoint': histories[0].endpoint if histories else None,
+            'stale': bool(histories) and all(history.is_stale(now) for history in histories),
+            'no_handshake': bool(histories) and first_handshake_timeout is not None and all(
+                history.awaiting_first_handshake(first_handshake_timeout) for history in histories)
+        }
+
+    def forget(self, interface):
+        self.peers.pop(interface, None)
+
+def format_rate(bytes_per_second):
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bytes_per_second < 1024:
+            return f"{bytes_per_second:.0f} {unit}"
+        bytes_per_second /= 1024
+    return f"{bytes_per_second:.1f} GB/s"
+
+def format_summary(summary):
+    age = summary['handshake_age']
+    handshake = "no handshake" if age is None else f"handshake {age:.0f} s ago"
+    return f"↓ {format_rate(summary['rx_rate'])} ↑ {format_rate(summary['tx_rate'])}, {handshake}"
+
+if __name__ == "__main__":
+    # Sampling cost at one-second intervals across many peers: python tunnel_monitor.py
+    import tracemalloc
+
+    peer_count = 2000
+    now = int(time.time())
+    lines = [f"wg{i // 100}\tpriv\tpub\t51820\toff" for i in range(0, peer_count, 100)]
+    lines += [f"wg{i // 100}\tpeer{i}=\t(none)\t203.0.113.{i % 250}:51820\t10.{i // 250}.{i % 250}.0/24\t{now - i % 200}\t"
+              f"{i * 1000}\t{i * 500}\t25" for i in range(peer_count)]
+    dump = "\n".join(lines)
+
+    monitor = TunnelMonitor()
+    start = time.perf_counter()
+    for tick in range(HISTORY_LENGTH):
+        monitor.record(parse_dump(dump), now + tick, timestamp=1000.0 + tick) # As if sampled once a second
+    elapsed = (time.perf_counter() - start) / HISTORY_LENGTH * 1000
+
+    tracemalloc.start()
+    monitor = TunnelMonitor()
+    for tick in range(HISTORY_LENGTH):
+        monitor.record(parse_dump(dump), now + tick, timestamp=1000.0 + tick)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{peer_count} peers on {len(lines) - peer_count} interfaces")
+    print(f"  parse + record + summarize: {elapsed:.1f} ms per sample")
+    print(f"  memory with {HISTORY_LENGTH} samples per peer: {memory / 1e6:.1f} MB")
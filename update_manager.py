@@ -1,46 +1,245 @@
 import requests
+import json
 import platform
 import os
+import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
+
+import download_manager as dm
+import patch_manager as pam
+from version import CURRENT_VERSION
 
 GITHUB_REPO = "EmmanouelKontos/vpn-rdp-tool"  # Replace with your actual GitHub username and repo name
-CURRENT_VERSION = "v1.0.8"  # This should be updated with each release
 
-def get_latest_release():
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching latest release: {e}")
+RELEASE_CACHE_FILE = 'release_cache.json'
+RELEASE_CACHE_TTL = 6 * 3600 # Seconds the cached release is trusted before it is revalidated
+API_TIMEOUT = (5, 10) # Connect and read timeouts for GitHub API calls
+RECENT_RELEASES = 20 # Releases searched for a chain of delta patches
+NON_BINARY_SUFFIXES = ('.sha256', '.zst', '.bsdiff', '.txt') # Checksums and patches published next to the binaries
+
+_VERSION_PATTERN = re.compile(r'^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Shared requests.Session, so API calls, checksum fetches and downloads reuse connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers['User-Agent'] = f"UniversalVPNTool/{CURRENT_VERSION}"
+        return _session
+
+def parse_version(tag):
+    """Sortable key for a semantic version tag such as 'v1.2.3' or '1.2.0-rc.1', or None if it is not one.
+
+    A pre-release sorts before its release, and numeric pre-release fields
+    compare as numbers, so v1.0.10 > v1.0.9 and 1.0.0-rc.10 > 1.0.0-rc.9.
+    """
+    match = _VERSION_PATTERN.match(tag.strip()) if tag else None
+    if not match:
         return None
+    major, minor, patch, prerelease = match.groups()
+    core = (int(major), int(minor or 0), int(patch or 0))
+    if prerelease is None:
+        return core + ((1,),)
+    fields = tuple((0, int(field), '') if field.isdigit() else (1, 0, field) for field in prerelease.split('.'))
+    return core + ((0,) + fields,)
+
+def is_newer(tag, current=CURRENT_VERSION):
+    latest, installed = parse_version(tag), parse_version(current)
+    return latest is not None and installed is not None and latest > installed
+
+def _load_release_cache():
+    """API URL -> {'etag', 'fetched_at', 'data'}"""
+    try:
+        with open(RELEASE_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_release_cache(cache):
+    temp_path = f"{RELEASE_CACHE_FILE}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(temp_path, RELEASE_CACHE_FILE)
+    except OSError as e:
+        print(f"Error saving release cache: {e}")
+
+def _cached_api_get(path, max_age):
+    """JSON from the GitHub API, served from the on-disk cache while it is younger than max_age.
+
+    An older entry is revalidated with If-None-Match, so an unchanged answer
+    costs a 304 (which GitHub does not count against the rate limit). If
+    GitHub cannot be reached, the cached answer is returned however old it is.
+    """
+    url = f"https://api.github.com/repos/{GITHUB_REPO}/{path}"
+    cache = _load_release_cache()
+    entry = cache.get(url)
+    if not isinstance(entry, dict) or 'data' not in entry:
+        entry = None
+    if entry is not None and time.time() - entry.get('fetched_at', 0) < max_age:
+        return entry['data']
+    headers = {'Accept': 'application/vnd.github+json'}
+    if entry is not None and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    try:
+        response = get_session().get(url, headers=headers, timeout=API_TIMEOUT)
+        if response.status_code == 304:
+            entry['fetched_at'] = time.time()
+        else:
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            entry = {'etag': response.headers.get('ETag'), 'fetched_at': time.time(), 'data': response.json()}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching {path}: {e}")
+        return entry['data'] if entry is not None else None
+    cache[url] = entry
+    _save_release_cache(cache)
+    return entry['data']
+
+def get_latest_release(max_age=RELEASE_CACHE_TTL):
+    """Latest release metadata; see _cached_api_get for how it is cached"""
+    release = _cached_api_get("releases/latest", max_age)
+    return release if isinstance(release, dict) else None
 
-def check_for_updates():
-    latest_release = get_latest_release()
+def get_recent_releases(max_age=RELEASE_CACHE_TTL):
+    """Up to RECENT_RELEASES newest releases, newest first, for finding delta patches"""
+    releases = _cached_api_get(f"releases?per_page={RECENT_RELEASES}", max_age)
+    return releases if isinstance(releases, list) else []
+
+def check_for_updates(max_age=RELEASE_CACHE_TTL):
+    latest_release = get_latest_release(max_age)
     if latest_release:
-        latest_version = latest_release['tag_name']
-        if latest_version > CURRENT_VERSION:
+        latest_version = latest_release.get('tag_name')
+        if is_newer(latest_version):
             return True, latest_version, latest_release['assets']
     return False, None, None
 
-def download_asset(asset_url, download_path, progress_callback=None):
+def get_asset_checksum(asset, assets):
+    """Published SHA-256 of a release asset, or None if the release does not publish one.
+
+    Uses the digest GitHub reports for the asset, falling back to a
+    '<name>.sha256' or SHA256SUMS file attached to the same release.
+    """
+    digest = asset.get('digest') or ''
+    if digest.startswith('sha256:'):
+        return digest[len('sha256:'):]
+    by_name = {a['name']: a for a in assets}
+    for name in (f"{asset['name']}.sha256", "SHA256SUMS", "SHA256SUMS.txt", "checksums.txt"):
+        if name not in by_name:
+            continue
+        try:
+            response = get_session().get(by_name[name]['browser_download_url'], timeout=(dm.CONNECT_TIMEOUT, dm.READ_TIMEOUT))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {name}: {e}")
+            return None
+        for line in response.text.splitlines(): # "<hex>  <file name>", or just "<hex>" in a .sha256 file
+            fields = line.split()
+            if fields and len(fields[0]) == 64 and (len(fields) == 1 or fields[-1].lstrip('*') == asset['name']):
+                return fields[0].lower()
+    return None
+
+def download_asset(asset_url, download_path, progress_callback=None, expected_sha256=None, cancel_event=None,
+                   segments=1):
+    """Download an asset with download_manager; returns (success, message).
+
+    An interrupted download resumes on the next call with the same path.
+    progress_callback receives (downloaded, total, bytes per second, seconds left).
+    """
     try:
-        response = requests.get(asset_url, stream=True)
-        response.raise_for_status()
-
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded_size = 0
-
-        with open(download_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded_size += len(chunk)
-                if progress_callback:
-                    progress_callback(downloaded_size, total_size)
-        return True, ""
-    except requests.exceptions.RequestException as e:
+        digest = dm.download(asset_url, download_path, expected_sha256, progress_callback, cancel_event, segments,
+                             session=get_session())
+    except dm.DownloadError as e:
         return False, str(e)
+    verified = "verified" if expected_sha256 else "not verified, no published checksum"
+    return True, f"SHA-256 {digest} ({verified})"
+
+def _release_checksum(release, asset_name):
+    if release is None:
+        return None
+    for asset in release.get('assets', []):
+        if asset['name'] == asset_name:
+            return get_asset_checksum(asset, release['assets'])
+    return None
+
+def _download_patched(asset, latest_version, current_path, download_path, expected_sha256, progress_callback,
+                      cancel_event):
+    """Build the new binary from current_path with the cheapest chain of published patches.
+
+    Returns a message, or None when no chain is smaller than the full asset.
+    Every intermediate result is checked against its release's checksum when
+    one is published, and the final one always is. Raises DownloadError or
+    PatchError if the chain cannot be used.
+    """
+    releases = get_recent_releases()
+    chain = pam.plan_chain(pam.find_patches(releases, asset['name']), CURRENT_VERSION, latest_version)
+    if not chain:
+        return None
+    patch_size = sum(step.size for step in chain)
+    if asset.get('size') and patch_size >= asset['size']:
+        return None
+    by_tag = {release.get('tag_name'): release for release in releases}
+    installed_sha256 = _release_checksum(by_tag.get(CURRENT_VERSION), asset['name'])
+    if installed_sha256 and pam.file_sha256(current_path) != installed_sha256:
+        raise pam.PatchError(f"the running binary is not the published {CURRENT_VERSION} build")
+
+    work_dir = tempfile.mkdtemp(prefix='update-', dir=os.path.dirname(download_path) or '.')
+    try:
+        source = current_path
+        for step in chain:
+            patch_path = os.path.join(work_dir, step.asset['name'])
+            dm.download(step.asset['browser_download_url'], patch_path, get_asset_checksum(step.asset, []),
+                        progress_callback, cancel_event, session=get_session())
+            output_path = os.path.join(work_dir, f"{asset['name']}.{step.target}")
+            digest = pam.apply_patch(source, patch_path, output_path, step.format)
+            os.remove(patch_path)
+            if source != current_path:
+                os.remove(source)
+            wanted = expected_sha256 if step.target == latest_version else _release_checksum(by_tag.get(step.target), asset['name'])
+            if wanted and digest != wanted:
+                raise pam.PatchError(f"patching to {step.target} produced a file with the wrong checksum")
+            source = output_path
+        os.replace(source, download_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return (f"Applied {len(chain)} patch(es): {patch_size / 1e6:.1f} MB instead of {asset.get('size', 0) / 1e6:.1f} MB, "
+            f"SHA-256 {expected_sha256} (verified)")
+
+def download_update(assets, latest_version, download_path, progress_callback=None, cancel_event=None, segments=1,
+                    current_path=None, expected_sha256=None):
+    """Download the update for this OS to download_path; returns (success, message).
+
+    With current_path (the running binary), a chain of delta patches from
+    CURRENT_VERSION is used when recent releases publish one that is smaller
+    than the full binary and the release publishes the binary's checksum.
+    Otherwise, or if anything goes wrong with the patches, the full binary
+    is downloaded. expected_sha256 saves looking the checksum up again when
+    the caller already has it.
+    """
+    asset = get_appropriate_asset(assets)
+    if asset is None:
+        return False, "No update is published for this operating system."
+    expected_sha256 = expected_sha256 or get_asset_checksum(asset, assets)
+    if current_path and expected_sha256 and pam.supported_formats():
+        try:
+            message = _download_patched(asset, latest_version, current_path, download_path, expected_sha256,
+                                        progress_callback, cancel_event)
+            if message:
+                return True, message
+        except dm.DownloadCancelled as e:
+            return False, str(e)
+        except (dm.DownloadError, pam.PatchError, OSError) as e:
+            print(f"Delta update failed, downloading the full binary instead: {e}")
+    return download_asset(asset['browser_download_url'], download_path, progress_callback, expected_sha256,
+                          cancel_event, segments)
 
 def get_appropriate_asset(assets):
     system = platform.system()
@@ -51,7 +250,8 @@ def get_appropriate_asset(assets):
     elif system == "Linux":
         for asset in assets:
             # Assuming Linux executable has no extension or a .run/.bin extension
-            if "UniversalVPNTool" in asset['name'] and not asset['name'].endswith(".exe"):
+            if ("UniversalVPNTool" in asset['name'] and not asset['name'].endswith(".exe")
+                    and not asset['name'].endswith(NON_BINARY_SUFFIXES)):
                 return asset
     return None
 
@@ -63,9 +263,10 @@ if __name__ == "__main__":
         asset_to_download = get_appropriate_asset(assets)
         if asset_to_download:
             print(f"Downloading {asset_to_download['name']}...")
-            download_success, error_message = download_asset(asset_to_download['browser_download_url'], asset_to_download['name'])
+            download_success, error_message = download_asset(asset_to_download['browser_download_url'], asset_to_download['name'],
+                                                             expected_sha256=get_asset_checksum(asset_to_download, assets))
             if download_success:
-                print("Download complete!")
+                print(f"Download complete! {error_message}")
             else:
                 print(f"Download failed: {error_message}")
         else:
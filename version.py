@@ -0,0 +1 @@
+CURRENT_VERSION = "v1.0.8"  # This should be updated with each release
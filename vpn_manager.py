@@ -1,6 +1,18 @@
 import subprocess
 import platform
 import os
+import time
+
+import command_runner as cr
+import netlink_backend as nb
+import wireguard_config as wgc
+
+COMMAND_TIMEOUT = 30 # wg-quick / wireguard.exe normally finish within a few seconds
+QUERY_TIMEOUT = 5
+STATE_CACHE_TTL = 2.0 # Seconds a queried tunnel state stays valid
+_state_cache = {} # tunnel name -> (queried_at, active)
+_netlink_enabled = True
+_netlink_tunnels = set() # Tunnels this process brought up over netlink, so they are torn down the same way
 
 def find_wireguard_windows():
     """Search for WireGuard executable in common locations"""
@@ -14,10 +26,117 @@ def find_wireguard_windows():
     # Fall back to PATH lookup
     return "wireguard.exe"
 
-def connect_vpn(config_path):
+def find_wg_windows():
+    """wg.exe ships next to wireguard.exe"""
+    return os.path.join(os.path.dirname(find_wireguard_windows()), "wg.exe")
+
+def get_tunnel_name(config_path):
+    return os.path.splitext(os.path.basename(config_path))[0]
+
+def get_wg_command():
+    return find_wg_windows() if platform.system() == "Windows" else "wg"
+
+def list_active_tunnels():
+    """Names of the WireGuard interfaces that are currently up, or None if that cannot be determined"""
+    system = platform.system()
+    try:
+        result = cr.run_command([get_wg_command(), "show", "interfaces"], timeout=QUERY_TIMEOUT, check=True)
+        return set(result.stdout.split())
+    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        pass
+    if system == "Linux":
+        # Listing links needs no privileges, unlike most wg commands
+        try:
+            active = set()
+            for name in os.listdir("/sys/class/net"):
+                with open(os.path.join("/sys/class/net", name, "uevent"), 'r') as f:
+                    if "DEVTYPE=wireguard" in f.read():
+                        active.add(name)
+            return active
+        except OSError:
+            return None
+    return None
+
+def _query_windows_service(tunnel_name):
+    try:
+        result = cr.run_command(["sc", "query", f"WireGuardTunnel${tunnel_name}"], timeout=QUERY_TIMEOUT)
+        return "RUNNING" in result.stdout
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+
+def tunnel_states(config_paths, max_age=STATE_CACHE_TTL):
+    """Tunnel name -> True (up), False (down) or None (unknown) for each config path.
+
+    Results are cached for max_age seconds so UI refreshes don't spawn a
+    process each time; stale entries are refreshed from one interface listing.
+    """
+    names = [get_tunnel_name(path) for path in config_paths]
+    now = time.monotonic()
+    stale = [name for name in names if name not in _state_cache or now - _state_cache[name][0] >= max_age]
+    if stale:
+        active_tunnels = list_active_tunnels()
+        for name in stale:
+            if active_tunnels is not None:
+                active = name in active_tunnels
+            elif platform.system() == "Windows":
+                active = _query_windows_service(name)
+            else:
+                active = None
+            _state_cache[name] = (time.monotonic(), active)
+    return {name: _state_cache[name][1] for name in names}
+
+def is_tunnel_active(config_path, max_age=STATE_CACHE_TTL):
+    return tunnel_states([config_path], max_age)[get_tunnel_name(config_path)]
+
+def invalidate_tunnel_state(config_path=None):
+    if config_path is None:
+        _state_cache.clear()
+    else:
+        _state_cache.pop(get_tunnel_name(config_path), None)
+
+def set_netlink_enabled(enabled):
+    """Use the netlink backend on Linux when pyroute2 is installed and the config allows it"""
+    global _netlink_enabled
+    _netlink_enabled = enabled
+
+def _connect_netlink(config_path, output_callback):
+    """Try bringing the tunnel up over netlink; returns a success message, or None to fall back to wg-quick"""
+    if not (_netlink_enabled and platform.system() == "Linux" and nb.is_available()):
+        return None
+    try:
+        config = wgc.load_config(config_path)
+    except (OSError, wgc.WireGuardConfigError):
+        return None
+    reason = nb.unsupported_reason(config)
+    if reason:
+        if output_callback:
+            output_callback(f"[netlink] {config.name}: {reason}; using wg-quick")
+        return None
+    start = time.perf_counter()
+    try:
+        nb.bring_up(config)
+    except Exception as e:
+        if output_callback:
+            output_callback(f"[netlink] {config.name}: {e}; falling back to wg-quick")
+        return None
+    _netlink_tunnels.add(config.name)
+    if output_callback:
+        output_callback(f"[netlink] {config.name} up after {(time.perf_counter() - start) * 1000:.1f} ms")
+    return f"Successfully connected to VPN using {config_path}"
+
+def connect_vpn(config_path, output_callback=None, cancel_event=None):
     system = platform.system()
-    # Attempt to disconnect first to ensure a clean state
-    disconnect_vpn(config_path) 
+    # Catch a broken config before paying for a wg-quick round trip; unreadable (root-only) files are left to wg-quick
+    valid, message = wgc.validate_config(config_path)
+    if valid is False:
+        return False, f"Invalid WireGuard config: {message}"
+    # Only tear down a tunnel that is actually up (or whose state is unknown)
+    if is_tunnel_active(config_path) is not False:
+        disconnect_vpn(config_path, output_callback, cancel_event)
+    message = _connect_netlink(config_path, output_callback)
+    if message:
+        invalidate_tunnel_state(config_path)
+        return True, message
     try:
         if system == "Windows":
             wg_path = find_wireguard_windows()
@@ -27,19 +146,35 @@ def connect_vpn(config_path):
         else:
             raise OSError(f"Unsupported OS: {system}")
 
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        cr.run_command(cmd, timeout=COMMAND_TIMEOUT, cancel_event=cancel_event, output_callback=output_callback, check=True)
+        invalidate_tunnel_state(config_path)
         return True, f"Successfully connected to VPN using {config_path}"
     except FileNotFoundError:
         return False, "WireGuard command not found. Is WireGuard installed and in your PATH?"
     except subprocess.CalledProcessError as e:
         return False, f"VPN connection failed:\n{e.stderr}"
+    except subprocess.TimeoutExpired:
+        invalidate_tunnel_state(config_path)
+        return False, f"VPN connection timed out after {COMMAND_TIMEOUT} seconds."
+    except cr.CommandCancelled:
+        invalidate_tunnel_state(config_path)
+        return False, "VPN connection cancelled."
     except Exception as e:
         return False, str(e)
 
-def disconnect_vpn(config_path):
+def disconnect_vpn(config_path, output_callback=None, cancel_event=None):
     system = platform.system()
+    tunnel_name = get_tunnel_name(config_path)
+    if tunnel_name in _netlink_tunnels:
+        _netlink_tunnels.discard(tunnel_name)
+        try:
+            nb.tear_down(tunnel_name)
+            invalidate_tunnel_state(config_path)
+            return True, f"Successfully disconnected from VPN using {config_path}"
+        except Exception as e:
+            if output_callback:
+                output_callback(f"[netlink] {tunnel_name}: {e}; falling back to wg-quick")
     try:
-        tunnel_name = os.path.splitext(os.path.basename(config_path))[0]
         if system == "Windows":
             wg_path = find_wireguard_windows()
             cmd = [wg_path, "/uninstalltunnelservice", tunnel_name]
@@ -48,7 +183,8 @@ def disconnect_vpn(config_path):
         else:
             raise OSError(f"Unsupported OS: {system}")
 
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        cr.run_command(cmd, timeout=COMMAND_TIMEOUT, cancel_event=cancel_event, output_callback=output_callback, check=True)
+        invalidate_tunnel_state(config_path)
         return True, f"Successfully disconnected from VPN using {config_path}"
     except FileNotFoundError:
         return False, "WireGuard command not found. Is WireGuard installed and in your PATH?"
@@ -57,5 +193,11 @@ def disconnect_vpn(config_path):
         if "Tunnel not found" in e.stderr or "No such device" in e.stderr:
             return True, f"VPN tunnel {tunnel_name} was not active or already disconnected."
         return False, f"VPN disconnection failed:\n{e.stderr}"
+    except subprocess.TimeoutExpired:
+        invalidate_tunnel_state(config_path)
+        return False, f"VPN disconnection timed out after {COMMAND_TIMEOUT} seconds."
+    except cr.CommandCancelled:
+        invalidate_tunnel_state(config_path)
+        return False, "VPN disconnection cancelled."
     except Exception as e:
         return False, str(e)
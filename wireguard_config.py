@@ -0,0 +1,282 @@
+import base64
+import binascii
+import ipaddress
+import os
+
+KEY_LENGTH = 32 # WireGuard keys are 32 bytes, base64 encoded
+
+# Keys wg-quick accepts; anything else is a typo that would only surface after a wg-quick round trip
+INTERFACE_KEYS = {'privatekey', 'listenport', 'fwmark', 'address', 'dns', 'mtu', 'table',
+                  'preup', 'postup', 'predown', 'postdown', 'saveconfig'}
+PEER_KEYS = {'publickey', 'presharedkey', 'allowedips', 'endpoint', 'persistentkeepalive'}
+
+_config_cache = {} # path -> ((mtime, size), WireGuardConfig)
+_index_cache = {} # tuple of (path, mtime, size) -> (RouteIndex, skipped configs)
+
+class WireGuardConfigError(ValueError):
+    pass
+
+class WireGuardConfig:
+    """Parsed wg-quick config: `interface` is a dict, `peers` a list of dicts (keys lowercased)"""
+
+    def __init__(self, path, interface, peers):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.interface = interface
+        self.peers = peers
+
+    def allowed_ips(self):
+        return [network for peer in self.peers for network in peer.get('allowedips', [])]
+
+    def endpoints(self):
+        return [peer['endpoint'] for peer in self.peers if 'endpoint' in peer]
+
+def _check_key(value, key, line_number):
+    try:
+        if len(base64.b64decode(value, validate=True)) == KEY_LENGTH:
+            return value
+    except binascii.Error:
+        pass
+    raise WireGuardConfigError(f"line {line_number}: {key} is not a valid WireGuard key")
+
+def _check_int(value, key, line_number, low, high):
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or not low <= number <= high:
+        raise WireGuardConfigError(f"line {line_number}: {key} must be a number between {low} and {high}")
+    return number
+
+def _check_networks(value, key, line_number, parse=ipaddress.ip_network):
+    networks = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(parse(item) if parse is ipaddress.ip_interface else parse(item, strict=False))
+        except ValueError:
+            raise WireGuardConfigError(f"line {line_number}: {key} has an invalid address {item!r}") from None
+    return networks
+
+def parse_endpoint(value):
+    """Split 'host:port' or '[v6]:port' into (host, port); raises ValueError"""
+    host, sep, port = value.rpartition(':')
+    if not sep or not host:
+        raise ValueError(f"endpoint {value!r} has no port")
+    if host.startswith('['):
+        if not host.endswith(']'):
+            raise ValueError(f"endpoint {value!r} has an unterminated IPv6 address")
+        host = host[1:-1]
+    elif ':' in host:
+        raise ValueError(f"IPv6 endpoint {value!r} must be written as [address]:port")
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"endpoint {value!r} has an invalid port")
+    return host, int(port)
+
+def _parse_value(key, value, line_number):
+    if key in ('privatekey', 'publickey', 'presharedkey'):
+        return _check_key(value, key, line_number)
+    if key == 'listenport':
+        return _check_int(value, key, line_number, 0, 65535)
+    if key == 'mtu':
+        return _check_int(value, key, line_number, 576, 65535)
+    if key == 'fwmark':
+        try:
+            return 0 if value == 'off' else int(value, 0)
+        except ValueError:
+            raise WireGuardConfigError(f"line {line_number}: fwmark must be a number or 'off'") from None
+    if key == 'persistentkeepalive':
+        return 0 if value == 'off' else _check_int(value, key, line_number, 0, 65535)
+    if key == 'address':
+        return _check_networks(value, key, line_number, ipaddress.ip_interface) # Keeps the host part
+    if key == 'allowedips':
+        return _check_networks(value, key, line_number)
+    if key == 'endpoint':
+        try:
+            parse_endpoint(value)
+        except ValueError as e:
+            raise WireGuardConfigError(f"line {line_number}: {e}") from None
+    return value
+
+def parse_config_text(text, path='wg0.conf'):
+    """Parse and validate config text; raises WireGuardConfigError naming the offending line"""
+    interface = None
+    peers = []
+    section = None
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue # Like wg-quick, only whole lines are comments; a '#' inside PostUp and friends is the shell's
+        if line.startswith('[') and line.endswith(']'):
+            name = line[1:-1].strip().lower()
+            if name == 'interface':
+                if interface is not None:
+                    raise WireGuardConfigError(f"line {line_number}: more than one [Interface] section")
+                interface = section = {}
+            elif name == 'peer':
+                section = {}
+                peers.append(section)
+            else:
+                raise WireGuardConfigError(f"line {line_number}: unknown section [{line[1:-1]}]")
+            continue
+        key, sep, value = line.partition('=')
+        key, value = key.strip().lower(), value.strip()
+        if not sep or not key:
+            raise WireGuardConfigError(f"line {line_number}: expected 'Key = Value'")
+        if section is None:
+            raise WireGuardConfigError(f"line {line_number}: {key} appears before any section")
+        allowed = INTERFACE_KEYS if section is interface else PEER_KEYS
+        if key not in allowed:
+            raise WireGuardConfigError(f"line {line_number}: unknown key {key!r}")
+        value = _parse_value(key, value, line_number)
+        if key in ('address', 'allowedips', 'dns', 'preup', 'postup', 'predown', 'postdown') and key in section:
+            # These may be repeated; wg-quick concatenates them
+            section[key] = section[key] + value if isinstance(value, list) else f"{section[key]}, {value}"
+        else:
+            section[key] = value
+    if interface is None:
+        raise WireGuardConfigError("no [Interface] section")
+    if 'privatekey' not in interface:
+        raise WireGuardConfigError("[Interface] has no PrivateKey")
+    for number, peer in enumerate(peers, 1):
+        if 'publickey' not in peer:
+            raise WireGuardConfigError(f"peer {number} has no PublicKey")
+    return WireGuardConfig(path, interface, peers)
+
+def load_config(path):
+    """Parse a config file, reusing the cached result while its mtime and size are unchanged.
+
+    Raises OSError if the file cannot be read (wg-quick configs are often
+    root-only) and WireGuardConfigError if it is invalid.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, 'r') as f:
+        try:
+            config = parse_config_text(f.read(), path)
+        except WireGuardConfigError as e:
+            raise WireGuardConfigError(f"{os.path.basename(path)}: {e}") from None
+    _config_cache[path] = (signature, config)
+    return config
+
+def validate_config(path):
+    """(True, message) if the config parses, (None, message) if it cannot be read, (False, error) if it is invalid"""
+    try:
+        config = load_config(path)
+    except WireGuardConfigError as e:
+        return False, str(e)
+    except OSError as e:
+        return None, f"Could not read {path}: {e.strerror}"
+    return True, f"{config.name}: {len(config.peers)} peer(s), {len(config.allowed_ips())} allowed prefix(es)"
+
+class RouteIndex:
+    """Binary radix trie over network prefixes for longest-prefix matching.
+
+    Each node is a list [zero child, one child, value]. A lookup walks at most
+    one node per prefix bit (32 for IPv4, 128 for IPv6), however many prefixes
+    are stored.
+    """
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self.prefix_count = 0
+
+    def insert(self, network, value):
+        """Map a network to value; an existing identical prefix keeps its first value"""
+        network = ipaddress.ip_network(network, strict=False)
+        bits = network.max_prefixlen
+        address = int(network.network_address)
+        node = self._roots[network.version]
+        for i in range(network.prefixlen):
+            bit = (address >> (bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            node[2] = value
+            self.prefix_count += 1
+
+    def lookup(self, ip_address):
+        """Value of the longest prefix containing ip_address, or None if it is not routed"""
+        try:
+            address = ipaddress.ip_address(ip_address.strip())
+        except ValueError:
+            return None
+        bits = address.max_prefixlen
+        value = int(address)
+        node = self._roots[address.version]
+        best = node[2]
+        for i in range(bits):
+            node = node[(value >> (bits - 1 - i)) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                best = node[2]
+        return best
+
+def build_route_index(tunnel_paths):
+    """RouteIndex from every peer's AllowedIPs, mapping prefixes to tunnel names.
+
+    Configs that cannot be read or parsed are skipped and returned alongside
+    as [(path, message)]. The index is rebuilt only when a config changes.
+    """
+    signature = []
+    for path in tunnel_paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    signature = tuple(signature)
+    cached = _index_cache.get(signature)
+    if cached is not None:
+        return cached
+    index = RouteIndex()
+    skipped = []
+    for path in tunnel_paths:
+        try:
+            config = load_config(path)
+        except (OSError, WireGuardConfigError) as e:
+            skipped.append((path, str(e)))
+            continue
+        for network in config.allowed_ips():
+            index.insert(network, config.name)
+    _index_cache.clear() # Only the current set of configs is worth keeping
+    _index_cache[signature] = (index, skipped)
+    return index, skipped
+
+if __name__ == "__main__":
+    # Route lookup benchmark with thousands of prefixes: python wireguard_config.py
+    import random
+    import time
+
+    random.seed(1)
+    networks = [ipaddress.ip_network(f"10.{random.randrange(256)}.{random.randrange(256)}.0/{random.choice((16, 20, 24))}",
+                                     strict=False) for _ in range(5000)]
+    tunnel_of = {network: f"site{i % 40}" for i, network in enumerate(networks)}
+    index = RouteIndex()
+    start = time.perf_counter()
+    for network, tunnel in tunnel_of.items():
+        index.insert(network, tunnel)
+    build_ms = (time.perf_counter() - start) * 1000
+    addresses = [f"10.{random.randrange(256)}.{random.randrange(256)}.{random.randrange(256)}" for _ in range(2000)]
+
+    def linear(ip_address):
+        address = ipaddress.ip_address(ip_address)
+        matches = [network for network in tunnel_of if address in network]
+        return tunnel_of[max(matches, key=lambda n: n.prefixlen)] if matches else None
+
+    start = time.perf_counter()
+    linear_results = [linear(a) for a in addresses[:100]]
+    linear_us = (time.perf_counter() - start) / 100 * 1e6
+    start = time.perf_counter()
+    trie_results = [index.lookup(a) for a in addresses]
+    trie_us = (time.perf_counter() - start) / len(addresses) * 1e6
+    assert trie_results[:100] == linear_results
+    print(f"{index.prefix_count} prefixes, trie built in {build_ms:.0f} ms")
+    print(f"  lookup: linear scan {linear_us:.0f} us, trie {trie_us:.1f} us")
@@ -1,8 +1,91 @@
-from wakeonlan import send_magic_packet
+import ipaddress
+import socket
+import time
+
+DEFAULT_WOL_PORT = 9
+DEFAULT_PREFIX_LENGTH = 24 # Used when a host has no 'subnet_mask' configured
 
 def wake_host(mac_address):
     try:
+        from wakeonlan import send_magic_packet # Imported on first use to keep it out of startup
         send_magic_packet(mac_address)
         return True, f"Magic packet sent to {mac_address}"
     except Exception as e:
         return False, str(e)
+
+def parse_mac(mac_address):
+    digits = ''.join(c for c in mac_address if c not in ':-. ')
+    if len(digits) != 12:
+        raise ValueError(f"Invalid MAC address: {mac_address}")
+    return bytes.fromhex(digits)
+
+def build_magic_packet(mac_address, secureon_password=None):
+    """Six 0xFF bytes followed by the MAC repeated 16 times, plus an optional SecureOn password"""
+    packet = b'\xff' * 6 + parse_mac(mac_address) * 16
+    if secureon_password:
+        packet += parse_secureon_password(secureon_password)
+    return packet
+
+def parse_secureon_password(password):
+    # Accept the usual hex notation (aa:bb:cc:dd:ee:ff or aa-bb-cc-dd) as well as raw 4/6 character strings
+    digits = ''.join(c for c in password if c not in ':-. ')
+    try:
+        raw = bytes.fromhex(digits) if len(digits) in (8, 12) else password.encode()
+    except ValueError:
+        raw = password.encode()
+    if len(raw) not in (4, 6):
+        raise ValueError("SecureOn password must be 4 or 6 bytes")
+    return raw
+
+def get_broadcast_address(host):
+    """Directed broadcast address of the subnet the host's ip_address lives in"""
+    try:
+        mask = host.get('subnet_mask') or DEFAULT_PREFIX_LENGTH
+        network = ipaddress.IPv4Network(f"{host['ip_address']}/{mask}", strict=False)
+        return str(network.broadcast_address)
+    except (KeyError, ValueError):
+        return '255.255.255.255'
+
+def wake_hosts(hosts, repeat=1, packets_per_second=None, port=DEFAULT_WOL_PORT,
+               secureon_password=None, broadcast_address=None):
+    """Wake many hosts over a single UDP socket.
+
+    Packets are built once per host, then sent `repeat` times to each host's
+    directed broadcast address (or `broadcast_address` if given), throttled to
+    `packets_per_second` when set. A host may override the password with its
+    own 'secureon_password' key.
+
+    Returns a list of (name, success, message) tuples in the order of `hosts`.
+    """
+    results = []
+    prepared = []
+    for host in hosts:
+        try:
+            packet = build_magic_packet(host['mac_address'], host.get('secureon_password') or secureon_password)
+            target = broadcast_address or get_broadcast_address(host)
+            prepared.append((host, packet, target))
+        except (KeyError, ValueError) as e:
+            results.append((host.get('name', ''), False, str(e)))
+
+    interval = 1.0 / packets_per_second if packets_per_second else 0
+    outcomes = {}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        next_send = time.monotonic()
+        for _ in range(max(1, repeat)):
+            for host, packet, target in prepared:
+                if interval:
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send = max(next_send, time.monotonic()) + interval
+                try:
+                    sock.sendto(packet, (target, port))
+                    outcomes.setdefault(host['name'], (True, f"Magic packet sent to {host['mac_address']} via {target}"))
+                except OSError as e:
+                    outcomes[host['name']] = (False, f"Failed to send to {host['mac_address']} via {target}: {e}")
+
+    results.extend((host['name'], *outcomes[host['name']]) for host, _, _ in prepared)
+    order = {host.get('name', ''): i for i, host in enumerate(hosts)}
+    results.sort(key=lambda result: order.get(result[0], 0))
+    return results